@@ -0,0 +1,131 @@
+"""Images de l'interface (assets/) redimensionnées à l'avance.
+
+Chaque fichier source n'est décodé qu'une fois. Les variantes sont produites
+à des tailles arrondies (par pas de step pixels) dans un thread dédié, puis
+gardées en mémoire (LRU) et sur disque (.cache/assets) : au redimensionnement
+de la fenêtre, l'interface ne fait que choisir une variante déjà calculée,
+ou en demande une et garde l'ancienne en attendant.
+
+Les PhotoImage Tk ne peuvent être créées que dans le thread principal : les
+variantes prêtes sont signalées dans la file ready, lue depuis la boucle Tk.
+Un fichier absent ou illisible n'a aucune variante (l'interface garde ses
+emoji).
+"""
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageOps
+
+# Modes de mise à l'échelle : recadrer pour couvrir la zone, ou tenir dedans
+COVER = 'cover'
+FIT = 'fit'
+
+
+def quantize(size, step):
+    """Taille arrondie au pas supérieur (au moins un pas)"""
+    return tuple(max(step, -(-value // step) * step) for value in size)
+
+
+class AssetCache:
+    """Variantes redimensionnées des images, calculées hors du thread de l'interface"""
+
+    def __init__(self, asset_dir='assets', cache_dir=os.path.join('.cache', 'assets'),
+                 step=128, max_variants=16):
+        self.asset_dir = asset_dir
+        self.cache_dir = cache_dir
+        self.step = step
+        self.max_variants = max_variants
+        self.ready = queue.Queue()
+        self._sources = {}
+        self._variants = OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def key(self, name, size, mode=COVER, step=None):
+        """Clé de la variante utilisée pour une zone de cette taille
+
+        step=1 demande la taille exacte (images de taille fixe comme le logo).
+        """
+        return (name, quantize(size, step or self.step), mode)
+
+    def get(self, key):
+        """Variante (image PIL) si elle est déjà calculée, sinon None et calcul demandé"""
+        with self._lock:
+            image = self._variants.get(key)
+            if image is not None:
+                self._variants.move_to_end(key)
+                return image
+            if key in self._pending or self._sources.get(key[0], True) is None:
+                return None
+            self._pending.add(key)
+        self._requests.put(key)
+        return None
+
+    def preload(self, name, sizes, mode=COVER, step=None):
+        """Demande à l'avance les variantes de plusieurs tailles"""
+        for size in sizes:
+            self.get(self.key(name, size, mode, step))
+
+    def _run(self):
+        while True:
+            key = self._requests.get()
+            try:
+                image = self._load_variant(key)
+            except OSError:
+                image = None
+            with self._lock:
+                self._pending.discard(key)
+                if image is not None:
+                    self._variants[key] = image
+                    while len(self._variants) > self.max_variants:
+                        self._variants.popitem(last=False)
+            if image is not None:
+                self.ready.put(key)
+
+    def _source(self, name):
+        """Image source décodée une seule fois (None si absente ou illisible)"""
+        if name not in self._sources:
+            try:
+                with Image.open(os.path.join(self.asset_dir, name)) as image:
+                    image.load()
+                    source = image.convert('RGBA')
+            except OSError:
+                source = None
+            with self._lock:
+                self._sources[name] = source
+        return self._sources[name]
+
+    def _cache_path(self, key):
+        name, (width, height), mode = key
+        stat = os.stat(os.path.join(self.asset_dir, name))
+        stem = os.path.splitext(name)[0]
+        return os.path.join(self.cache_dir,
+                            f"{stem}_{width}x{height}_{mode}_{int(stat.st_mtime)}_{stat.st_size}.png")
+
+    def _load_variant(self, key):
+        name, size, mode = key
+        source = self._source(name)
+        if source is None:
+            return None
+
+        path = self._cache_path(key)
+        if os.path.exists(path):
+            with Image.open(path) as image:
+                image.load()
+                return image.copy()
+
+        if mode == COVER:
+            image = ImageOps.fit(source, size, Image.LANCZOS)
+        else:
+            image = ImageOps.contain(source, size, Image.LANCZOS)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        partial = path + '.part'
+        image.save(partial, format='PNG')
+        os.replace(partial, path)
+        return image
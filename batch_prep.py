@@ -0,0 +1,322 @@
+"""Plans en cuisine groupée (batch cooking) : des recettes qui partagent leurs ingrédients.
+
+Le générateur habituel choisit chaque repas indépendamment : une semaine peut
+demander 25 ingrédients différents et sept séances de préparation. Ici les
+journées sont regroupées en séances (un plat préparé se garde KEEP_DAYS
+jours) et chaque repas est choisi de façon gloutonne, comme pour une
+couverture d'ensemble : parmi les recettes proches des calories voulues,
+celle qui ajoute le moins de temps à la séance et le moins d'ingrédients à
+la liste de courses.
+
+Temps d'une séance : la part « mise en place » du temps de préparation
+(laver, éplucher, couper) est répartie entre les ingrédients de la recette
+et n'est comptée qu'une fois par ingrédient dans la séance ; la cuisson ne
+se partage pas.
+
+Un index inversé ingrédient → recettes (par catégorie, triées par calories)
+donne les recettes qui réutilisent les ingrédients déjà achetés sans
+parcourir le catalogue.
+
+    python batch_prep.py --db meal_planner.db --days 7   # durée et gain par rapport au tirage habituel
+"""
+import argparse
+import random
+import sqlite3
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+from meal_optimizer import DIFFICULTY_LEVELS, MEAL_SHARES, MEAL_TYPES
+from recipe_model import ingredient_key, load_recipes, split_ingredients
+
+# Un plat préparé se garde KEEP_DAYS jours : une séance par bloc de journées
+KEEP_DAYS = 3
+
+# Part du temps de préparation passée à préparer les ingrédients (partageable)
+MISE_EN_PLACE_SHARE = 0.4
+
+# Coût (en minutes) d'un ingrédient de plus sur la liste de courses
+NEW_INGREDIENT_MINUTES = 5
+
+# Coût (en minutes) d'une calorie d'écart avec la part du repas
+CALORIE_WEIGHT = 0.2
+
+# Recettes retenues autour des calories voulues (part de la cible, minimum absolu)
+CALORIE_TOLERANCE = 0.25
+MIN_CALORIE_TOLERANCE = 50
+
+# Recettes évaluées par repas : les plus liées aux ingrédients achetés, et les
+# plus proches en calories (même sans ingrédient commun)
+CANDIDATES = 200
+NEAREST = 30
+
+# Départage aléatoire (en minutes) pour varier les plans
+VARIETY = 3
+
+
+def recipe_ingredients(recipe):
+    """{clé normalisée: libellé} des ingrédients d'une recette"""
+    ingredients = {}
+    for label in split_ingredients(recipe.ingredients):
+        ingredients.setdefault(ingredient_key(label), label)
+    return ingredients
+
+
+class PrepSession:
+    """Séance de préparation des plats des journées first_day à last_day (indices)"""
+
+    __slots__ = ('first_day', 'last_day', 'recipes', 'uses', 'labels',
+                 'ingredient_minutes', 'cooking_minutes', 'separate_minutes')
+
+    def __init__(self, first_day, last_day):
+        self.first_day = first_day
+        self.last_day = last_day
+        self.recipes = []                # (indice du jour, type de repas, Recipe)
+        self.uses = Counter()            # recettes de la séance par ingrédient
+        self.labels = {}
+        self.ingredient_minutes = {}     # mise en place de chaque ingrédient (une fois)
+        self.cooking_minutes = 0.0
+        self.separate_minutes = 0        # temps si chaque recette était préparée à part
+
+    @staticmethod
+    def split_time(recipe, ingredients):
+        """(cuisson, mise en place par ingrédient) d'une recette"""
+        prep = recipe.prep_time or 0
+        if not ingredients:
+            return prep, 0.0
+        return prep * (1 - MISE_EN_PLACE_SHARE), prep * MISE_EN_PLACE_SHARE / len(ingredients)
+
+    def marginal_minutes(self, recipe, ingredients):
+        """Minutes ajoutées à la séance par une recette"""
+        cooking, each = self.split_time(recipe, ingredients)
+        minutes = self.ingredient_minutes
+        return cooking + sum(max(0.0, each - minutes.get(key, 0.0)) for key in ingredients)
+
+    def add(self, day, meal_type, recipe, ingredients):
+        cooking, each = self.split_time(recipe, ingredients)
+        self.recipes.append((day, meal_type, recipe))
+        self.cooking_minutes += cooking
+        self.separate_minutes += recipe.prep_time or 0
+        for key, label in ingredients.items():
+            self.uses[key] += 1
+            self.labels.setdefault(key, label)
+            self.ingredient_minutes[key] = max(self.ingredient_minutes.get(key, 0.0), each)
+
+    @property
+    def minutes(self):
+        return self.cooking_minutes + sum(self.ingredient_minutes.values())
+
+    def shared(self):
+        """[(libellé, recettes)] des ingrédients préparés pour plusieurs recettes"""
+        return [(self.labels[key], count) for key, count in self.uses.most_common() if count > 1]
+
+
+def prep_sessions(days_recipes, keep_days=KEEP_DAYS):
+    """Séances de préparation d'un plan (journées {type de repas: Recipe})"""
+    sessions = []
+    for first in range(0, len(days_recipes), keep_days):
+        session = PrepSession(first, min(first + keep_days, len(days_recipes)) - 1)
+        for day in range(session.first_day, session.last_day + 1):
+            for meal_type, recipe in days_recipes[day].items():
+                if recipe is not None:
+                    session.add(day, meal_type, recipe, recipe_ingredients(recipe))
+        sessions.append(session)
+    return sessions
+
+
+def shopping_list(sessions):
+    """[(libellé, recettes)] de tous les ingrédients du plan, du plus utilisé au moins utilisé"""
+    uses = Counter()
+    labels = {}
+    for session in sessions:
+        uses.update(session.uses)
+        for key, label in session.labels.items():
+            labels.setdefault(key, label)
+    return [(labels[key], count) for key, count in uses.most_common()]
+
+
+def schedule_text(sessions):
+    """Programme de cuisine groupée affiché sous le plan"""
+    shopping = shopping_list(sessions)
+    text = "\n🥘 CUISINE GROUPÉE\n"
+    text += "─" * 35 + "\n"
+    text += f"🛒 Liste de courses: {len(shopping)} ingrédients\n"
+    text += f"   {', '.join(label for label, _ in shopping)}\n"
+
+    for number, session in enumerate(sessions, 1):
+        text += f"\n🔪 Séance {number} — jours {session.first_day + 1} à {session.last_day + 1}\n"
+        text += (f"   ⏱️  {session.minutes:.0f} min "
+                 f"(au lieu de {session.separate_minutes} min recette par recette)\n")
+        shared = session.shared()
+        if shared:
+            text += "   🥕 À préparer en une fois: "
+            text += ', '.join(f"{label} (x{count})" for label, count in shared[:8]) + "\n"
+        # Recettes regroupées par ingrédient principal partagé
+        order = {key: rank for rank, (key, _) in enumerate(session.uses.most_common())}
+        for day, meal_type, recipe in sorted(
+                session.recipes,
+                key=lambda item: (min((order[k] for k in recipe_ingredients(item[2])), default=0), item[0])):
+            text += f"   • Jour {day + 1} – {meal_type}: {recipe.name}\n"
+
+    total = sum(session.minutes for session in sessions)
+    separate = sum(session.separate_minutes for session in sessions)
+    saved = 100 * (separate - total) / separate if separate else 0
+    text += f"\n⏱️  TOTAL: {total:.0f} min de préparation au lieu de {separate} min (-{saved:.0f} %)\n"
+    text += "═" * 50 + "\n"
+    return text
+
+
+class BatchPlanner:
+    """Recettes par catégorie, triées par calories, et index inversé de leurs ingrédients"""
+
+    def __init__(self, recipes):
+        self.recipes = {meal_type: [] for meal_type in MEAL_TYPES}
+        for recipe in recipes:
+            if recipe.category in self.recipes:
+                self.recipes[recipe.category].append(recipe)
+
+        self.calories = {}
+        self.levels = {}
+        self.ingredients = {}
+        self.postings = {}
+        for meal_type, items in self.recipes.items():
+            items.sort(key=lambda r: r.calories or 0)
+            self.calories[meal_type] = [r.calories or 0 for r in items]
+            self.levels[meal_type] = [DIFFICULTY_LEVELS.get(r.difficulty, 1) for r in items]
+            self.ingredients[meal_type] = [recipe_ingredients(r) for r in items]
+            # Listes d'indices croissants : les recettes d'un intervalle de
+            # calories sont une tranche de chaque liste
+            postings = {}
+            for index, ingredients in enumerate(self.ingredients[meal_type]):
+                for key in ingredients:
+                    postings.setdefault(key, []).append(index)
+            self.postings[meal_type] = postings
+
+    @classmethod
+    def from_connection(cls, conn):
+        return cls(load_recipes(conn))
+
+    def candidates(self, meal_type, wanted, pantry):
+        """Indices des recettes à évaluer pour un repas d'environ wanted calories"""
+        calories = self.calories[meal_type]
+        tolerance = max(wanted * CALORIE_TOLERANCE, MIN_CALORIE_TOLERANCE)
+        low = bisect_left(calories, wanted - tolerance)
+        high = bisect_right(calories, wanted + tolerance)
+
+        shared = Counter()
+        postings = self.postings[meal_type]
+        for key in pantry:
+            indices = postings.get(key)
+            if indices:
+                shared.update(indices[bisect_left(indices, low):bisect_left(indices, high)])
+
+        # Les plus proches en calories, de part et d'autre de la cible
+        pos = bisect_left(calories, wanted)
+        nearest = range(max(0, pos - NEAREST // 2), min(len(calories), pos + NEAREST // 2))
+        return dict.fromkeys([index for index, _ in shared.most_common(CANDIDATES)] + list(nearest))
+
+    def choose(self, meal_type, wanted, session, pantry, used, level, rng):
+        """Indice de la recette la moins coûteuse pour ce repas (None si aucune)"""
+        recipes = self.recipes[meal_type]
+        calories = self.calories[meal_type]
+        levels = self.levels[meal_type]
+        ingredients = self.ingredients[meal_type]
+
+        best, best_cost = None, float('inf')
+        for index in self.candidates(meal_type, wanted, pantry):
+            if levels[index] > level or recipes[index].id in used:
+                continue
+            new = sum(1 for key in ingredients[index] if key not in pantry)
+            cost = (session.marginal_minutes(recipes[index], ingredients[index])
+                    + NEW_INGREDIENT_MINUTES * new
+                    + CALORIE_WEIGHT * abs(calories[index] - wanted)
+                    + VARIETY * rng.random())
+            if cost < best_cost:
+                best, best_cost = index, cost
+        if best is not None:
+            return best
+
+        # Voisinage épuisé (petit catalogue) : la plus proche en calories encore libre
+        allowed = [i for i in range(len(recipes)) if levels[i] <= level]
+        fresh = [i for i in allowed if recipes[i].id not in used] or allowed
+        return min(fresh, key=lambda i: abs(calories[i] - wanted), default=None)
+
+    def plan(self, days, target, category=None, max_difficulty='Difficile', keep_days=KEEP_DAYS, seed=None):
+        """Journées {type de repas: Recipe} qui partagent leurs ingrédients (None si impossible)
+
+        category restreint le plan à un seul type de repas ; target est la
+        cible journalière, répartie entre les repas selon MEAL_SHARES.
+        """
+        if days < 1:
+            return None
+        meal_types = [category] if category in self.recipes else MEAL_TYPES
+        level = DIFFICULTY_LEVELS[max_difficulty]
+        rng = random.Random(seed)
+        day_target = target * sum(MEAL_SHARES[m] for m in meal_types)
+
+        pantry = set()   # ingrédients déjà sur la liste de courses
+        used = set()
+        days_recipes = []
+        for first in range(0, days, keep_days):
+            session = PrepSession(first, min(first + keep_days, days) - 1)
+            for day in range(session.first_day, session.last_day + 1):
+                meals = {}
+                remaining = day_target
+                for position, meal_type in enumerate(meal_types):
+                    # Le dernier repas complète les calories des précédents
+                    share_left = sum(MEAL_SHARES[m] for m in meal_types[position:])
+                    wanted = remaining * MEAL_SHARES[meal_type] / share_left
+                    index = self.choose(meal_type, wanted, session, pantry, used, level, rng)
+                    if index is None:
+                        return None
+                    recipe = self.recipes[meal_type][index]
+                    ingredients = self.ingredients[meal_type][index]
+                    session.add(day, meal_type, recipe, ingredients)
+                    pantry.update(ingredients)
+                    used.add(recipe.id)
+                    meals[meal_type] = recipe
+                    remaining -= recipe.calories or 0
+                days_recipes.append(meals)
+        return days_recipes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure la planification en cuisine groupée")
+    parser.add_argument('--db', default='meal_planner.db')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--calories', type=int, default=2000)
+    parser.add_argument('--plans', type=int, default=20)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    start = time.perf_counter()
+    planner = BatchPlanner.from_connection(conn)
+    loaded = time.perf_counter() - start
+    conn.close()
+    count = sum(len(items) for items in planner.recipes.values())
+    print(f"{count} recettes, index construit en {loaded:.2f} s")
+
+    rng = random.Random(1)
+    results = {'tirage indépendant': [], 'cuisine groupée': []}
+    elapsed = 0.0
+    for seed in range(args.plans):
+        start = time.perf_counter()
+        days_recipes = planner.plan(args.days, args.calories, seed=seed)
+        elapsed += time.perf_counter() - start
+        independent = [{m: rng.choice(planner.recipes[m]) for m in MEAL_TYPES} for _ in range(args.days)]
+        for label, plan in (('cuisine groupée', days_recipes), ('tirage indépendant', independent)):
+            sessions = prep_sessions(plan)
+            results[label].append((len(shopping_list(sessions)),
+                                   sum(s.minutes for s in sessions),
+                                   sum(s.separate_minutes for s in sessions)))
+
+    print(f"plan de {args.days} jours en {1000 * elapsed / args.plans:.0f} ms")
+    for label, values in results.items():
+        n = len(values)
+        print(f"  {label:18} : {sum(v[0] for v in values) / n:5.1f} ingrédients, "
+              f"{sum(v[1] for v in values) / n:6.0f} min groupées "
+              f"({sum(v[2] for v in values) / n:.0f} min séparément)")
+
+
+if __name__ == "__main__":
+    main()
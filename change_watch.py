@@ -0,0 +1,112 @@
+"""Détection des modifications faites par d'autres instances sur la même base.
+
+Plusieurs postes peuvent ouvrir le même meal_planner.db (lecteur partagé).
+Des triggers inscrivent chaque ajout, modification ou suppression de
+recettes, plans, journées du calendrier et comptes dans change_log (numéro
+de séquence croissant, sujet, id de la ligne, utilisateur concerné).
+
+poll() ne coûte presque rien quand rien n'a changé : PRAGMA data_version ne
+change que si une autre connexion a validé une écriture. Sinon seules les
+lignes du journal postérieures au dernier numéro lu sont relues, et
+l'application ne rafraîchit que les écrans (et les recettes) concernés.
+
+Les écritures de l'application elle-même sont aussi journalisées, mais elles
+ont déjà été propagées : un trigger TEMP, qui ne se déclenche que pour la
+connexion surveillée, note leurs numéros dans temp.own_changes et poll() les
+ignore.
+"""
+import sqlite3
+
+# Au-delà, un sujet est considéré entièrement modifié (ids non relus)
+ROW_LIMIT = 500
+
+# Durée de conservation du journal (jours)
+KEEP_DAYS = 7
+
+# Sujets du journal (voir database.CHANGE_LOG_TABLES)
+TOPICS = ('recipes', 'plans', 'calendar', 'user')
+
+
+class ChangeWatcher:
+    """Lit le journal des modifications depuis le dernier appel"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS own_changes (seq INTEGER PRIMARY KEY)')
+        conn.execute('''
+            CREATE TEMP TRIGGER IF NOT EXISTS own_change_log AFTER INSERT ON main.change_log BEGIN
+                INSERT INTO own_changes (seq) VALUES (new.seq);
+            END
+        ''')
+        self.reset()
+
+    def reset(self):
+        """Repart de l'état actuel de la base (après un import, par exemple)"""
+        self.data_version = self._data_version()
+        self.last_seq = self.conn.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log').fetchone()[0]
+        self._forget_own_changes(self.last_seq)
+
+    def _forget_own_changes(self, last_seq):
+        # Hors transaction seulement : le DELETE en ouvrirait une, qui garderait
+        # un verrou de lecture sur la base jusqu'à la prochaine validation
+        if not self.conn.in_transaction:
+            self.conn.execute('DELETE FROM temp.own_changes WHERE seq <= ?', (last_seq,))
+            self.conn.commit()
+
+    def _data_version(self):
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def poll(self):
+        """{sujet: (ids des lignes, ids des utilisateurs)} modifiés depuis le dernier appel
+
+        Un ensemble vaut None s'il est inconnu ou trop grand : tout le sujet
+        est alors à recharger. Retourne {} si rien n'a changé.
+        """
+        version = self._data_version()
+        if version == self.data_version:
+            return {}
+        self.data_version = version
+
+        first, last = self.conn.execute('SELECT MIN(seq), MAX(seq) FROM change_log').fetchone()
+        if last is None or last < self.last_seq:
+            # Journal vidé ou base remplacée : tout recharger
+            self.last_seq = last or 0
+            return {topic: (None, None) for topic in TOPICS}
+        if first > self.last_seq + 1 and self.last_seq:
+            # Modifications purgées avant d'avoir été lues
+            self.last_seq = last
+            return {topic: (None, None) for topic in TOPICS}
+
+        # Numéros écrits par cette connexion : déjà propagés
+        external = 'seq > ? AND seq <= ? AND seq NOT IN (SELECT seq FROM temp.own_changes)'
+        changes = {}
+        counts = self.conn.execute(f'''
+            SELECT topic, COUNT(*) FROM change_log WHERE {external} GROUP BY topic
+        ''', (self.last_seq, last)).fetchall()
+        for topic, count in counts:
+            if count > ROW_LIMIT:
+                changes[topic] = (None, None)
+                continue
+            rows, users = set(), set()
+            for row_id, user_id in self.conn.execute(f'''
+                SELECT row_id, user_id FROM change_log WHERE topic = ? AND {external}
+            ''', (topic, self.last_seq, last)):
+                rows.add(row_id)
+                users.add(user_id)
+            changes[topic] = (rows, users)
+        self.last_seq = last
+        self._forget_own_changes(last)
+        return changes
+
+
+def prune(conn, keep_days=KEEP_DAYS, commit=True):
+    """Supprime les entrées du journal plus anciennes que keep_days jours"""
+    try:
+        deleted = conn.execute("DELETE FROM change_log WHERE changed_at < julianday('now') - ?",
+                               (keep_days,)).rowcount
+    except sqlite3.OperationalError:
+        # Base verrouillée par une autre instance : ce sera pour le prochain lancement
+        return 0
+    if commit:
+        conn.commit()
+    return deleted
@@ -1,6 +1,288 @@
 import sqlite3
 
+# Schéma complet de meal_planner.db (identique au fichier livré)
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        firstname TEXT NOT NULL,
+        lastname TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        height INTEGER,
+        weight REAL,
+        age INTEGER,
+        activity_level TEXT,
+        goals TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS recipes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        category TEXT NOT NULL,
+        ingredients TEXT NOT NULL,
+        instructions TEXT NOT NULL,
+        calories INTEGER,
+        prep_time INTEGER,
+        difficulty TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS meal_plans (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        date DATE,
+        breakfast TEXT,
+        lunch TEXT,
+        dinner TEXT,
+        snacks TEXT,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS saved_plans (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        plan_name TEXT NOT NULL,
+        plan_text TEXT NOT NULL,
+        calories_target INTEGER,
+        days_count INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS user_favorites (
+        user_id INTEGER,
+        recipe_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, recipe_id),
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (recipe_id) REFERENCES recipes (id)
+    )
+    ''',
+    # Code de partage des plans sauvegardés (plan_share.py)
+    '''
+    CREATE TABLE IF NOT EXISTS saved_plan_codes (
+        plan_id INTEGER PRIMARY KEY,
+        code TEXT NOT NULL,
+        FOREIGN KEY (plan_id) REFERENCES saved_plans (id)
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS saved_plan_codes_delete AFTER DELETE ON saved_plans BEGIN
+        DELETE FROM saved_plan_codes WHERE plan_id = old.id;
+    END
+    ''',
+    # Sélections de chaque recette (tirage pondéré, popularity.py)
+    '''
+    CREATE TABLE IF NOT EXISTS recipe_stats (
+        recipe_id INTEGER PRIMARY KEY,
+        times_selected INTEGER NOT NULL DEFAULT 0,
+        last_selected DATE,
+        FOREIGN KEY (recipe_id) REFERENCES recipes (id)
+    )
+    ''',
+    # Suivi d'utilisation, écrit par paquets (usage_events.py)
+    '''
+    CREATE TABLE IF NOT EXISTS usage_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        kind TEXT NOT NULL,
+        recipe_id INTEGER,
+        created_at REAL NOT NULL
+    )
+    ''',
+    # Doublons de recettes (recipe_dedup.py) : chaque recette déjà examinée,
+    # et la recette conservée pour les doublons fusionnés
+    '''
+    CREATE TABLE IF NOT EXISTS recipe_dedup (
+        recipe_id INTEGER PRIMARY KEY,
+        duplicate_of INTEGER,
+        similarity REAL
+    )
+    ''',
+    # Seaux LSH des signatures MinHash des recettes conservées
+    '''
+    CREATE TABLE IF NOT EXISTS recipe_lsh (
+        bucket INTEGER NOT NULL,
+        recipe_id INTEGER NOT NULL,
+        PRIMARY KEY (bucket, recipe_id)
+    ) WITHOUT ROWID
+    ''',
+    # Journal des modifications, lu par les autres instances (change_watch.py)
+    '''
+    CREATE TABLE IF NOT EXISTS change_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        topic TEXT NOT NULL,
+        row_id INTEGER,
+        user_id INTEGER,
+        changed_at REAL NOT NULL DEFAULT (julianday('now'))
+    )
+    ''',
+    # File de tâches persistante (job_queue.py) : une tâche par (kind, key)
+    '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        key TEXT NOT NULL,
+        payload TEXT,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        available_at REAL NOT NULL DEFAULT 0,
+        lease_token TEXT,
+        last_error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at REAL,
+        UNIQUE (kind, key)
+    )
+    ''',
+]
+
+# Index créés après les tables (et après un chargement massif)
+INDEXES = [
+    # Calendrier : une journée par utilisateur, lectures par intervalle de dates
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_meal_plans_user_date ON meal_plans (user_id, date)',
+    # Plans sauvegardés : liste et filtres de date par utilisateur
+    'CREATE INDEX IF NOT EXISTS idx_saved_plans_user_created ON saved_plans (user_id, created_at)',
+    # File de tâches : prochaines tâches disponibles (en attente ou bail expiré)
+    'CREATE INDEX IF NOT EXISTS idx_jobs_available ON jobs (kind, status, available_at)',
+]
+
+# Index plein texte des plans sauvegardés (contenu externe : saved_plans),
+# synchronisé par triggers à chaque sauvegarde, modification ou suppression.
+# user_id est indexé comme un mot : « user_id:42 AND saumon » ne parcourt que
+# les plans de l'utilisateur au lieu de filtrer ceux de tous les utilisateurs.
+SAVED_PLANS_FTS = [
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS saved_plans_fts USING fts5(
+        plan_name, plan_text, user_id,
+        content='saved_plans', content_rowid='id',
+        prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS saved_plans_fts_insert AFTER INSERT ON saved_plans BEGIN
+        INSERT INTO saved_plans_fts (rowid, plan_name, plan_text, user_id)
+        VALUES (new.id, new.plan_name, new.plan_text, new.user_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS saved_plans_fts_delete AFTER DELETE ON saved_plans BEGIN
+        INSERT INTO saved_plans_fts (saved_plans_fts, rowid, plan_name, plan_text, user_id)
+        VALUES ('delete', old.id, old.plan_name, old.plan_text, old.user_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS saved_plans_fts_update AFTER UPDATE ON saved_plans BEGIN
+        INSERT INTO saved_plans_fts (saved_plans_fts, rowid, plan_name, plan_text, user_id)
+        VALUES ('delete', old.id, old.plan_name, old.plan_text, old.user_id);
+        INSERT INTO saved_plans_fts (rowid, plan_name, plan_text, user_id)
+        VALUES (new.id, new.plan_name, new.plan_text, new.user_id);
+    END
+    ''',
+]
+
+# Triggers du journal des modifications : (table, sujet, colonne de l'utilisateur).
+# Créés avec les index, après un chargement massif.
+CHANGE_LOG_TABLES = [
+    ('recipes', 'recipes', 'NULL'),
+    ('saved_plans', 'plans', 'user_id'),
+    ('meal_plans', 'calendar', 'user_id'),
+    ('users', 'user', 'id'),
+]
+
+
+def _change_log_triggers():
+    for table, topic, user_column in CHANGE_LOG_TABLES:
+        for event, row in (('INSERT', 'new'), ('UPDATE', 'new'), ('DELETE', 'old')):
+            user = user_column if user_column == 'NULL' else f'{row}.{user_column}'
+            yield f'''
+            CREATE TRIGGER IF NOT EXISTS change_log_{table}_{event.lower()} AFTER {event} ON {table} BEGIN
+                INSERT INTO change_log (topic, row_id, user_id) VALUES ('{topic}', {row}.id, {user});
+            END
+            '''
+
+
 def get_connection():
     conn = sqlite3.connect("meal_planner.db")
     conn.row_factory = sqlite3.Row  # Pour retourner les résultats sous forme de dictionnaire
     return conn
+
+
+def set_journal_mode(conn, wal=False):
+    """Choisit le journal de la base ; retourne le mode obtenu
+
+    WAL (persistant) évite que lectures et sauvegardes en ligne bloquent les
+    écritures, mais son index partagé n'existe que sur la machine qui l'a
+    créé : sur un lecteur réseau partagé par plusieurs postes, les autres
+    postes manqueraient des validations et la base pourrait être corrompue.
+    Il n'est donc activé que pour une base locale ; sinon la base repasse
+    au journal par défaut (DELETE) si elle était en WAL.
+    """
+    mode = 'WAL' if wal else 'DELETE'
+    try:
+        return conn.execute(f'PRAGMA journal_mode={mode}').fetchone()[0]
+    except sqlite3.OperationalError:
+        # Base ouverte par un autre poste : le changement attendra un lancement seul
+        return conn.execute('PRAGMA journal_mode').fetchone()[0]
+
+
+def create_schema(conn, indexes=True):
+    """Crée toutes les tables (et leurs index) si elles n'existent pas"""
+    for statement in SCHEMA:
+        conn.execute(statement)
+    if indexes:
+        create_indexes(conn)
+
+
+def _drop_duplicate_plan_days(conn):
+    """Supprime les journées en double (même utilisateur, même date) avant la
+    création de l'index unique : seule la plus récente (id maximal) est gardée"""
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' "
+                    "AND name = 'idx_meal_plans_user_date'").fetchone():
+        return
+    conn.execute('''
+        DELETE FROM meal_plans
+        WHERE user_id IS NOT NULL AND date IS NOT NULL AND id NOT IN (
+            SELECT MAX(id) FROM meal_plans GROUP BY user_id, date
+        )
+    ''')
+
+
+def create_indexes(conn):
+    """Crée les index secondaires"""
+    _drop_duplicate_plan_days(conn)
+    for statement in INDEXES:
+        conn.execute(statement)
+    for statement in _change_log_triggers():
+        conn.execute(statement)
+    create_fulltext(conn)
+
+
+def has_fulltext(conn):
+    """Vrai si l'index plein texte des plans sauvegardés existe"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'saved_plans_fts'"
+    ).fetchone() is not None
+
+
+def create_fulltext(conn):
+    """Crée l'index plein texte (et l'alimente avec les plans existants)
+
+    Retourne False si SQLite a été compilé sans FTS5.
+    """
+    if has_fulltext(conn):
+        return True
+    try:
+        for statement in SAVED_PLANS_FTS:
+            conn.execute(statement)
+    except sqlite3.OperationalError:
+        return False
+    # Classement : le nom compte plus que le contenu, user_id ne compte pas
+    conn.execute("INSERT INTO saved_plans_fts (saved_plans_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 0.0)')")
+    conn.execute("INSERT INTO saved_plans_fts (saved_plans_fts) VALUES ('rebuild')")
+    conn.commit()
+    return True
@@ -0,0 +1,171 @@
+"""Sauvegardes de meal_planner.db pendant que l'application tourne.
+
+Les copies utilisent l'API de sauvegarde en ligne de SQLite
+(Connection.backup) par paquets de pages, avec une courte pause entre deux
+paquets : les écritures de l'application ne sont bloquées que le temps d'un
+paquet, et la progression est remontée à l'interface. Les copies tournent
+dans un thread avec leurs propres connexions ; les événements (progression,
+fin, erreur) sont déposés dans une file lue depuis la boucle Tk.
+
+Les sauvegardes planifiées sont des copies complètes, conservées par
+rotation (les plus récentes).
+Un instantané complet peut être exporté et réimporté sous forme compressée
+(.db.gz).
+"""
+import gzip
+import os
+import queue
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BACKUP_PREFIX = 'meal_planner_'
+BACKUP_SUFFIX = '.db'
+
+# Pages copiées par étape, et pause entre deux étapes (laisse passer les écritures)
+PAGES_PER_STEP = 1024
+STEP_SLEEP = 0.005
+
+# Tables attendues dans un instantané importé
+REQUIRED_TABLES = {'users', 'recipes', 'meal_plans', 'saved_plans'}
+
+
+class BackupManager:
+    """Copies en arrière-plan, rotation, export et import compressés"""
+
+    def __init__(self, db_path, backup_dir='backups', keep=7, interval_hours=24):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.interval = interval_hours * 3600
+        self.events = queue.Queue()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def list_backups(self):
+        """Sauvegardes existantes (chemin, taille, date), de la plus récente à la plus ancienne"""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        backups = []
+        for name in os.listdir(self.backup_dir):
+            if name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX):
+                path = os.path.join(self.backup_dir, name)
+                stat = os.stat(path)
+                backups.append((path, stat.st_size, datetime.fromtimestamp(stat.st_mtime)))
+        backups.sort(key=lambda b: b[2], reverse=True)
+        return backups
+
+    def is_due(self):
+        """Vrai si la dernière sauvegarde est plus ancienne que l'intervalle"""
+        backups = self.list_backups()
+        return not backups or time.time() - backups[0][2].timestamp() >= self.interval
+
+    def backup_now(self):
+        """Lance une sauvegarde avec rotation ; False si une opération est déjà en cours"""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        path = os.path.join(self.backup_dir,
+                            f"{BACKUP_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}{BACKUP_SUFFIX}")
+        return self._start('backup', self._backup_and_rotate, path)
+
+    def export_snapshot(self, path):
+        """Exporte un instantané complet compressé (gzip)"""
+        return self._start('export', self._export, path)
+
+    def import_snapshot(self, path):
+        """Remplace le contenu de la base par un instantané exporté ou une sauvegarde
+
+        L'appelant suspend d'abord ses autres connexions à la base (écritures
+        différées, recherche, visualiseurs) et les reprend à la fin.
+        """
+        return self._start('import', self._import, path)
+
+    def rotate(self):
+        """Supprime les sauvegardes au-delà des keep plus récentes"""
+        removed = []
+        for path, _, _ in self.list_backups()[self.keep:]:
+            os.remove(path)
+            removed.append(path)
+        return removed
+
+    def _start(self, kind, target, path):
+        if self.running:
+            return False
+        self._thread = threading.Thread(target=self._run, args=(kind, target, path), daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self, kind, target, path):
+        try:
+            result = target(kind, path)
+        except (OSError, sqlite3.Error, ValueError) as e:
+            self.events.put((kind, 'error', str(e)))
+        else:
+            self.events.put((kind, 'done', result))
+
+    def _copy(self, kind, source_path, target_path):
+        """Copie en ligne page par page, en publiant la progression
+
+        En mode WAL, la source garde une transaction de lecture ouverte : la
+        copie porte sur un instantané cohérent et n'est pas relancée à chaque
+        écriture de l'application, qui n'est jamais bloquée. Sans WAL, une
+        écriture pendant la copie la fait reprendre au début.
+        """
+        source = sqlite3.connect(source_path, isolation_level=None)
+        target = sqlite3.connect(target_path)
+
+        def progress(status, remaining, total):
+            self.events.put((kind, 'progress', (total - remaining, total)))
+
+        try:
+            if source.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+                source.execute('BEGIN')
+                source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            source.backup(target, pages=PAGES_PER_STEP, progress=progress, sleep=STEP_SLEEP)
+        finally:
+            target.close()
+            source.close()
+
+    def _backup_and_rotate(self, kind, path):
+        partial = path + '.part'
+        self._copy(kind, self.db_path, partial)
+        os.replace(partial, path)
+        self.rotate()
+        return path
+
+    def _export(self, kind, path):
+        with tempfile.TemporaryDirectory() as tmp:
+            snapshot = os.path.join(tmp, 'snapshot.db')
+            self._copy(kind, self.db_path, snapshot)
+            with open(snapshot, 'rb') as src, gzip.open(path, 'wb', compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+        return path
+
+    def _import(self, kind, path):
+        with tempfile.TemporaryDirectory() as tmp:
+            snapshot = os.path.join(tmp, 'snapshot.db')
+            # Instantané exporté (.gz) ou sauvegarde de la rotation (.db)
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rb') as src, open(snapshot, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+
+            conn = sqlite3.connect(snapshot)
+            try:
+                if conn.execute('PRAGMA quick_check').fetchone()[0] != 'ok':
+                    raise ValueError("instantané corrompu")
+                tables = {name for (name,) in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'")}
+            finally:
+                conn.close()
+            missing = REQUIRED_TABLES - tables
+            if missing:
+                raise ValueError(f"tables manquantes : {', '.join(sorted(missing))}")
+
+            # La base courante est réécrite page par page depuis l'instantané
+            self._copy(kind, snapshot, self.db_path)
+        return path
@@ -0,0 +1,238 @@
+"""Instrumentation des requêtes SQLite.
+
+Chaque requête passant par une MonitoredConnection est chronométrée et agrégée
+dans un histogramme de latence par instruction. Les requêtes plus lentes que
+le seuil sont journalisées avec leur EXPLAIN QUERY PLAN.
+
+Variables d'environnement :
+    SMARTMEAL_SLOW_QUERY_MS  seuil de journalisation des requêtes lentes (défaut 50)
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger('smartmeal.sql')
+
+# Bornes supérieures des seaux de l'histogramme, en millisecondes
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float('inf'))
+
+_EXPLAINABLE = ('select', 'with', 'update', 'delete', 'insert')
+
+
+def normalize_sql(sql):
+    """Réduit une requête à une clé stable (espaces compactés)"""
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+class QueryStats:
+    """Agrégats de latence d'une instruction SQL"""
+
+    __slots__ = ('sql', 'count', 'total_ms', 'max_ms', 'buckets')
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    def add(self, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                break
+
+    def percentile(self, p):
+        """Estimation du percentile à partir des seaux (borne supérieure)"""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS_MS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            'sql': self.sql,
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50), 3),
+            'p99_ms': round(self.percentile(99), 3),
+            'max_ms': round(self.max_ms, 3),
+            'histogram': {str(b): n for b, n in zip(BUCKETS_MS, self.buckets) if n},
+        }
+
+
+class QueryMonitor:
+    """Registre des statistiques et journal des requêtes lentes"""
+
+    def __init__(self, slow_ms=None, slow_log_size=100):
+        if slow_ms is None:
+            slow_ms = float(os.environ.get('SMARTMEAL_SLOW_QUERY_MS', 50))
+        self.slow_ms = slow_ms
+        self.slow_log_size = slow_log_size
+        self.stats = {}
+        self.slow_queries = []
+        self._lock = threading.Lock()
+
+    def record(self, sql, elapsed_ms, conn=None, params=None, explain=True):
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = QueryStats(key)
+            stats.add(elapsed_ms)
+
+        if elapsed_ms >= self.slow_ms:
+            plan = self.explain(conn, sql, params) if conn is not None and explain else []
+            entry = {
+                'sql': key,
+                'elapsed_ms': round(elapsed_ms, 3),
+                'plan': plan,
+                'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            with self._lock:
+                self.slow_queries.append(entry)
+                del self.slow_queries[:-self.slow_log_size]
+            logger.warning("Requête lente (%.1f ms): %s\n  %s", elapsed_ms, key,
+                           '\n  '.join(plan) or '(pas de plan)')
+
+    def explain(self, conn, sql, params=None):
+        """Retourne l'EXPLAIN QUERY PLAN d'une requête, ligne par ligne"""
+        if not sql.lstrip().lower().startswith(_EXPLAINABLE):
+            return []
+        try:
+            rows = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, params or ())
+            return [row[-1] for row in rows.fetchall()]
+        except sqlite3.Error:
+            return []
+
+    def snapshot(self):
+        """Agrégats triés par temps total décroissant"""
+        with self._lock:
+            stats = [s.to_dict() for s in self.stats.values()]
+            slow = list(self.slow_queries)
+        stats.sort(key=lambda s: s['total_ms'], reverse=True)
+        return {'slow_threshold_ms': self.slow_ms, 'queries': stats, 'slow_queries': slow}
+
+    def dump_json(self, path):
+        """Écrit les agrégats dans un fichier JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self.slow_queries.clear()
+
+
+# Moniteur partagé par toutes les connexions instrumentées
+monitor = QueryMonitor()
+
+
+class MonitoredCursor(sqlite3.Cursor):
+    """Curseur qui chronomètre l'exécution et la lecture des résultats
+
+    Le temps d'exécution et le temps de lecture (fetch*) sont cumulés en un
+    seul échantillon, enregistré quand les résultats sont épuisés, quand le
+    curseur est réutilisé ou quand il est libéré (conn.execute(...).fetchone()
+    ne lit qu'une ligne puis abandonne le curseur).
+    """
+
+    _sql = None
+    _params = None
+    _elapsed = 0.0
+
+    def _flush(self, explain=True):
+        if self._sql is not None:
+            self.connection.monitor.record(self._sql, self._elapsed * 1000,
+                                           self.connection, self._params, explain)
+            self._sql = None
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def execute(self, sql, params=()):
+        self._flush()
+        self._sql, self._params, self._elapsed = sql, params, 0.0
+        result = self._timed(super().execute, sql, params)
+        if self.description is None:
+            self._flush()
+        return result
+
+    def executemany(self, sql, seq_of_params):
+        self._flush()
+        self._sql, self._params, self._elapsed = sql, None, 0.0
+        result = self._timed(super().executemany, sql, seq_of_params)
+        self._flush()
+        return result
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._flush()
+        return row
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
+        rows = self._timed(super().fetchmany, size)
+        if len(rows) < size:
+            self._flush()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._flush()
+        return rows
+
+    def __next__(self):
+        try:
+            return self._timed(super().__next__)
+        except StopIteration:
+            self._flush()
+            raise
+
+    def close(self):
+        self._flush()
+        super().close()
+
+    def __del__(self):
+        # Ramasse-miettes, sur n'importe quel thread : durée seulement, sans
+        # EXPLAIN sur une connexion qui appartient peut-être à un autre thread
+        if self._sql is not None:
+            self._flush(explain=False)
+
+
+class MonitoredConnection(sqlite3.Connection):
+    """Connexion dont les curseurs sont instrumentés
+
+    Usage : sqlite3.connect(path, factory=MonitoredConnection)
+    """
+
+    monitor = monitor
+
+    def cursor(self, factory=MonitoredCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
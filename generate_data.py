@@ -0,0 +1,267 @@
+"""Générateur de données synthétiques pour les tests de montée en charge.
+
+Remplit recipes, users, saved_plans, meal_plans et user_favorites avec des
+distributions réalistes. Le résultat est déterministe pour une graine donnée.
+
+    python generate_data.py --db scale.db --recipes 20000 --users 2000 --days 670
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+
+from database import create_indexes, create_schema
+from nutrition import recompute_calories
+from recipe_dedup import dedup_new
+
+CATEGORIES = ['Petit-déjeuner', 'Déjeuner', 'Dîner']
+
+# Répartition du catalogue entre les catégories
+CATEGORY_WEIGHTS = [0.25, 0.4, 0.35]
+
+# Calories moyennes et écart-type par catégorie
+CALORIES = {
+    'Petit-déjeuner': (330, 70),
+    'Déjeuner': (450, 90),
+    'Dîner': (480, 100),
+}
+
+DIFFICULTIES = ['Facile', 'Moyen', 'Difficile']
+DIFFICULTY_WEIGHTS = [0.6, 0.3, 0.1]
+
+DISHES = {
+    'Petit-déjeuner': ['Bowl', 'Smoothie', 'Toast', 'Porridge', 'Pancakes', 'Omelette',
+                       'Granola', 'Muffin', 'Crêpes', 'Tartine'],
+    'Déjeuner': ['Salade', 'Wrap', 'Bowl', 'Quiche', 'Velouté', 'Taboulé', 'Buddha bowl',
+                 'Sandwich', 'Tarte', 'Poêlée'],
+    'Dîner': ['Curry', 'Gratin', 'Risotto', 'Pâtes', 'Tajine', 'Papillote', 'Wok',
+              'Ratatouille', 'Blanquette', 'Poke bowl'],
+}
+
+MAIN_INGREDIENTS = {
+    'Petit-déjeuner': ['Avoine', 'Banane', 'Myrtilles', 'Avocat', 'Œuf', 'Fraises',
+                       'Yaourt grec', 'Framboises', 'Pomme', 'Amandes'],
+    'Déjeuner': ['Quinoa', 'Poulet', 'Feta', 'Lentilles', 'Thon', 'Pois chiches',
+                 'Épinards', 'Chèvre', 'Saumon fumé', 'Courgette'],
+    'Dîner': ['Saumon', 'Poulet', 'Bœuf', 'Tofu', 'Cabillaud', 'Crevettes',
+              'Légumes de saison', 'Champignons', 'Patate douce', 'Aubergine'],
+}
+
+QUALIFIERS = ['Coloré', 'Énergie', 'Vitalité', 'du Marché', 'Provençal', 'Express',
+              'Maison', 'Gourmand', 'Léger', 'à la Méditerranéenne', 'Croquant',
+              'du Soleil', 'Printanier', 'Réconfortant', 'Végétarien']
+
+PANTRY = ["Huile d'olive", 'Citron', 'Ail', 'Oignon', 'Échalote', 'Persil', 'Coriandre',
+          'Basilic', 'Curcuma', 'Cumin', 'Gingembre', 'Sauce soja', 'Miel', "Lait d'amande",
+          'Lait de coco', 'Riz basmati', 'Pain complet', 'Tomate', 'Carotte', 'Concombre',
+          'Brocoli', 'Poivron', 'Graines de chia', 'Graines de sésame', 'Noix', 'Parmesan',
+          'Crème fraîche', 'Moutarde', 'Vinaigre balsamique', 'Herbes de Provence']
+
+STEPS = ['Préchauffer le four à 180°C', 'Laver et couper les légumes',
+         'Faire revenir à feu moyen 5 min', 'Cuire à couvert 15 min', "Mixer jusqu'à consistance lisse",
+         'Assaisonner selon le goût', 'Mélanger délicatement', 'Laisser reposer 10 min',
+         'Dresser dans une assiette creuse', "Parsemer d'herbes fraîches"]
+
+FIRSTNAMES = ['Camille', 'Léa', 'Manon', 'Chloé', 'Inès', 'Sarah', 'Emma', 'Jade', 'Louise',
+              'Lucas', 'Hugo', 'Louis', 'Nathan', 'Gabriel', 'Jules', 'Arthur', 'Adam',
+              'Yasmine', 'Soukaina', 'Mehdi', 'Karim', 'Nora', 'Théo', 'Zoé']
+
+LASTNAMES = ['Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit',
+             'Durand', 'Leroy', 'Moreau', 'Simon', 'Laurent', 'Lefebvre', 'Michel',
+             'Garcia', 'Benali', 'El Amrani', 'Roux', 'Fournier', 'Girard']
+
+ACTIVITY_LEVELS = ['Sédentaire', 'Léger', 'Modéré', 'Actif', 'Très actif']
+
+GOALS = ['Perte de poids', 'Maintien', 'Prise de masse', 'Manger plus sain']
+
+BATCH_SIZE = 50000
+
+
+def _batched(rows, size=BATCH_SIZE):
+    """Découpe un itérable en listes de taille fixe"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def recipe_rows(rng, count):
+    """Génère les lignes de la table recipes"""
+    categories = rng.choices(CATEGORIES, CATEGORY_WEIGHTS, k=count)
+    difficulties = rng.choices(DIFFICULTIES, DIFFICULTY_WEIGHTS, k=count)
+    for i in range(count):
+        category = categories[i]
+        main = rng.choice(MAIN_INGREDIENTS[category])
+        name = f"{rng.choice(DISHES[category])} {main} {rng.choice(QUALIFIERS)}"
+        ingredients = ', '.join([main] + rng.sample(PANTRY, rng.randint(3, 7)))
+        instructions = ', '.join(rng.sample(STEPS, rng.randint(3, 6)))
+        mean, sigma = CALORIES[category]
+        calories = max(120, int(rng.gauss(mean, sigma)))
+        prep_time = max(5, int(rng.lognormvariate(3.0, 0.5)))
+        yield (name, category, ingredients, instructions, calories, prep_time, difficulties[i])
+
+
+def user_rows(rng, count):
+    """Génère les lignes de la table users"""
+    for i in range(count):
+        firstname = rng.choice(FIRSTNAMES)
+        lastname = rng.choice(LASTNAMES)
+        email = f"{firstname.lower()}.{lastname.lower().replace(' ', '')}{i}@example.fr"
+        height = int(rng.gauss(170, 9))
+        weight = round(rng.gauss(70, 12), 1)
+        age = rng.randint(18, 75)
+        yield (firstname, lastname, email, 'password', height, weight, age,
+               rng.choice(ACTIVITY_LEVELS), rng.choice(GOALS))
+
+
+def meal_plan_rows(rng, user_ids, days, names_by_category, start):
+    """Génère l'historique quotidien (table meal_plans) de chaque utilisateur"""
+    breakfasts = names_by_category['Petit-déjeuner']
+    lunches = names_by_category['Déjeuner']
+    dinners = names_by_category['Dîner']
+    for user_id in user_ids:
+        # Tous les utilisateurs n'ont pas la même ancienneté
+        history = rng.randint(days // 2, days)
+        first_day = start - timedelta(days=history)
+        for offset in range(history):
+            day = (first_day + timedelta(days=offset)).isoformat()
+            yield (user_id, day, rng.choice(breakfasts), rng.choice(lunches),
+                   rng.choice(dinners), None)
+
+
+def saved_plan_rows(rng, user_ids, plans_per_user, names_by_category, start):
+    """Génère des plans sauvegardés au format texte de l'application"""
+    for user_id in user_ids:
+        for _ in range(int(rng.expovariate(1 / plans_per_user))):
+            days = rng.choice([3, 5, 7, 7, 7, 14, 30])
+            target = rng.choice([1500, 1800, 2000, 2200, 2500])
+            created = datetime.combine(start, datetime.min.time()) - timedelta(
+                minutes=rng.randint(0, 60 * 24 * 365))
+            lines = [f"🔮 Jours: {days} | 🎯 Calories/jour: {target}"]
+            for day in range(1, days + 1):
+                lines.append(f"\n✨ JOUR {day}")
+                for category in CATEGORIES:
+                    lines.append(f"🍽️  {category}: {rng.choice(names_by_category[category])}")
+            yield (user_id, f"Plan {created.strftime('%d/%m/%Y')}", '\n'.join(lines),
+                   target, days, created.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def favorite_rows(rng, user_ids, recipe_count, favorites_per_user):
+    """Génère les favoris, biaisés vers les recettes populaires"""
+    for user_id in user_ids:
+        count = min(recipe_count // 2, int(rng.expovariate(1 / favorites_per_user)))
+        chosen = set()
+        for _ in range(count * 4):
+            if len(chosen) >= count:
+                break
+            # Distribution de type Zipf : quelques recettes très populaires
+            chosen.add(min(recipe_count, int(rng.paretovariate(1.2))))
+        for recipe_id in chosen:
+            yield (user_id, recipe_id)
+
+
+def generate(db_path, recipes=20000, users=2000, days=670, plans_per_user=5,
+             favorites_per_user=20, seed=42, verbose=True):
+    """Crée ou complète une base de test et retourne le nombre de lignes écrites"""
+    rng = random.Random(seed)
+    start = date(2025, 12, 1)
+    started = time.perf_counter()
+
+    conn = sqlite3.connect(db_path)
+    # Chemins d'écriture rapides : pas de journal, pas de fsync, une seule transaction
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA cache_size = -200000')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    create_schema(conn, indexes=False)
+
+    counts = {}
+
+    def insert(table, sql, rows):
+        written = 0
+        for batch in _batched(rows):
+            conn.executemany(sql, batch)
+            written += len(batch)
+        counts[table] = written
+        if verbose:
+            print(f"  {table}: {written} lignes ({time.perf_counter() - started:.1f}s)")
+
+    conn.execute('BEGIN')
+    first_recipe = (conn.execute('SELECT MAX(id) FROM recipes').fetchone()[0] or 0) + 1
+    insert('recipes', '''
+        INSERT INTO recipes (name, category, ingredients, instructions, calories, prep_time, difficulty)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', recipe_rows(rng, recipes))
+    # Calories dérivées des ingrédients (table nutrition.csv)
+    recompute_calories(conn, first_id=first_recipe, commit=False)
+
+    first_user = (conn.execute('SELECT MAX(id) FROM users').fetchone()[0] or 0) + 1
+    insert('users', '''
+        INSERT INTO users (firstname, lastname, email, password, height, weight, age, activity_level, goals)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', user_rows(rng, users))
+    user_ids = range(first_user, first_user + users)
+
+    names_by_category = {category: [] for category in CATEGORIES}
+    for name, category in conn.execute('SELECT name, category FROM recipes'):
+        names_by_category.setdefault(category, []).append(name)
+
+    insert('meal_plans', '''
+        INSERT INTO meal_plans (user_id, date, breakfast, lunch, dinner, snacks)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', meal_plan_rows(rng, user_ids, days, names_by_category, start))
+
+    insert('saved_plans', '''
+        INSERT INTO saved_plans (user_id, plan_name, plan_text, calories_target, days_count, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', saved_plan_rows(rng, user_ids, plans_per_user, names_by_category, start))
+
+    recipe_total = first_recipe + recipes - 1
+    insert('user_favorites', '''
+        INSERT OR IGNORE INTO user_favorites (user_id, recipe_id) VALUES (?, ?)
+    ''', favorite_rows(rng, user_ids, recipe_total, favorites_per_user))
+
+    # Recettes quasi identiques fusionnées (favoris reportés sur la recette conservée)
+    duplicates = dedup_new(conn, commit=False)
+    if verbose:
+        print(f"  doublons fusionnés: {len(duplicates)} ({time.perf_counter() - started:.1f}s)")
+
+    # Index créés après le chargement, plus rapide que de les maintenir ligne à ligne
+    create_indexes(conn)
+    conn.commit()
+    conn.close()
+
+    if verbose:
+        total = sum(counts.values())
+        print(f"✅ {total} lignes écrites dans {db_path} en {time.perf_counter() - started:.1f}s")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère une base SmartMeal-Planner de test")
+    parser.add_argument('--db', default='scale_test.db', help="fichier SQLite de sortie")
+    parser.add_argument('--recipes', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=670, help="jours d'historique max par utilisateur")
+    parser.add_argument('--plans-per-user', type=int, default=5)
+    parser.add_argument('--favorites-per-user', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--overwrite', action='store_true', help="supprime le fichier existant")
+    args = parser.parse_args()
+
+    if args.overwrite and os.path.exists(args.db):
+        os.remove(args.db)
+
+    generate(args.db, recipes=args.recipes, users=args.users, days=args.days,
+             plans_per_user=args.plans_per_user, favorites_per_user=args.favorites_per_user,
+             seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
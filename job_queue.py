@@ -0,0 +1,224 @@
+"""File de tâches persistante dans meal_planner.db (table jobs).
+
+Une tâche est identifiée par (kind, key) : la remettre en file ne crée pas
+de doublon, ce qui rend la planification rejouable. Un worker prend un
+paquet de tâches par bail (lease) : elles sont marquées « leased » avec un
+jeton et une échéance. Si le worker s'arrête, le bail expire et les tâches
+sont reprises par un autre ; au-delà de max_attempts elles passent en échec.
+
+L'acquittement (ack) vérifie le jeton et se fait dans la même transaction
+que le travail de la tâche : une tâche terminée l'est exactement une fois,
+même après une interruption.
+
+Le calcul d'une tâche (prepare) se fait hors transaction ; seule
+l'écriture de son résultat (handler) prend le verrou d'écriture, ce qui
+laisse les autres workers prendre et enregistrer leurs paquets pendant ce
+temps.
+"""
+import sqlite3
+import time
+import uuid
+
+QUEUED = 'queued'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class LeaseLost(Exception):
+    """Le bail a expiré et la tâche a été reprise par un autre worker"""
+
+
+class Job:
+    """Tâche prise par bail"""
+
+    __slots__ = ('id', 'kind', 'key', 'payload', 'attempts', 'token', 'result')
+
+    def __init__(self, job_id, kind, key, payload, attempts, token):
+        self.id = job_id
+        self.kind = kind
+        self.key = key
+        self.payload = payload
+        self.attempts = attempts
+        self.token = token
+        self.result = None  # calculé par prepare, hors transaction
+
+
+class JobQueue:
+    """Mise en file, bail, acquittement et reprise des tâches
+
+    La connexion doit être en mode autocommit (isolation_level=None) : les
+    transactions sont ouvertes explicitement.
+    """
+
+    def __init__(self, conn, lease_seconds=120, max_attempts=5, retry_delay=30):
+        self.conn = conn
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def enqueue(self, kind, key, payload=None):
+        """Met une tâche en file ; False si (kind, key) existe déjà"""
+        return self.enqueue_many(kind, [(key, payload)]) == 1
+
+    def enqueue_many(self, kind, items):
+        """Met en file des (key, payload) ; retourne le nombre de nouvelles tâches"""
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO jobs (kind, key, payload) VALUES (?, ?, ?)',
+                ((kind, key, payload) for key, payload in items))
+            added = self.conn.total_changes - before
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        return added
+
+    def lease(self, kind, limit=1):
+        """Prend jusqu'à limit tâches disponibles (en attente, ou dont le bail a expiré)"""
+        now = time.time()
+        token = uuid.uuid4().hex
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Tâches abandonnées trop souvent : en échec plutôt que reprises sans fin
+            self.conn.execute('''
+                UPDATE jobs SET status = ?, lease_token = NULL, finished_at = ?,
+                                last_error = COALESCE(last_error, 'bail expiré')
+                WHERE kind = ? AND status = ? AND available_at <= ? AND attempts >= ?
+            ''', (FAILED, now, kind, LEASED, now, self.max_attempts))
+            rows = self.conn.execute('''
+                UPDATE jobs SET status = ?, lease_token = ?, available_at = ?, attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM jobs
+                    WHERE kind = ? AND status IN (?, ?) AND available_at <= ?
+                    ORDER BY available_at, id
+                    LIMIT ?
+                )
+                RETURNING id, key, payload, attempts
+            ''', (LEASED, token, now + self.lease_seconds,
+                  kind, QUEUED, LEASED, now, limit)).fetchall()
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        return [Job(job_id, kind, key, payload, attempts, token)
+                for job_id, key, payload, attempts in sorted(rows)]
+
+    def ack(self, job):
+        """Marque la tâche terminée, dans la transaction en cours de l'appelant"""
+        cursor = self.conn.execute('''
+            UPDATE jobs SET status = ?, lease_token = NULL, finished_at = ?
+            WHERE id = ? AND status = ? AND lease_token = ?
+        ''', (DONE, time.time(), job.id, LEASED, job.token))
+        if cursor.rowcount != 1:
+            raise LeaseLost(job.key)
+
+    def fail(self, job, error):
+        """Remet la tâche en file après un délai, ou la passe en échec"""
+        failed = job.attempts >= self.max_attempts
+        self.conn.execute('''
+            UPDATE jobs SET status = ?, lease_token = NULL, available_at = ?,
+                            finished_at = ?, last_error = ?
+            WHERE id = ? AND lease_token = ?
+        ''', (FAILED if failed else QUEUED, time.time() + self.retry_delay * job.attempts,
+              time.time() if failed else None, str(error)[:500], job.id, job.token))
+
+    def process(self, jobs, handler, prepare=None):
+        """Exécute un paquet de tâches
+
+        prepare(job), facultatif, calcule le résultat de chaque tâche hors
+        transaction (dans job.result) ; handler(conn, job) l'enregistre
+        ensuite, toutes les tâches du paquet dans une seule transaction
+        courte. Chaque tâche a son point de sauvegarde : une erreur n'annule
+        que son propre travail (la tâche est remise en file), un bail perdu
+        est ignoré. Retourne le nombre de tâches terminées.
+        """
+        ready, errors = [], []
+        for job in jobs:
+            if prepare is None:
+                ready.append(job)
+                continue
+            try:
+                job.result = prepare(job)
+            except Exception as e:
+                errors.append((job, e))
+            else:
+                ready.append(job)
+
+        done = 0
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            for job, error in errors:
+                self.fail(job, error)
+            for job in ready:
+                self.conn.execute('SAVEPOINT job')
+                try:
+                    handler(self.conn, job)
+                    self.ack(job)
+                except LeaseLost:
+                    self.conn.execute('ROLLBACK TO job')
+                except Exception as e:
+                    self.conn.execute('ROLLBACK TO job')
+                    self.fail(job, e)
+                else:
+                    done += 1
+                self.conn.execute('RELEASE job')
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        return done
+
+    def next_available(self, kind):
+        """Échéance de la prochaine tâche disponible (None si plus rien à faire)
+
+        Les tâches en cours comptent : si leur worker s'est arrêté, elles
+        redeviennent disponibles à l'expiration du bail.
+        """
+        return self.conn.execute(
+            'SELECT MIN(available_at) FROM jobs WHERE kind = ? AND status IN (?, ?)',
+            (kind, QUEUED, LEASED)).fetchone()[0]
+
+    def stats(self, kind):
+        """Nombre de tâches par état"""
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update(self.conn.execute(
+            'SELECT status, COUNT(*) FROM jobs WHERE kind = ? GROUP BY status', (kind,)))
+        return counts
+
+    def purge(self, kind, older_than):
+        """Supprime les tâches terminées avant older_than (timestamp)"""
+        self.conn.execute('DELETE FROM jobs WHERE kind = ? AND status = ? AND finished_at < ?',
+                          (kind, DONE, older_than))
+
+
+def connect(db_path):
+    """Connexion autocommit pour la file (attend les verrous des autres workers)"""
+    return sqlite3.connect(db_path, isolation_level=None, timeout=30)
+
+
+def work(db_path, kind, handler, batch_size=50, poll_interval=0.5, prepare=None, **options):
+    """Boucle d'un worker : prend des paquets jusqu'à ce que toutes les tâches soient terminées
+
+    Les tâches en cours chez un autre worker (ou dont le worker s'est
+    arrêté) sont attendues jusqu'à la fin de leur bail. Retourne le nombre
+    de tâches terminées par ce worker.
+    """
+    conn = connect(db_path)
+    jobs_queue = JobQueue(conn, **options)
+    done = 0
+    try:
+        while True:
+            jobs = jobs_queue.lease(kind, batch_size)
+            if jobs:
+                done += jobs_queue.process(jobs, handler, prepare)
+                continue
+            available_at = jobs_queue.next_available(kind)
+            if available_at is None:
+                break
+            time.sleep(min(poll_interval, max(0.0, available_at - time.time())) or 0.01)
+    finally:
+        conn.close()
+    return done
@@ -1,13 +1,67 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog, simpledialog
 import sqlite3
-import random
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from PIL import Image, ImageTk, ImageDraw
 import requests
 from io import BytesIO
 import threading
 import queue
+import os
+
+import meal_calendar
+import plan_share
+import ui_profiler
+import usage_events
+from asset_cache import COVER, FIT, AssetCache
+from batch_prep import BatchPlanner, prep_sessions, schedule_text
+from change_watch import ChangeWatcher, prune as prune_change_log
+from database import create_schema, set_journal_mode
+from db_backup import BackupManager
+from db_monitor import MonitoredConnection, monitor as query_monitor
+from meal_optimizer import DIFFICULTY_LEVELS, MEAL_SHARES, MealOptimizer
+from meal_plan_model import MEAL_TYPES, GeneratedPlan, RecipePool, recipe_calories
+from nutrition import recompute_calories
+from paged_text import SCAN_CHUNK, FileSource, PlanBlobSource
+from plan_search import PlanSearch
+from popularity import PopularitySampler, record_selection
+from recipe_catalog import RecipeCatalog
+from recipe_dedup import dedup_new
+from recipe_search import RecipeSearch
+from saved_plan_search import SavedPlanSearch
+from screen_manager import ScreenManager
+from ui_profiler import profile_screen
+
+# Délai d'attente après la dernière frappe avant de lancer une recherche
+SEARCH_DEBOUNCE_MS = 150
+
+# Nombre maximal de cartes affichées dans la grille des recettes
+MAX_RECIPE_CARDS = 60
+
+# Images de l'interface (assets/) et taille des logos
+ASSET_BACKGROUND = 'background.png'
+ASSET_LOGO = 'logo.png'
+LOGO_SIZES = {'login': (96, 96), 'sidebar': (48, 48)}
+
+# Intervalle de vérification des sauvegardes planifiées (ms)
+BACKUP_CHECK_MS = 10 * 60 * 1000
+
+# Intervalle de détection des modifications faites par d'autres postes (ms)
+CHANGE_POLL_MS = 2000
+
+# Journal WAL, seulement pour une base locale (SMARTMEAL_WAL=1) : jamais sur un lecteur partagé
+USE_WAL = os.environ.get('SMARTMEAL_WAL', '').lower() in ('1', 'true', 'yes', 'on')
+
+# Plans candidats évalués par le mode « meilleur de N »
+BEST_OF_CANDIDATES = 64
+
+DAY_NAMES = ["Lun", "Mar", "Mer", "Jeu", "Ven", "Sam", "Dim"]
+
+MONTH_NAMES = ["Janvier", "Février", "Mars", "Avril", "Mai", "Juin", "Juillet",
+               "Août", "Septembre", "Octobre", "Novembre", "Décembre"]
+
+# Colonnes de meal_plans affichées dans le calendrier
+MEAL_ICONS = {'breakfast': "🥞", 'lunch': "🍲", 'dinner': "🍛"}
 
 class ModernSmartMealPlanner:
     def __init__(self, root):
@@ -33,18 +87,81 @@ class ModernSmartMealPlanner:
         self.recipe_images = {}
         self.create_default_images()
         
+        # Logo et fond d'écran, redimensionnés hors du thread de l'interface
+        self.assets = AssetCache()
+        self.asset_photos = {}
+        self.asset_targets = {}
+        self.login_background = None
+        self.assets.preload(ASSET_BACKGROUND, [(self.root.winfo_screenwidth(), self.root.winfo_screenheight())])
+        for size in LOGO_SIZES.values():
+            self.assets.preload(ASSET_LOGO, [size], FIT, step=1)
+        
         # Configuration des styles
         self.setup_styles()
         
         self.current_user = None
         self.setup_database()
         
+        # Cache des recettes et fenêtre de détails réutilisable
+        self.recipe_catalog = RecipeCatalog(self.conn)
+        self.recipe_pool = RecipePool(self.conn, self.recipe_catalog)
+        self.recipe_sampler = PopularitySampler(self.conn)
+        self.saved_plan_search = SavedPlanSearch(self.conn)
+        self.saved_plan_search_job = None
+        self.details_popup = None
+        self.details_widgets = {}
+        
+        # Visualiseurs de plans sauvegardés ouverts (fenêtre → fermeture), chacun avec sa connexion
+        self.plan_viewers = {}
+        
+        # Recherche de recettes en arrière-plan
+        self.recipe_search = RecipeSearch(self.db_path, self.conn, limit=MAX_RECIPE_CARDS)
+        self.recipe_search_job = None
+        
+        # Période affichée par le calendrier
+        self.calendar_anchor = date.today()
+        
+        # Tableaux triés pour le mode optimisé (construits à la première utilisation)
+        self.meal_optimizer = None
+        self.pareto_plans = []
+        
+        # Index des ingrédients du mode cuisine groupée (construit à la première utilisation)
+        self.batch_planner = None
+        
+        # Pool de processus du mode « meilleur de N » (démarré à la première utilisation)
+        self.plan_search = None
+        self.plan_search_futures = []
+        self.plan_search_stale = False
+        
+        # Suivi d'utilisation, écrit en arrière-plan par paquets
+        self.usage = usage_events.EventBuffer(self.db_path)
+        
+        # Sauvegardes en arrière-plan (planifiées, export et import)
+        self.backup_manager = BackupManager(self.db_path)
+        self.backup_status = ""
+        self.backup_percent = 0
+        self.backup_poll_job = None
+        
+        # Écrans mis en cache (construits une seule fois par session)
+        self.screen_manager = ScreenManager()
+        self.register_screens()
+        
         # Bind pour le redimensionnement
         self.root.bind('<Configure>', self.on_window_resize)
         
         # Vérifier périodiquement la queue d'images
         self.root.after(100, self.check_image_queue)
         
+        # Sauvegarde planifiée (vérifiée au démarrage puis périodiquement)
+        self.root.after(5000, self.check_scheduled_backup)
+        
+        # Modifications faites par les autres instances sur la même base
+        self.change_watcher = ChangeWatcher(self.conn)
+        self.root.after(CHANGE_POLL_MS, self.check_external_changes)
+        
+        # Profilage de l'interface (SMARTMEAL_PROFILE=1)
+        self.loop_sampler = ui_profiler.install(self.root)
+        
         self.show_login_screen()
     
     def check_image_queue(self):
@@ -56,15 +173,55 @@ class ModernSmartMealPlanner:
                 self.recipe_images[key] = photo
                 
                 # Rafraîchir l'affichage si on est sur la page des recettes
-                if hasattr(self, 'recipes_cards_frame') and self.recipes_cards_frame.winfo_exists():
+                if self.screen_manager.is_visible('recipes'):
                     self.refresh_recipes_display()
+                else:
+                    self.screen_manager.screens['recipes'].invalidate()
                     
         except queue.Empty:
             pass
         
+        # Variantes du logo et du fond prêtes
+        try:
+            while True:
+                key = self.assets.ready.get_nowait()
+                for label, target in list(self.asset_targets.items()):
+                    if not label.winfo_exists():
+                        del self.asset_targets[label]
+                    elif target == key:
+                        self.apply_asset(label, key)
+        except queue.Empty:
+            pass
+        
         # Vérifier à nouveau dans 100ms
         self.root.after(100, self.check_image_queue)
     
+    def show_asset(self, label, name, size, mode=COVER, step=None):
+        """Affiche sur label la variante de l'image adaptée à size (dès qu'elle est prête)
+        
+        Tant que la variante n'est pas calculée, le label garde son contenu
+        (emoji ou variante précédente).
+        """
+        key = self.assets.key(name, size, mode, step)
+        if self.asset_targets.get(label) == key:
+            return
+        self.asset_targets[label] = key
+        self.apply_asset(label, key)
+    
+    def apply_asset(self, label, key):
+        """Affiche une variante déjà calculée (PhotoImage créée une seule fois)"""
+        image = self.assets.get(key)
+        if image is None:
+            return
+        photo = self.asset_photos.get(key)
+        if photo is None:
+            photo = ImageTk.PhotoImage(image)
+            self.asset_photos[key] = photo
+            if len(self.asset_photos) > self.assets.max_variants:
+                del self.asset_photos[next(iter(self.asset_photos))]
+        label.configure(image=photo)
+        label.image = photo
+    
     def create_default_images(self):
         """Crée des images par défaut"""
         # Tailles d'images
@@ -140,55 +297,29 @@ class ModernSmartMealPlanner:
         }
     
     def setup_database(self):
-        """Initialise la base de données"""
-        self.conn = sqlite3.connect('meal_planner.db', check_same_thread=False)
+        """Initialise la base de données
+        
+        Appelée avant la création des caches et des écrans, qui lisent donc
+        directement la base à jour (recettes d'exemple, doublons fusionnés).
+        """
+        self.db_path = 'meal_planner.db'
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                    factory=MonitoredConnection)
         self.cursor = self.conn.cursor()
         
-        # Table utilisateurs
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                firstname TEXT NOT NULL,
-                lastname TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                height INTEGER,
-                weight REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Table recettes
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS recipes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                category TEXT NOT NULL,
-                ingredients TEXT NOT NULL,
-                instructions TEXT NOT NULL,
-                calories INTEGER,
-                prep_time INTEGER,
-                difficulty TEXT
-            )
-        ''')
-        
-        # Table inscriptions
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS saved_plans (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                plan_name TEXT NOT NULL,
-                plan_text TEXT NOT NULL,
-                calories_target INTEGER,
-                days_count INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
+        # Journal par défaut (base partagée entre postes) ; WAL sur demande pour une base locale
+        set_journal_mode(self.conn, wal=USE_WAL)
+        
+        # Tables et index (schéma complet, voir database.py)
+        create_schema(self.conn)
         
         # Peupler avec des données d'exemple
         self.populate_sample_recipes()
+        
+        # Recettes ajoutées depuis le dernier lancement : doublons fusionnés
+        dedup_new(self.conn, commit=False)
         self.conn.commit()
+        prune_change_log(self.conn)
     
     def populate_sample_recipes(self):
         """Remplit la base avec des recettes d'exemple"""
@@ -243,16 +374,22 @@ class ModernSmartMealPlanner:
         count = self.cursor.fetchone()[0]
         
         if count == 0:
+            recipe_ids = []
             for recipe in sample_recipes:
                 self.cursor.execute('''
                     INSERT INTO recipes 
                     (name, category, ingredients, instructions, calories, prep_time, difficulty)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
                 ''', recipe)
+                recipe_ids.append(self.cursor.lastrowid)
+            # Calories dérivées des ingrédients (table nutrition.csv)
+            recompute_calories(self.conn, recipe_ids=recipe_ids, commit=False)
     
     def create_recipe_card(self, parent, recipe_data):
         """Crée une carte de recette moderne - VERSION CORRIGÉE"""
-        recipe_id, name, category, ingredients, instructions, calories, prep_time, difficulty = recipe_data
+        recipe_id, name, category = recipe_data.id, recipe_data.name, recipe_data.category
+        ingredients, calories = recipe_data.ingredients, recipe_data.calories
+        prep_time, difficulty = recipe_data.prep_time, recipe_data.difficulty
         
         # Créer la carte principale - SANS CURSEUR SUR LA CARTE PRINCIPALE
         card = tk.Frame(parent, bg=self.colors['card_bg'], relief='flat',
@@ -342,6 +479,7 @@ class ModernSmartMealPlanner:
         
         # Effets hover seulement sur le bouton
         def on_enter(e):
+            self.prefetch_recipe(recipe_id)
             details_btn.configure(bg=self.colors['primary_dark'])
             btn_content.configure(bg=self.colors['primary_dark'])
             details_text.configure(bg=self.colors['primary_dark'])
@@ -363,38 +501,107 @@ class ModernSmartMealPlanner:
             widget.bind('<Leave>', on_leave)
             widget.bind('<Button-1>', on_click)
         
-        # NE PAS mettre de binding sur la carte entière
+        # NE PAS mettre de binding de clic sur la carte entière
         # NE PAS mettre de binding sur les autres éléments (name_label, ingredients_label, etc.)
+        # Seul le survol de la carte précharge les détails de la recette
+        card.bind('<Enter>', lambda e: self.prefetch_recipe(recipe_id))
         
         return card
     
     def show_recipe_details(self, recipe_id):
-        """Affiche les détails d'une recette"""
-        print(f"Tentative d'affichage de la recette ID: {recipe_id}")  # Debug
-        
-        self.cursor.execute('SELECT * FROM recipes WHERE id = ?', (recipe_id,))
-        recipe = self.cursor.fetchone()
+        """Affiche les détails d'une recette dans la fenêtre de détails réutilisable"""
+        recipe = self.recipe_catalog.get(recipe_id)
         
         if not recipe:
             messagebox.showerror("Erreur", "Recette non trouvée")
             return
         
-        print(f"Recette trouvée: {recipe[1]}")  # Debug
+        if self.details_popup is None or not self.details_popup.winfo_exists():
+            self.build_recipe_details_window()
+        
+        popup = self.details_popup
+        widgets = self.details_widgets
+        
+        popup.title(f"📖 {recipe.name}")
+        widgets['title'].configure(text=recipe.name)
+        
+        category_bg = {
+            'Petit-déjeuner': self.colors['warning'],
+            'Déjeuner': self.colors['success'],
+            'Dîner': self.colors['info']
+        }.get(recipe.category, self.colors['primary'])
+        widgets['category'].configure(text=recipe.category, bg=category_bg)
+        
+        widgets['calories'].configure(text=f"{recipe.calories} cal")
+        widgets['prep_time'].configure(text=f"{recipe.prep_time} min")
+        widgets['difficulty'].configure(text=recipe.difficulty)
+        
+        self.details_recipe_id = recipe_id
+        self.update_favorite_button()
+        self.usage.record(usage_events.VIEW, self.current_user['id'], recipe_id)
+        
+        instructions = recipe.load_instructions(self.conn)
+        for key, value in (('ingredients', recipe.ingredients), ('instructions', instructions)):
+            text_widget = widgets[key]
+            text_widget.config(state='normal')
+            text_widget.delete(1.0, tk.END)
+            text_widget.insert(1.0, value)
+            text_widget.config(state='disabled')
+        
+        widgets['canvas'].yview_moveto(0)
         
+        popup.deiconify()
+        popup.lift()
+        popup.grab_set()  # Bloque l'interaction avec la fenêtre principale
+        popup.focus_set()
+    
+    def is_favorite(self, recipe_id):
+        return self.conn.execute('SELECT 1 FROM user_favorites WHERE user_id = ? AND recipe_id = ?',
+                                 (self.current_user['id'], recipe_id)).fetchone() is not None
+    
+    def update_favorite_button(self):
+        favorite = self.is_favorite(self.details_recipe_id)
+        self.details_widgets['favorite'].configure(
+            text="❤️ Favori" if favorite else "🤍 Ajouter aux favoris",
+            bg=self.colors['accent'] if favorite else 'white',
+            fg='white' if favorite else self.colors['accent'])
+    
+    def toggle_favorite(self):
+        """Ajoute ou retire la recette affichée des favoris"""
+        recipe_id = self.details_recipe_id
+        user_id = self.current_user['id']
+        if self.is_favorite(recipe_id):
+            self.conn.execute('DELETE FROM user_favorites WHERE user_id = ? AND recipe_id = ?',
+                              (user_id, recipe_id))
+            self.usage.record(usage_events.UNFAVORITE, user_id, recipe_id)
+        else:
+            self.conn.execute('INSERT INTO user_favorites (user_id, recipe_id) VALUES (?, ?)',
+                              (user_id, recipe_id))
+            self.usage.record(usage_events.FAVORITE, user_id, recipe_id)
+        self.conn.commit()
+        self.update_favorite_button()
+    
+    def hide_recipe_details(self):
+        """Masque la fenêtre de détails sans la détruire"""
+        if self.details_popup is not None and self.details_popup.winfo_exists():
+            self.details_popup.grab_release()
+            self.details_popup.withdraw()
+    
+    def build_recipe_details_window(self):
+        """Construit une seule fois la fenêtre de détails des recettes"""
         popup = tk.Toplevel(self.root)
-        popup.title(f"📖 {recipe[1]}")
+        popup.withdraw()
         popup.geometry("800x700")
         popup.configure(bg=self.colors['background'])
         popup.transient(self.root)  # Rend la fenêtre modale
-        popup.grab_set()  # Bloque l'interaction avec la fenêtre principale
+        popup.protocol("WM_DELETE_WINDOW", self.hide_recipe_details)
         
         # Centrer la fenêtre
-        popup.update_idletasks()
-        width = popup.winfo_width()
-        height = popup.winfo_height()
-        x = (popup.winfo_screenwidth() // 2) - (width // 2)
-        y = (popup.winfo_screenheight() // 2) - (height // 2)
-        popup.geometry(f'{width}x{height}+{x}+{y}')
+        x = (popup.winfo_screenwidth() // 2) - 400
+        y = (popup.winfo_screenheight() // 2) - 350
+        popup.geometry(f'800x700+{x}+{y}')
+        
+        widgets = {}
         
         # Container principal
         main_container = tk.Frame(popup, bg=self.colors['background'])
@@ -403,6 +610,7 @@ class ModernSmartMealPlanner:
         # Canvas pour le scroll
         canvas = tk.Canvas(main_container, bg=self.colors['background'], highlightthickness=0)
         scrollbar = ttk.Scrollbar(main_container, orient="vertical", command=canvas.yview)
+        widgets['canvas'] = canvas
         
         scrollable_frame = tk.Frame(canvas, bg=self.colors['background'])
         
@@ -425,29 +633,29 @@ class ModernSmartMealPlanner:
         title_frame = tk.Frame(content_frame, bg=self.colors['background'])
         title_frame.pack(fill='x', pady=(0, 15))
         
-        tk.Label(title_frame, text=recipe[1], font=('Segoe UI', 28, 'bold'),
-                bg=self.colors['background'], fg=self.colors['text_primary']).pack(side='left')
+        widgets['title'] = tk.Label(title_frame, font=('Segoe UI', 28, 'bold'),
+                                    bg=self.colors['background'], fg=self.colors['text_primary'])
+        widgets['title'].pack(side='left')
         
-        category_bg = {
-            'Petit-déjeuner': self.colors['warning'],
-            'Déjeuner': self.colors['success'],
-            'Dîner': self.colors['info']
-        }.get(recipe[2], self.colors['primary'])
+        widgets['category'] = tk.Label(title_frame, font=('Segoe UI', 12, 'bold'),
+                                       fg='white', padx=15, pady=6)
+        widgets['category'].pack(side='right')
         
-        tk.Label(title_frame, text=recipe[2], font=('Segoe UI', 12, 'bold'),
-                bg=category_bg, fg='white', padx=15, pady=6).pack(side='right')
+        widgets['favorite'] = tk.Button(content_frame, font=('Segoe UI', 11), relief='solid',
+                                        command=self.toggle_favorite)
+        widgets['favorite'].pack(anchor='w', pady=(0, 15))
         
         # Statistiques
         stats_frame = tk.Frame(content_frame, bg=self.colors['background'])
         stats_frame.pack(fill='x', pady=(0, 25))
         
         stats_data = [
-            ("🔥", "Calories", f"{recipe[5]} cal", self.colors['danger']),
-            ("⏱️", "Temps", f"{recipe[6]} min", self.colors['warning']),
-            ("⚡", "Difficulté", recipe[7], self.colors['success'])
+            ("🔥", "Calories", 'calories', self.colors['danger']),
+            ("⏱️", "Temps", 'prep_time', self.colors['warning']),
+            ("⚡", "Difficulté", 'difficulty', self.colors['success'])
         ]
         
-        for icon, label, value, color in stats_data:
+        for icon, label, key, color in stats_data:
             stat_card = tk.Frame(stats_frame, bg=self.colors['card_bg'], padx=20, pady=15,
                                 highlightbackground=self.colors['light_gray'], 
                                 highlightthickness=1)
@@ -457,8 +665,9 @@ class ModernSmartMealPlanner:
                     bg=self.colors['card_bg'], fg=color).pack()
             tk.Label(stat_card, text=label, font=('Segoe UI', 11),
                     bg=self.colors['card_bg'], fg=self.colors['text_secondary']).pack()
-            tk.Label(stat_card, text=value, font=('Segoe UI', 14, 'bold'),
-                    bg=self.colors['card_bg'], fg=self.colors['text_primary']).pack()
+            widgets[key] = tk.Label(stat_card, font=('Segoe UI', 14, 'bold'),
+                                    bg=self.colors['card_bg'], fg=self.colors['text_primary'])
+            widgets[key].pack()
         
         # Section ingrédients
         tk.Label(content_frame, text="🥕 Ingrédients", font=('Segoe UI', 18, 'bold'),
@@ -469,12 +678,10 @@ class ModernSmartMealPlanner:
                                    highlightthickness=1)
         ingredients_card.pack(fill='x', pady=(0, 20))
         
-        ingredients_text = scrolledtext.ScrolledText(ingredients_card, height=6, font=('Segoe UI', 11),
-                                                    bg=self.colors['card_bg'], fg=self.colors['text_primary'],
-                                                    insertbackground=self.colors['primary'], wrap='word')
-        ingredients_text.pack(fill='x')
-        ingredients_text.insert(1.0, recipe[3])
-        ingredients_text.config(state='disabled')
+        widgets['ingredients'] = scrolledtext.ScrolledText(ingredients_card, height=6, font=('Segoe UI', 11),
+                                                          bg=self.colors['card_bg'], fg=self.colors['text_primary'],
+                                                          insertbackground=self.colors['primary'], wrap='word')
+        widgets['ingredients'].pack(fill='x')
         
         # Section instructions
         tk.Label(content_frame, text="📝 Instructions", font=('Segoe UI', 18, 'bold'),
@@ -485,12 +692,10 @@ class ModernSmartMealPlanner:
                                     highlightthickness=1)
         instructions_card.pack(fill='both', expand=True)
         
-        instructions_text = scrolledtext.ScrolledText(instructions_card, height=10, font=('Segoe UI', 11),
-                                                     bg=self.colors['card_bg'], fg=self.colors['text_primary'],
-                                                     insertbackground=self.colors['primary'], wrap='word')
-        instructions_text.pack(fill='both', expand=True)
-        instructions_text.insert(1.0, recipe[4])
-        instructions_text.config(state='disabled')
+        widgets['instructions'] = scrolledtext.ScrolledText(instructions_card, height=10, font=('Segoe UI', 11),
+                                                           bg=self.colors['card_bg'], fg=self.colors['text_primary'],
+                                                           insertbackground=self.colors['primary'], wrap='word')
+        widgets['instructions'].pack(fill='both', expand=True)
         
         # Bouton de fermeture
         close_btn = tk.Frame(content_frame, bg=self.colors['primary'], relief='flat',
@@ -502,7 +707,7 @@ class ModernSmartMealPlanner:
         close_label.pack()
         
         def close_popup(e):
-            popup.destroy()
+            self.hide_recipe_details()
         
         close_btn.bind('<Button-1>', close_popup)
         close_label.bind('<Button-1>', close_popup)
@@ -521,21 +726,18 @@ class ModernSmartMealPlanner:
         close_label.bind('<Enter>', on_enter_close)
         close_label.bind('<Leave>', on_leave_close)
         
-        # Activer le scroll avec la molette
+        # Scroll à la molette : lié à la fenêtre (et donc à ses enfants), pas à toute l'application
         def on_mousewheel(event):
             canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+            return "break"
         
-        canvas.bind_all("<MouseWheel>", on_mousewheel)
+        popup.bind("<MouseWheel>", on_mousewheel)
         
         # Permettre de fermer avec Échap
-        def on_escape(event):
-            if event.keysym == 'Escape':
-                popup.destroy()
+        popup.bind('<Escape>', lambda e: self.hide_recipe_details())
         
-        popup.bind('<Key>', on_escape)
-        popup.focus_set()
-        
-        print("Popup créée avec succès")  # Debug
+        self.details_popup = popup
+        self.details_widgets = widgets
     
     # ... [Le reste des méthodes reste inchangé, sauf show_recipe_details] ...
     
@@ -579,6 +781,57 @@ class ModernSmartMealPlanner:
         
         return card
     
+    def prefetch_recipe(self, recipe_id):
+        """Précharge les détails d'une recette pendant que l'interface est inactive
+        
+        Une recette déjà en cache (chargée sans instructions par la génération
+        de plans) est aussi préchargée : prefetch ne lit que ce qui manque.
+        """
+        self.root.after_idle(self.recipe_catalog.prefetch, recipe_id)
+    
+    def notify_data_changed(self, *topics, recipe_ids=None):
+        """Propage une modification des données aux caches et aux écrans
+        
+        recipe_ids : recettes modifiées, si elles sont connues (seules ces
+        recettes sont relues dans le cache et l'index de recherche).
+        """
+        if 'recipes' in topics:
+            self.recipe_catalog.invalidate(recipe_ids)
+            self.meal_optimizer = None
+            self.batch_planner = None
+            self.recipe_pool.invalidate()
+            self.recipe_sampler.invalidate(recipes=True)
+            if self.plan_search_futures:
+                # Recherche en cours : relancée sur le catalogue à jour quand elle se termine
+                self.plan_search_stale = True
+            else:
+                self.close_plan_search()
+            self.recipe_search.refresh_index(recipe_ids)
+        self.screen_manager.invalidate(*topics)
+    
+    def check_external_changes(self):
+        """Rafraîchit les écrans dont les données ont été modifiées par une autre instance"""
+        try:
+            changes = self.change_watcher.poll()
+        except sqlite3.Error:
+            changes = {}
+        
+        # Plans, calendrier et compte : seulement ceux de l'utilisateur connecté
+        user_id = self.current_user['id'] if self.current_user else None
+        topics = [topic for topic, (rows, users) in changes.items()
+                  if topic == 'recipes' or users is None or user_id in users]
+        if topics:
+            recipe_ids = changes['recipes'][0] if 'recipes' in changes else None
+            self.notify_data_changed(*topics, recipe_ids=recipe_ids)
+        self.root.after(CHANGE_POLL_MS, self.check_external_changes)
+    
+    def close_plan_search(self):
+        """Arrête le pool de processus et libère la mémoire partagée du catalogue"""
+        if self.plan_search is not None:
+            self.plan_search.close()
+            self.plan_search = None
+            self.plan_search_futures = []
+    
     def show_login_screen(self):
         """Affiche l'écran de connexion"""
         self.clear_window()
@@ -587,13 +840,21 @@ class ModernSmartMealPlanner:
         main_frame = tk.Frame(self.root, bg=self.colors['background'])
         main_frame.pack(fill='both', expand=True)
         
+        # Fond d'écran (variante choisie selon la taille de la fenêtre)
+        self.login_background = tk.Label(main_frame, bg=self.colors['background'], bd=0)
+        self.login_background.place(x=0, y=0, relwidth=1, relheight=1)
+        self.show_asset(self.login_background, ASSET_BACKGROUND,
+                        (self.root.winfo_width(), self.root.winfo_height()))
+        
         # Container central
         container = tk.Frame(main_frame, bg=self.colors['background'])
         container.place(relx=0.5, rely=0.5, anchor='center')
         
         # Logo et titre
-        tk.Label(container, text="🍽️", font=('Segoe UI', 48),
-                bg=self.colors['background'], fg=self.colors['primary']).pack(pady=(0, 10))
+        logo = tk.Label(container, text="🍽️", font=('Segoe UI', 48),
+                       bg=self.colors['background'], fg=self.colors['primary'])
+        logo.pack(pady=(0, 10))
+        self.show_asset(logo, ASSET_LOGO, LOGO_SIZES['login'], FIT, step=1)
         
         tk.Label(container, text="SmartMeal-Planner", 
                 font=('Segoe UI', 32, 'bold'), 
@@ -826,46 +1087,14 @@ class ModernSmartMealPlanner:
         self.current_user = {'firstname': 'Invité', 'id': 0}
         self.show_dashboard()
     
+    @profile_screen('dashboard')
     def show_dashboard(self):
         """Affiche le tableau de bord"""
-        self.clear_window()
-        
-        # Barre latérale
-        sidebar = tk.Frame(self.root, bg=self.colors['card_bg'], width=250,
-                          highlightbackground=self.colors['light_gray'], 
-                          highlightthickness=1)
-        sidebar.pack(side='left', fill='y')
-        sidebar.pack_propagate(False)
-        
-        # Logo sidebar
-        tk.Label(sidebar, text="🍽️", font=('Segoe UI', 24),
-                bg=self.colors['card_bg'], fg=self.colors['primary']).pack(pady=(30, 10))
-        
-        tk.Label(sidebar, text="SmartMeal", font=('Segoe UI', 16, 'bold'),
-                bg=self.colors['card_bg'], fg=self.colors['primary']).pack(pady=(0, 30))
-        
-        # Menu sidebar
-        menu_items = [
-            ("📊 Tableau de bord", self.show_dashboard),
-            ("🍽️ Générer repas", self.show_meal_generator),
-            ("📖 Recettes", self.show_recipes),
-            ("💾 Mes inscriptions", self.show_saved_plans),
-            ("👤 Profil", self.show_profile),
-            ("🚪 Déconnexion", self.show_login_screen)
-        ]
-        
-        for text, command in menu_items:
-            btn = tk.Label(sidebar, text=text, font=('Segoe UI', 12),
-                          bg=self.colors['card_bg'], fg=self.colors['text_secondary'],
-                          cursor='hand2', padx=20, pady=15)
-            btn.bind('<Button-1>', lambda e, cmd=command: cmd())
-            btn.pack(fill='x')
-            btn.bind('<Enter>', lambda e: e.widget.configure(bg=self.colors['primary'], fg='white'))
-            btn.bind('<Leave>', lambda e: e.widget.configure(bg=self.colors['card_bg'], fg=self.colors['text_secondary']))
-        
-        # Contenu principal
-        main_content = tk.Frame(self.root, bg=self.colors['background'])
-        main_content.pack(side='right', fill='both', expand=True, padx=30, pady=30)
+        self.show_screen('dashboard')
+    
+    def build_dashboard(self, parent):
+        """Construit l'écran tableau de bord"""
+        main_content = tk.Frame(parent, bg=self.colors['background'])
         
         # En-tête
         header = tk.Frame(main_content, bg=self.colors['background'])
@@ -876,8 +1105,35 @@ class ModernSmartMealPlanner:
                 fg=self.colors['text_primary']).pack(side='left')
         
         # Cartes de statistiques
-        stats_frame = tk.Frame(main_content, bg=self.colors['background'])
-        stats_frame.pack(fill='x', pady=(0, 30))
+        self.dashboard_stats_frame = tk.Frame(main_content, bg=self.colors['background'])
+        self.dashboard_stats_frame.pack(fill='x', pady=(0, 30))
+        
+        # Actions rapides
+        tk.Label(main_content, text="🚀 Actions rapides", font=('Segoe UI', 18, 'bold'),
+                bg=self.colors['background'], fg=self.colors['text_primary']).pack(anchor='w', pady=(0, 15))
+        
+        self.dashboard_actions_frame = tk.Frame(main_content, bg=self.colors['background'])
+        self.dashboard_actions_frame.pack(fill='x', pady=(0, 30))
+        
+        # Derniers plans sauvegardés
+        tk.Label(main_content, text="📋 Dernières inscriptions", font=('Segoe UI', 18, 'bold'),
+                bg=self.colors['background'], fg=self.colors['text_primary']).pack(anchor='w', pady=(0, 15))
+        
+        self.dashboard_plans_frame = tk.Frame(main_content, bg=self.colors['background'])
+        self.dashboard_plans_frame.pack(fill='both', expand=True)
+        
+        self.refresh_dashboard()
+        return main_content
+    
+    def refresh_dashboard(self):
+        """Recharge les statistiques et les derniers plans du tableau de bord"""
+        stats_frame = self.dashboard_stats_frame
+        actions_frame = self.dashboard_actions_frame
+        plans_frame = self.dashboard_plans_frame
+        
+        for frame in (stats_frame, actions_frame, plans_frame):
+            for widget in frame.winfo_children():
+                widget.destroy()
         
         # Compter le nombre d'inscriptions
         self.cursor.execute('SELECT COUNT(*) FROM saved_plans WHERE user_id = ?', 
@@ -898,13 +1154,6 @@ class ModernSmartMealPlanner:
             card = self.create_stats_card(stats_frame, icon, value, text, color)
             card.grid(row=0, column=i, padx=10, sticky='nsew')
         
-        # Actions rapides
-        tk.Label(main_content, text="🚀 Actions rapides", font=('Segoe UI', 18, 'bold'),
-                bg=self.colors['background'], fg=self.colors['text_primary']).pack(anchor='w', pady=(0, 15))
-        
-        actions_frame = tk.Frame(main_content, bg=self.colors['background'])
-        actions_frame.pack(fill='x', pady=(0, 30))
-        
         quick_actions = [
             ("🍽️ Générer un plan", "Plan personnalisé 7 jours", self.show_meal_generator),
             ("📖 Voir recettes", f"{recipe_count} recettes santé", self.show_recipes),
@@ -916,13 +1165,6 @@ class ModernSmartMealPlanner:
             card = self.create_card(actions_frame, title, subtitle, "→", self.colors['primary'], command)
             card.grid(row=0, column=i, padx=10, sticky='nsew')
         
-        # Derniers plans sauvegardés
-        tk.Label(main_content, text="📋 Dernières inscriptions", font=('Segoe UI', 18, 'bold'),
-                bg=self.colors['background'], fg=self.colors['text_primary']).pack(anchor='w', pady=(0, 15))
-        
-        plans_frame = tk.Frame(main_content, bg=self.colors['background'])
-        plans_frame.pack(fill='both', expand=True)
-        
         # Récupérer les 3 derniers plans
         self.cursor.execute('''
             SELECT plan_name, days_count, created_at 
@@ -980,39 +1222,14 @@ class ModernSmartMealPlanner:
         
         return card
     
+    @profile_screen('recipes')
     def show_recipes(self):
         """Affiche toutes les recettes"""
-        self.clear_window()
-        
-        # Barre latérale
-        sidebar = tk.Frame(self.root, bg=self.colors['card_bg'], width=250,
-                          highlightbackground=self.colors['light_gray'], 
-                          highlightthickness=1)
-        sidebar.pack(side='left', fill='y')
-        sidebar.pack_propagate(False)
-        
-        tk.Label(sidebar, text="🍽️", font=('Segoe UI', 24),
-                bg=self.colors['card_bg'], fg=self.colors['primary']).pack(pady=(30, 10))
-        
-        menu_items = [
-            ("📊 Tableau de bord", self.show_dashboard),
-            ("🍽️ Générer repas", self.show_meal_generator),
-            ("📖 Recettes", self.show_recipes),
-            ("💾 Mes inscriptions", self.show_saved_plans),
-            ("👤 Profil", self.show_profile),
-            ("🚪 Déconnexion", self.show_login_screen)
-        ]
-        
-        for text, command in menu_items:
-            btn = tk.Label(sidebar, text=text, font=('Segoe UI', 12),
-                          bg=self.colors['card_bg'], fg=self.colors['text_secondary'],
-                          cursor='hand2', padx=20, pady=15)
-            btn.bind('<Button-1>', lambda e, cmd=command: cmd())
-            btn.pack(fill='x')
-        
-        # Contenu principal
-        main_content = tk.Frame(self.root, bg=self.colors['background'])
-        main_content.pack(side='right', fill='both', expand=True, padx=30, pady=30)
+        self.show_screen('recipes')
+    
+    def build_recipes(self, parent):
+        """Construit l'écran des recettes"""
+        main_content = tk.Frame(parent, bg=self.colors['background'])
         
         # En-tête
         header = tk.Frame(main_content, bg=self.colors['background'])
@@ -1022,12 +1239,10 @@ class ModernSmartMealPlanner:
                 font=('Segoe UI', 28, 'bold'), bg=self.colors['background'], 
                 fg=self.colors['text_primary']).pack(side='left')
         
-        # Compter les recettes
-        self.cursor.execute('SELECT COUNT(*) FROM recipes')
-        recipe_count = self.cursor.fetchone()[0]
-        
-        tk.Label(header, text=f"({recipe_count} recettes)", font=('Segoe UI', 14),
-                bg=self.colors['background'], fg=self.colors['text_secondary']).pack(side='left', padx=10)
+        # Nombre de recettes (mis à jour par refresh_recipes)
+        self.recipes_count_label = tk.Label(header, font=('Segoe UI', 14),
+                                           bg=self.colors['background'], fg=self.colors['text_secondary'])
+        self.recipes_count_label.pack(side='left', padx=10)
         
         # Barre de recherche
         search_frame = tk.Frame(main_content, bg=self.colors['background'])
@@ -1047,6 +1262,13 @@ class ModernSmartMealPlanner:
                               command=self.filter_recipes)
         search_btn.pack(side='left', padx=(0, 10))
         
+        self.recipes_results_label = tk.Label(search_frame, font=('Segoe UI', 11),
+                                             bg=self.colors['background'], fg=self.colors['text_secondary'])
+        self.recipes_results_label.pack(side='left', padx=(10, 0))
+        
+        # Recherche au fil de la frappe
+        self.recipe_search_var.trace_add('write', lambda *args: self.schedule_recipe_search())
+        
         # Filtres
         filter_frame = tk.Frame(main_content, bg=self.colors['background'])
         filter_frame.pack(fill='x', pady=(0, 20))
@@ -1086,73 +1308,94 @@ class ModernSmartMealPlanner:
         
         self.recipes_cards_frame.bind("<Configure>", configure_scroll_region)
         
-        # Raccourcis clavier pour le défilement
+        self.recipes_canvas = canvas
+        
+        # Charger toutes les recettes
+        self.update_recipes_count()
+        self.load_all_recipes()
+        return main_content
+    
+    def bind_recipes_mousewheel(self):
+        """Active le défilement à la molette sur la grille des recettes"""
+        canvas = self.recipes_canvas
+        
         def on_mousewheel(event):
             canvas.yview_scroll(int(-1*(event.delta/120)), "units")
         
         canvas.bind_all("<MouseWheel>", on_mousewheel)
-        
-        # Charger toutes les recettes
-        self.load_all_recipes()
+    
+    def update_recipes_count(self):
+        """Met à jour le compteur de recettes de l'en-tête"""
+        self.cursor.execute('SELECT COUNT(*) FROM recipes')
+        recipe_count = self.cursor.fetchone()[0]
+        self.recipes_count_label.configure(text=f"({recipe_count} recettes)")
+    
+    def refresh_recipes(self):
+        """Recharge les recettes en conservant la recherche en cours"""
+        self.update_recipes_count()
+        self.recipe_search.reset()
+        self.filter_recipes()
     
     def load_all_recipes(self):
         """Charge toutes les recettes"""
-        self.cursor.execute('SELECT * FROM recipes ORDER BY name')
-        all_recipes = self.cursor.fetchall()
-        
-        # Effacer le frame existant
-        for widget in self.recipes_cards_frame.winfo_children():
-            widget.destroy()
-        
-        # Afficher les recettes en grille
-        if all_recipes:
-            for i, recipe in enumerate(all_recipes):
-                row = i // self.cards_per_row
-                col = i % self.cards_per_row
-                
-                card = self.create_recipe_card(self.recipes_cards_frame, recipe)
-                card.grid(row=row, column=col, padx=15, pady=15, sticky='nsew')
-            
-            # Configurer le poids des colonnes
-            for col in range(self.cards_per_row):
-                self.recipes_cards_frame.columnconfigure(col, weight=1, uniform="col")
-        else:
-            empty_label = tk.Label(self.recipes_cards_frame, text="📭 Aucune recette disponible",
-                                  font=('Segoe UI', 18), bg=self.colors['background'], 
-                                  fg=self.colors['text_secondary'])
-            empty_label.pack(pady=50)
+        self.filter_recipes()
+    
+    def schedule_recipe_search(self):
+        """Relance la recherche après une courte pause dans la frappe"""
+        if self.recipe_search_job is not None:
+            self.root.after_cancel(self.recipe_search_job)
+        self.recipe_search_job = self.root.after(SEARCH_DEBOUNCE_MS, self.filter_recipes)
     
     def filter_recipes(self):
         """Filtre les recettes selon la recherche"""
+        if self.recipe_search_job is not None:
+            self.root.after_cancel(self.recipe_search_job)
+            self.recipe_search_job = None
+        
         search_term = self.recipe_search_var.get().lower()
         category = self.recipe_category_var.get()
         
-        # Construire la requête SQL
-        query = "SELECT * FROM recipes WHERE 1=1"
-        params = []
-        
-        if category != "Toutes":
-            query += " AND category = ?"
-            params.append(category)
-        
-        if search_term:
-            query += " AND (name LIKE ? OR ingredients LIKE ?)"
-            params.append(f"%{search_term}%")
-            params.append(f"%{search_term}%")
-        
-        query += " ORDER BY name"
-        
-        # Exécuter la requête
-        self.cursor.execute(query, params)
-        filtered_recipes = self.cursor.fetchall()
+        # Résultat immédiat si la recherche affine la précédente, sinon requête en arrière-plan
+        result = self.recipe_search.search(search_term, category)
+        if result is not None:
+            self.display_recipes(result)
+        else:
+            self.poll_recipe_search()
+    
+    def poll_recipe_search(self):
+        """Vérifie si la requête de recherche en arrière-plan est terminée"""
+        result = self.recipe_search.poll()
+        if result is not None:
+            if self.screen_manager.screens['recipes'].frame is not None:
+                self.display_recipes(result)
+        elif self.recipe_search.pending:
+            self.root.after(16, self.poll_recipe_search)
+    
+    def refresh_recipes_display(self):
+        """Rafraîchit l'affichage des recettes"""
+        if self.recipe_search.last is not None:
+            self.display_recipes(self.recipe_search.last)
+        else:
+            self.filter_recipes()
+    
+    def display_recipes(self, result):
+        """Affiche un résultat de recherche en grille (limité à MAX_RECIPE_CARDS cartes)"""
+        recipes = result.recipes
         
         # Effacer le frame existant
         for widget in self.recipes_cards_frame.winfo_children():
             widget.destroy()
         
+        shown = min(len(recipes), MAX_RECIPE_CARDS)
+        if result.total > shown:
+            self.recipes_results_label.configure(
+                text=f"{result.total} résultats • {shown} premiers affichés")
+        else:
+            self.recipes_results_label.configure(text=f"{result.total} résultats")
+        
         # Afficher les recettes filtrées
-        if filtered_recipes:
-            for i, recipe in enumerate(filtered_recipes):
+        if recipes:
+            for i, recipe in enumerate(recipes[:MAX_RECIPE_CARDS]):
                 row = i // self.cards_per_row
                 col = i % self.cards_per_row
                 
@@ -1162,6 +1405,11 @@ class ModernSmartMealPlanner:
             # Configurer le poids des colonnes
             for col in range(self.cards_per_row):
                 self.recipes_cards_frame.columnconfigure(col, weight=1, uniform="col")
+        elif not result.term and result.category == "Toutes":
+            empty_label = tk.Label(self.recipes_cards_frame, text="📭 Aucune recette disponible",
+                                  font=('Segoe UI', 18), bg=self.colors['background'], 
+                                  fg=self.colors['text_secondary'])
+            empty_label.pack(pady=50)
         else:
             empty_label = tk.Label(self.recipes_cards_frame, 
                                   text="❌ Aucune recette ne correspond à votre recherche",
@@ -1169,53 +1417,77 @@ class ModernSmartMealPlanner:
                                   fg=self.colors['text_secondary'])
             empty_label.pack(pady=50)
     
+    @profile_screen('saved_plans')
     def show_saved_plans(self):
         """Affiche les plans sauvegardés"""
-        self.clear_window()
+        self.show_screen('saved_plans')
+    
+    def build_saved_plans(self, parent):
+        """Construit l'écran des plans sauvegardés"""
+        main_content = tk.Frame(parent, bg=self.colors['background'])
         
-        # Barre latérale
-        sidebar = tk.Frame(self.root, bg=self.colors['card_bg'], width=250,
-                          highlightbackground=self.colors['light_gray'], 
-                          highlightthickness=1)
-        sidebar.pack(side='left', fill='y')
-        sidebar.pack_propagate(False)
+        tk.Label(main_content, text="💾 Mes inscriptions", 
+                font=('Segoe UI', 28, 'bold'), bg=self.colors['background'], 
+                fg=self.colors['text_primary']).pack(pady=(0, 30))
         
-        menu_items = [
-            ("📊 Tableau de bord", self.show_dashboard),
-            ("🍽️ Générer repas", self.show_meal_generator),
-            ("📖 Recettes", self.show_recipes),
-            ("💾 Mes inscriptions", self.show_saved_plans),
-            ("👤 Profil", self.show_profile),
-            ("🚪 Déconnexion", self.show_login_screen)
-        ]
+        # Recherche plein texte (mots et période : « saumon mois dernier »)
+        search_frame = tk.Frame(main_content, bg=self.colors['background'])
+        search_frame.pack(fill='x', pady=(0, 20))
         
-        for text, command in menu_items:
-            btn = tk.Label(sidebar, text=text, font=('Segoe UI', 12),
-                          bg=self.colors['card_bg'], fg=self.colors['text_secondary'],
-                          cursor='hand2', padx=20, pady=15)
-            btn.bind('<Button-1>', lambda e, cmd=command: cmd())
-            btn.pack(fill='x')
+        tk.Label(search_frame, text="🔍 Rechercher:", font=('Segoe UI', 12),
+                bg=self.colors['background'], fg=self.colors['text_primary']).pack(side='left', padx=(0, 10))
         
-        # Contenu principal
-        main_content = tk.Frame(self.root, bg=self.colors['background'])
-        main_content.pack(side='right', fill='both', expand=True, padx=30, pady=30)
+        self.saved_plan_query_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.saved_plan_query_var,
+                                width=40, font=('Segoe UI', 12))
+        search_entry.pack(side='left', padx=(0, 10))
         
-        tk.Label(main_content, text="💾 Mes inscriptions", 
-                font=('Segoe UI', 28, 'bold'), bg=self.colors['background'], 
-                fg=self.colors['text_primary']).pack(pady=(0, 30))
+        self.plans_results_label = tk.Label(search_frame, font=('Segoe UI', 11),
+                                           bg=self.colors['background'], fg=self.colors['text_secondary'])
+        self.plans_results_label.pack(side='left', padx=(10, 0))
         
-        # Récupérer tous les plans sauvegardés
-        self.cursor.execute('''
-            SELECT id, plan_name, calories_target, days_count, created_at 
-            FROM saved_plans 
-            WHERE user_id = ? 
-            ORDER BY created_at DESC
-        ''', (self.current_user['id'],))
+        self.saved_plan_query_var.trace_add('write', lambda *args: self.schedule_saved_plan_search())
         
-        saved_plans = self.cursor.fetchall()
+        tk.Button(search_frame, text="📥 Importer un plan",
+                 bg='white', fg=self.colors['primary'],
+                 font=('Segoe UI', 11), relief='solid',
+                 command=self.import_shared_plan).pack(side='right')
         
-        if saved_plans:
-            # Frame pour la liste des plans
+        tk.Button(search_frame, text="📂 Ouvrir un fichier",
+                 bg='white', fg=self.colors['primary'],
+                 font=('Segoe UI', 11), relief='solid',
+                 command=self.open_plan_file).pack(side='right', padx=5)
+        
+        self.saved_plans_frame = tk.Frame(main_content, bg=self.colors['background'])
+        self.saved_plans_frame.pack(fill='both', expand=True)
+        
+        self.refresh_saved_plans()
+        return main_content
+    
+    def refresh_saved_plans(self):
+        """Recharge la liste des plans sauvegardés"""
+        main_content = self.saved_plans_frame
+        for widget in main_content.winfo_children():
+            widget.destroy()
+        
+        query = self.saved_plan_query_var.get().strip()
+        if query:
+            saved_plans = self.saved_plan_search.search(self.current_user['id'], query)
+            self.plans_results_label.configure(text=f"{len(saved_plans)} plan(s) trouvé(s)")
+        else:
+            # Récupérer tous les plans sauvegardés
+            self.cursor.execute('''
+                SELECT id, plan_name, calories_target, days_count, created_at
+                FROM saved_plans
+                WHERE user_id = ?
+                ORDER BY created_at DESC
+            ''', (self.current_user['id'],))
+            
+            saved_plans = self.cursor.fetchall()
+            self.plans_results_label.configure(text="")
+        
+        if saved_plans:
+            # Frame pour la liste des plans
             list_frame = tk.Frame(main_content, bg=self.colors['background'])
             list_frame.pack(fill='both', expand=True)
             
@@ -1256,12 +1528,30 @@ class ModernSmartMealPlanner:
                 view_btn.bind('<Button-1>', lambda e, pid=plan_id: self.view_saved_plan(pid))
                 view_btn.pack(side='left', padx=2)
                 
+                # Bouton Partager
+                share_btn = tk.Label(action_frame, text="🔗 Partager", font=('Segoe UI', 10),
+                                    bg=self.colors['info'], fg='white',
+                                    cursor='hand2', padx=10, pady=5)
+                share_btn.bind('<Button-1>', lambda e, pid=plan_id: self.share_saved_plan(pid))
+                share_btn.pack(side='left', padx=2)
+                
+                # Bouton Exporter
+                export_btn = tk.Label(action_frame, text="💾 Exporter", font=('Segoe UI', 10),
+                                     bg=self.colors['success'], fg='white',
+                                     cursor='hand2', padx=10, pady=5)
+                export_btn.bind('<Button-1>', lambda e, pid=plan_id: self.export_saved_plan(pid))
+                export_btn.pack(side='left', padx=2)
+                
                 # Bouton Supprimer
                 delete_btn = tk.Label(action_frame, text="🗑️ Supprimer", font=('Segoe UI', 10),
                                      bg=self.colors['danger'], fg='white',
                                      cursor='hand2', padx=10, pady=5)
                 delete_btn.bind('<Button-1>', lambda e, pid=plan_id: self.delete_saved_plan(pid))
                 delete_btn.pack(side='left', padx=2)
+        elif query:
+            tk.Label(main_content, text="🔍 Aucun plan ne correspond à cette recherche",
+                    font=('Segoe UI', 16), bg=self.colors['background'],
+                    fg=self.colors['text_secondary']).pack(pady=50)
         else:
             empty_frame = tk.Frame(main_content, bg=self.colors['background'])
             empty_frame.pack(fill='both', expand=True)
@@ -1274,25 +1564,188 @@ class ModernSmartMealPlanner:
                     font=('Segoe UI', 14), bg=self.colors['background'], 
                     fg=self.colors['text_secondary']).pack(pady=10)
     
+    def schedule_saved_plan_search(self):
+        """Relance la recherche de plans après une courte pause dans la frappe"""
+        if self.saved_plan_search_job is not None:
+            self.root.after_cancel(self.saved_plan_search_job)
+        self.saved_plan_search_job = self.root.after(SEARCH_DEBOUNCE_MS, self.run_saved_plan_search)
+    
+    def run_saved_plan_search(self):
+        """Affiche les plans correspondant à la recherche"""
+        self.saved_plan_search_job = None
+        self.refresh_saved_plans()
+    
     def view_saved_plan(self, plan_id):
-        """Affiche un plan sauvegardé"""
-        self.cursor.execute('SELECT plan_text FROM saved_plans WHERE id = ?', (plan_id,))
-        result = self.cursor.fetchone()
+        """Affiche un plan sauvegardé (lu par pages dans la base)"""
+        try:
+            source = PlanBlobSource(self.db_path, plan_id)
+        except ValueError:
+            messagebox.showerror("Erreur", "Plan introuvable")
+            return
+        self.open_paged_viewer(source, "📋 Plan sauvegardé")
+    
+    def open_plan_file(self):
+        """Affiche un plan exporté (fichier texte projeté en mémoire)"""
+        path = filedialog.askopenfilename(title="Ouvrir un plan",
+                                          filetypes=[("Plans", "*.txt"), ("Tous les fichiers", "*.*")])
+        if not path:
+            return
+        try:
+            source = FileSource(path)
+        except OSError as e:
+            messagebox.showerror("Erreur", f"❌ Impossible d'ouvrir le fichier: {e}")
+            return
+        self.open_paged_viewer(source, f"📋 {os.path.basename(path)}")
+    
+    def export_saved_plan(self, plan_id):
+        """Exporte le texte d'un plan dans un fichier, par morceaux"""
+        path = filedialog.asksaveasfilename(title="Exporter le plan", defaultextension='.txt',
+                                            initialfile=f"meal_plan_{plan_id}.txt",
+                                            filetypes=[("Plans", "*.txt")])
+        if not path:
+            return
+        try:
+            source = PlanBlobSource(self.db_path, plan_id)
+            try:
+                with open(path, 'wb') as f:
+                    for start in range(0, source.size, SCAN_CHUNK):
+                        f.write(source.read_bytes(start, SCAN_CHUNK))
+            finally:
+                source.close()
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erreur", f"❌ Impossible d'exporter: {e}")
+            return
+        messagebox.showinfo("Succès", f"✅ Plan exporté dans {os.path.basename(path)}")
+    
+    def open_paged_viewer(self, source, title):
+        """Fenêtre qui n'affiche qu'une page du texte à la fois, avec accès direct aux journées"""
+        popup = tk.Toplevel(self.root)
+        popup.title(title)
+        popup.geometry("800x600")
+        popup.configure(bg=self.colors['background'])
         
-        if result:
-            plan_text = result[0]
-            
-            popup = tk.Toplevel(self.root)
-            popup.title("📋 Plan sauvegardé")
-            popup.geometry("800x600")
-            popup.configure(bg=self.colors['background'])
-            
-            text_widget = scrolledtext.ScrolledText(popup, font=('Consolas', 11),
-                                                   bg=self.colors['card_bg'], fg=self.colors['text_primary'],
-                                                   insertbackground=self.colors['primary'])
-            text_widget.pack(fill='both', expand=True, padx=20, pady=20)
-            text_widget.insert(1.0, plan_text)
+        # Navigation
+        nav_frame = tk.Frame(popup, bg=self.colors['background'])
+        nav_frame.pack(fill='x', padx=20, pady=(20, 0))
+        
+        prev_btn = tk.Button(nav_frame, text="◀ Page précédente", bg='white', fg=self.colors['primary'],
+                            font=('Segoe UI', 10), relief='solid')
+        prev_btn.pack(side='left', padx=(0, 5))
+        
+        next_btn = tk.Button(nav_frame, text="Page suivante ▶", bg='white', fg=self.colors['primary'],
+                            font=('Segoe UI', 10), relief='solid')
+        next_btn.pack(side='left', padx=5)
+        
+        position_label = tk.Label(nav_frame, font=('Segoe UI', 10),
+                                 bg=self.colors['background'], fg=self.colors['text_secondary'])
+        position_label.pack(side='left', padx=10)
+        
+        day_btn = tk.Button(nav_frame, text="Aller", bg=self.colors['primary'], fg='white',
+                           font=('Segoe UI', 10), relief='flat', state='disabled')
+        day_btn.pack(side='right')
+        
+        day_var = tk.StringVar(value="1")
+        day_spin = tk.Spinbox(nav_frame, from_=1, to=1, textvariable=day_var, width=5,
+                             font=('Segoe UI', 10), state='disabled')
+        day_spin.pack(side='right', padx=5)
+        
+        tk.Label(nav_frame, text="📅 Jour:", font=('Segoe UI', 10),
+                bg=self.colors['background'], fg=self.colors['text_primary']).pack(side='right')
+        
+        text_widget = scrolledtext.ScrolledText(popup, font=('Consolas', 11),
+                                               bg=self.colors['card_bg'], fg=self.colors['text_primary'],
+                                               insertbackground=self.colors['primary'])
+        text_widget.pack(fill='both', expand=True, padx=20, pady=20)
+        
+        window = {'start': 0, 'end': 0}
+        
+        def show(start):
+            text, end = source.page(start)
+            window['start'], window['end'] = start, end
+            text_widget.config(state='normal')
+            text_widget.delete(1.0, tk.END)
+            text_widget.insert(1.0, text)
             text_widget.config(state='disabled')
+            text_widget.yview_moveto(0)
+            percent = 100 * end / source.size if source.size else 100
+            position_label.configure(text=f"{start // 1024}–{end // 1024} Ko sur {source.size // 1024} Ko "
+                                          f"({percent:.0f} %)")
+            prev_btn.configure(state='normal' if start > 0 else 'disabled')
+            next_btn.configure(state='normal' if end < source.size else 'disabled')
+        
+        def next_page(event=None):
+            if window['end'] < source.size:
+                show(window['end'])
+        
+        def previous_page(event=None):
+            if window['start'] > 0:
+                show(source.previous_page_start(window['start']))
+        
+        def go_to_day(event=None):
+            offsets = source.day_offsets or []
+            try:
+                day = int(day_var.get())
+            except ValueError:
+                return
+            if 1 <= day <= len(offsets):
+                show(offsets[day - 1])
+        
+        def wait_for_index():
+            if not popup.winfo_exists():
+                return
+            if source.day_offsets is None:
+                popup.after(200, wait_for_index)
+            elif source.day_offsets:
+                day_spin.configure(to=len(source.day_offsets), state='normal')
+                day_btn.configure(state='normal')
+        
+        def close():
+            self.plan_viewers.pop(popup, None)
+            source.close()
+            popup.destroy()
+        
+        prev_btn.configure(command=previous_page)
+        next_btn.configure(command=next_page)
+        day_btn.configure(command=go_to_day)
+        day_spin.bind('<Return>', go_to_day)
+        popup.bind('<Prior>', previous_page)
+        popup.bind('<Next>', next_page)
+        popup.protocol("WM_DELETE_WINDOW", close)
+        if isinstance(source, PlanBlobSource):
+            self.plan_viewers[popup] = close
+        
+        show(0)
+        source.index_in_background()
+        wait_for_index()
+    
+    def share_saved_plan(self, plan_id):
+        """Copie le code de partage du plan dans le presse-papiers"""
+        code = plan_share.plan_code(self.conn, plan_id)
+        if code is None:
+            messagebox.showerror("Erreur", "🔗 Ce plan a été sauvegardé avant le partage par code : "
+                                           "régénérez-le pour pouvoir le partager")
+            return
+        self.root.clipboard_clear()
+        self.root.clipboard_append(code)
+        messagebox.showinfo("Partager", f"🔗 Code copié dans le presse-papiers :\n\n{code}")
+    
+    def import_shared_plan(self):
+        """Ajoute aux plans sauvegardés un plan reçu sous forme de code"""
+        code = simpledialog.askstring("Importer un plan", "Collez le code de partage (SMP1....) :",
+                                      parent=self.root)
+        if not code:
+            return
+        
+        try:
+            plan = plan_share.resolve(self.conn, plan_share.decode(code))
+        except ValueError as e:
+            messagebox.showerror("Erreur", f"❌ Code invalide : {e}")
+            return
+        
+        plan_share.save_plan(self.conn, self.current_user['id'], plan)
+        self.conn.commit()
+        self.notify_data_changed('plans')
+        messagebox.showinfo("Succès", f"✅ Plan '{plan.name}' importé ({len(plan)} jours)")
     
     def delete_saved_plan(self, plan_id):
         """Supprime un plan sauvegardé"""
@@ -1300,41 +1753,16 @@ class ModernSmartMealPlanner:
             self.cursor.execute('DELETE FROM saved_plans WHERE id = ?', (plan_id,))
             self.conn.commit()
             messagebox.showinfo("Succès", "✅ Plan supprimé avec succès")
-            self.show_saved_plans()
+            self.notify_data_changed('plans')
     
+    @profile_screen('meal_generator')
     def show_meal_generator(self):
         """Affiche le générateur de repas"""
-        self.clear_window()
-        
-        # Barre latérale
-        sidebar = tk.Frame(self.root, bg=self.colors['card_bg'], width=250,
-                          highlightbackground=self.colors['light_gray'], 
-                          highlightthickness=1)
-        sidebar.pack(side='left', fill='y')
-        sidebar.pack_propagate(False)
-        
-        tk.Label(sidebar, text="🍽️", font=('Segoe UI', 24),
-                bg=self.colors['card_bg'], fg=self.colors['primary']).pack(pady=(30, 10))
-        
-        menu_items = [
-            ("📊 Tableau de bord", self.show_dashboard),
-            ("🍽️ Générer repas", self.show_meal_generator),
-            ("📖 Recettes", self.show_recipes),
-            ("💾 Mes inscriptions", self.show_saved_plans),
-            ("👤 Profil", self.show_profile),
-            ("🚪 Déconnexion", self.show_login_screen)
-        ]
-        
-        for text, command in menu_items:
-            btn = tk.Label(sidebar, text=text, font=('Segoe UI', 12),
-                          bg=self.colors['card_bg'], fg=self.colors['text_secondary'],
-                          cursor='hand2', padx=20, pady=15)
-            btn.bind('<Button-1>', lambda e, cmd=command: cmd())
-            btn.pack(fill='x')
-        
-        # Contenu principal
-        main_content = tk.Frame(self.root, bg=self.colors['background'])
-        main_content.pack(side='right', fill='both', expand=True, padx=30, pady=30)
+        self.show_screen('meal_generator')
+    
+    def build_meal_generator(self, parent):
+        """Construit l'écran du générateur de repas"""
+        main_content = tk.Frame(parent, bg=self.colors['background'])
         
         tk.Label(main_content, text="🍽️ Générateur de Repas", 
                 font=('Segoe UI', 28, 'bold'), bg=self.colors['background'], 
@@ -1390,6 +1818,25 @@ class ModernSmartMealPlanner:
                                      width=12, font=('Segoe UI', 12))
         category_combo.grid(row=1, column=3, padx=20, pady=10)
         
+        # Temps de préparation maximal par jour (vide : sans limite)
+        tk.Label(settings_grid, text="Préparation max/jour (min):", font=('Segoe UI', 12, 'bold'),
+                bg=self.colors['card_bg'], fg=self.colors['text_primary']).grid(row=2, column=0, sticky='w', pady=10)
+        
+        self.prep_budget_var = tk.StringVar(value="")
+        prep_entry = ttk.Entry(settings_grid, textvariable=self.prep_budget_var,
+                              width=15, font=('Segoe UI', 12))
+        prep_entry.grid(row=2, column=1, padx=20, pady=10)
+        
+        # Difficulté maximale
+        tk.Label(settings_grid, text="Difficulté max:", font=('Segoe UI', 12, 'bold'),
+                bg=self.colors['card_bg'], fg=self.colors['text_primary']).grid(row=2, column=2, sticky='w', pady=10)
+        
+        self.max_difficulty_var = tk.StringVar(value="Difficile")
+        difficulty_combo = ttk.Combobox(settings_grid, textvariable=self.max_difficulty_var,
+                                       values=list(DIFFICULTY_LEVELS), state='readonly',
+                                       width=12, font=('Segoe UI', 12))
+        difficulty_combo.grid(row=2, column=3, padx=20, pady=10)
+        
         # Boutons
         button_frame = tk.Frame(settings_card, bg=self.colors['card_bg'])
         button_frame.pack(pady=20)
@@ -1401,6 +1848,27 @@ class ModernSmartMealPlanner:
                                 command=self.generate_meal_plan)
         generate_btn.pack(side='left', padx=5)
         
+        # Bouton plans optimisés
+        optimize_btn = tk.Button(button_frame, text="⚖️ Plans optimisés",
+                                bg=self.colors['info'], fg='white',
+                                font=('Segoe UI', 12, 'bold'), relief='flat',
+                                command=self.generate_optimized_plans)
+        optimize_btn.pack(side='left', padx=5)
+        
+        # Bouton meilleur de N (recherche parallèle)
+        best_btn = tk.Button(button_frame, text=f"🎲 Meilleur de {BEST_OF_CANDIDATES}",
+                            bg=self.colors['info'], fg='white',
+                            font=('Segoe UI', 12, 'bold'), relief='flat',
+                            command=self.generate_best_plan)
+        best_btn.pack(side='left', padx=5)
+        
+        # Bouton cuisine groupée (recettes qui partagent leurs ingrédients)
+        batch_btn = tk.Button(button_frame, text="🥘 Cuisine groupée",
+                             bg=self.colors['info'], fg='white',
+                             font=('Segoe UI', 12, 'bold'), relief='flat',
+                             command=self.generate_batch_plan)
+        batch_btn.pack(side='left', padx=5)
+        
         # Bouton sauvegarde
         save_btn = tk.Button(button_frame, text="💾 Sauvegarder le plan", 
                             bg='white', fg=self.colors['primary'],
@@ -1408,6 +1876,57 @@ class ModernSmartMealPlanner:
                             command=self.save_generated_plan)
         save_btn.pack(side='left', padx=5)
         
+        # Affectation du plan au calendrier
+        tk.Label(button_frame, text="📅 À partir du:", font=('Segoe UI', 12),
+                bg=self.colors['card_bg'], fg=self.colors['text_primary']).pack(side='left', padx=(20, 5))
+        
+        self.plan_start_var = tk.StringVar(value=datetime.now().strftime('%d/%m/%Y'))
+        ttk.Entry(button_frame, textvariable=self.plan_start_var,
+                 width=12, font=('Segoe UI', 12)).pack(side='left', padx=5)
+        
+        schedule_btn = tk.Button(button_frame, text="📅 Planifier",
+                                bg='white', fg=self.colors['primary'],
+                                font=('Segoe UI', 12), relief='solid',
+                                command=self.schedule_generated_plan)
+        schedule_btn.pack(side='left', padx=5)
+        
+        # Compromis proposés par le mode optimisé (affiché après calcul)
+        self.pareto_frame = tk.Frame(settings_card, bg=self.colors['card_bg'])
+        tk.Label(self.pareto_frame, text="⚖️ Compromis:", font=('Segoe UI', 12, 'bold'),
+                bg=self.colors['card_bg'], fg=self.colors['text_primary']).pack(side='left', padx=(0, 10))
+        
+        self.pareto_combo = ttk.Combobox(self.pareto_frame, state='readonly',
+                                         width=55, font=('Segoe UI', 11))
+        self.pareto_combo.pack(side='left')
+        self.pareto_combo.bind('<<ComboboxSelected>>', lambda e: self.show_pareto_plan())
+        
+        # Remplacement d'un repas ou d'une journée du plan affiché
+        swap_frame = tk.Frame(main_content, bg=self.colors['background'])
+        swap_frame.pack(fill='x')
+        
+        tk.Label(swap_frame, text="🔄 Jour:", font=('Segoe UI', 12, 'bold'),
+                bg=self.colors['background'], fg=self.colors['text_primary']).pack(side='left', padx=(0, 5))
+        
+        self.swap_day_var = tk.StringVar(value="1")
+        self.swap_day_spin = tk.Spinbox(swap_frame, from_=1, to=1, textvariable=self.swap_day_var,
+                                        width=4, font=('Segoe UI', 12))
+        self.swap_day_spin.pack(side='left', padx=5)
+        
+        tk.Label(swap_frame, text="Repas:", font=('Segoe UI', 12, 'bold'),
+                bg=self.colors['background'], fg=self.colors['text_primary']).pack(side='left', padx=(15, 5))
+        
+        self.swap_meal_var = tk.StringVar(value="Journée entière")
+        self.swap_meal_combo = ttk.Combobox(swap_frame, textvariable=self.swap_meal_var,
+                                            values=["Journée entière"] + MEAL_TYPES,
+                                            state='readonly', width=16, font=('Segoe UI', 12))
+        self.swap_meal_combo.pack(side='left', padx=5)
+        
+        swap_btn = tk.Button(swap_frame, text="🔄 Remplacer",
+                            bg='white', fg=self.colors['primary'],
+                            font=('Segoe UI', 12), relief='solid',
+                            command=self.swap_plan_meal)
+        swap_btn.pack(side='left', padx=5)
+        
         # Zone résultats
         self.results_text = scrolledtext.ScrolledText(main_content, height=20, font=('Consolas', 11),
                                                      bg=self.colors['card_bg'], fg=self.colors['text_primary'],
@@ -1416,6 +1935,7 @@ class ModernSmartMealPlanner:
         
         # Générer un plan par défaut
         self.generate_sample_plan()
+        return main_content
     
     def generate_sample_plan(self):
         """Génère un plan d'exemple"""
@@ -1433,8 +1953,8 @@ class ModernSmartMealPlanner:
         self.results_text.delete(1.0, tk.END)
         self.results_text.insert(1.0, sample_text)
     
-    def generate_meal_plan(self):
-        """Génère un plan alimentaire"""
+    def read_plan_settings(self):
+        """Lit les paramètres du générateur (None si invalides)"""
         try:
             plan_name = self.plan_name_var.get()
             days = int(self.days_var.get())
@@ -1442,80 +1962,234 @@ class ModernSmartMealPlanner:
             category = self.category_var.get()
         except ValueError:
             messagebox.showerror("Erreur", "🔢 Veuillez entrer des nombres valides")
+            return None
+        if days < 1 or target_calories <= 0:
+            messagebox.showerror("Erreur", "🔢 Le nombre de jours et les calories doivent être positifs")
+            return None
+        return plan_name, days, target_calories, category
+    
+    def generate_meal_plan(self):
+        """Génère un plan alimentaire"""
+        settings = self.read_plan_settings()
+        if settings is None:
             return
+        plan_name, days, target_calories, category = settings
         
-        # Récupérer les recettes selon la catégorie
-        if category == "Toutes":
-            self.cursor.execute('SELECT * FROM recipes')
+        # Tirage pondéré par la popularité des recettes (tables d'alias par catégorie)
+        meal_types = MEAL_TYPES if category == "Toutes" else [category]
+        if not any(self.recipe_sampler.groups().get(meal_type) for meal_type in meal_types):
+            messagebox.showerror("Erreur", "❌ Aucune recette disponible pour cette catégorie")
+            return
+        
+        days_recipes = self.recipe_sampler.random_days(days, meal_types)
+        
+        self.display_generated_plan(plan_name, target_calories, category, days_recipes)
+    
+    def display_generated_plan(self, plan_name, target_calories, category, days_recipes, batch=False):
+        """Affiche un plan (une liste de journées {repas: recette}) et le garde pour sauvegarde
+        
+        batch=True ajoute sous le plan son programme de cuisine groupée.
+        """
+        self.current_generated_plan = GeneratedPlan(plan_name, target_calories, category, days_recipes)
+        self.current_plan_batch = batch
+        self.usage.record_many(usage_events.PICK, self.current_user['id'],
+                               self.current_generated_plan.recipe_ids())
+        self.render_generated_plan()
+    
+    def render_generated_plan(self):
+        """Affiche tout le plan, une région (tag) par journée"""
+        plan = self.current_generated_plan
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, plan.header_text(), 'plan_header')
+        for index in range(len(plan)):
+            self.results_text.insert(tk.END, plan.day_text(index), f'plan_day{index}')
+        self.results_text.insert(tk.END, plan.summary_text(), 'plan_summary')
+        if self.current_plan_batch:
+            self.results_text.insert(tk.END, self.batch_schedule_text(), 'plan_batch')
+        
+        self.swap_day_spin.configure(to=len(plan))
+        if int(self.swap_day_var.get() or 1) > len(plan):
+            self.swap_day_var.set("1")
+        self.swap_meal_combo.configure(values=["Journée entière"] + plan.meal_types())
+    
+    def rerender_plan_region(self, tag, text):
+        """Réécrit une seule région du plan affiché"""
+        ranges = self.results_text.tag_ranges(tag)
+        if not ranges:
+            return
+        start = self.results_text.index(ranges[0])
+        self.results_text.delete(start, ranges[-1])
+        self.results_text.insert(start, text, tag)
+    
+    def swap_plan_meal(self):
+        """Remplace un repas ou une journée du plan sans régénérer le reste"""
+        if not hasattr(self, 'current_generated_plan'):
+            messagebox.showerror("Erreur", "❌ Aucun plan à modifier. Générez d'abord un plan!")
+            return
+        
+        plan = self.current_generated_plan
+        try:
+            index = int(self.swap_day_var.get()) - 1
+        except ValueError:
+            index = -1
+        if not 0 <= index < len(plan):
+            messagebox.showerror("Erreur", f"🔢 Jour invalide (1 à {len(plan)})")
+            return
+        
+        meal_types = plan.meal_types()
+        day_target = plan.target_calories * sum(MEAL_SHARES[m] for m in meal_types)
+        meal_type = self.swap_meal_var.get()
+        exclude = plan.recipe_ids()
+        
+        if meal_type in meal_types:
+            current = plan.days[index].meals[meal_type]
+            wanted = day_target - (plan.days[index].calories - recipe_calories(current))
+            recipe = self.recipe_pool.replacement(meal_type, wanted, exclude)
+            if recipe is None:
+                messagebox.showerror("Erreur", "❌ Aucune recette disponible pour ce repas")
+                return
+            plan.swap_meal(index, meal_type, recipe)
         else:
-            self.cursor.execute('SELECT * FROM recipes WHERE category = ?', (category,))
+            plan.swap_day(index, self.recipe_pool.replacement_day(meal_types, day_target, exclude))
         
-        all_recipes = self.cursor.fetchall()
+        self.rerender_plan_region(f'plan_day{index}', plan.day_text(index))
+        self.rerender_plan_region('plan_summary', plan.summary_text())
+        if self.current_plan_batch:
+            self.rerender_plan_region('plan_batch', self.batch_schedule_text())
+    
+    def generate_optimized_plans(self):
+        """Calcule un front de Pareto de plans (calories / temps de préparation)"""
+        settings = self.read_plan_settings()
+        if settings is None:
+            return
+        plan_name, days, target_calories, category = settings
         
-        if not all_recipes:
-            messagebox.showerror("Erreur", "❌ Aucune recette disponible pour cette catégorie")
+        prep_budget = self.prep_budget_var.get().strip()
+        try:
+            prep_budget = int(prep_budget) if prep_budget else None
+        except ValueError:
+            messagebox.showerror("Erreur", "🔢 Temps de préparation invalide")
             return
         
-        # En-tête stylisé
-        plan_text = "╔════════════════════════════════════════╗\n"
-        plan_text += "║         📋 SMARTMEAL PLANNER          ║\n"
-        plan_text += f"║            {plan_name:^16}           ║\n"
-        plan_text += "╚════════════════════════════════════════╝\n\n"
-        
-        plan_text += f"🔮 Jours: {days} | 🎯 Calories/jour: {target_calories}\n"
-        if category != "Toutes":
-            plan_text += f"📂 Catégorie: {category}\n"
-        plan_text += "═" * 50 + "\n\n"
-        
-        categories = {
-            'Petit-déjeuner': [r for r in all_recipes if r[2] == 'Petit-déjeuner'],
-            'Déjeuner': [r for r in all_recipes if r[2] == 'Déjeuner'],
-            'Dîner': [r for r in all_recipes if r[2] == 'Dîner']
-        }
+        if self.meal_optimizer is None:
+            self.meal_optimizer = MealOptimizer.from_connection(self.conn)
         
-        total_calories = 0
+        plans = self.meal_optimizer.pareto_plans(
+            days, target_calories, prep_budget=prep_budget,
+            max_difficulty=self.max_difficulty_var.get(),
+            category=None if category == "Toutes" else category)
         
-        for day in range(1, days + 1):
-            plan_text += f"\n✨ JOUR {day}\n"
-            plan_text += "─" * 35 + "\n"
-            daily_calories = 0
-            
-            for meal_type in ['Petit-déjeuner', 'Déjeuner', 'Dîner']:
-                available = categories[meal_type]
-                if available:
-                    recipe = random.choice(available)
-                    plan_text += f"\n🍽️  {meal_type}:\n"
-                    plan_text += f"   📛 {recipe[1]}\n"
-                    plan_text += f"   ⏱️  {recipe[6]} min | 🔥 {recipe[5]} cal | 🎯 {recipe[7]}\n"
-                    plan_text += f"   📝 {recipe[3][:80]}...\n"
-                    daily_calories += recipe[5]
-                else:
-                    plan_text += f"\n🍽️  {meal_type}:\n"
-                    plan_text += f"   ❌ Aucune recette disponible\n"
-            
-            plan_text += f"\n📊 TOTAL JOUR {day}: {daily_calories} calories\n"
-            plan_text += "═" * 50 + "\n"
-            total_calories += daily_calories
-        
-        # Résumé
-        plan_text += f"\n📈 RÉSUMÉ DU PLAN\n"
-        plan_text += "─" * 35 + "\n"
-        plan_text += f"📅 Durée: {days} jours\n"
-        plan_text += f"🎯 Calories/jour cible: {target_calories}\n"
-        plan_text += f"🔥 Calories totales: {total_calories}\n"
-        plan_text += f"📊 Moyenne/jour: {total_calories//days}\n"
+        if not plans:
+            messagebox.showerror("Erreur", "❌ Aucune recette ne respecte ces contraintes")
+            return
+        
+        self.pareto_plans = plans
+        self.pareto_combo.configure(values=[f"{i}. {plan.label()}" for i, plan in enumerate(plans, 1)])
+        self.pareto_combo.current(0)
+        self.pareto_frame.pack(pady=(0, 10))
+        self.show_pareto_plan()
+    
+    def generate_best_plan(self):
+        """Lance la recherche « meilleur de N » sur le pool de processus"""
+        if self.plan_search_futures:
+            return
+        settings = self.read_plan_settings()
+        if settings is None:
+            return
+        plan_name, days, target_calories, category = settings
+        
+        prep_budget = self.prep_budget_var.get().strip()
+        try:
+            prep_budget = int(prep_budget) if prep_budget else None
+        except ValueError:
+            messagebox.showerror("Erreur", "🔢 Temps de préparation invalide")
+            return
+        
+        if self.plan_search is None:
+            self.plan_search = PlanSearch.from_connection(self.conn)
+        
+        self.plan_search_futures = self.plan_search.submit(
+            days, target_calories, candidates=BEST_OF_CANDIDATES, prep_budget=prep_budget,
+            max_difficulty=self.max_difficulty_var.get(),
+            category=None if category == "Toutes" else category)
+        self.plan_search_settings = settings
         
         self.results_text.delete(1.0, tk.END)
-        self.results_text.insert(1.0, plan_text)
-        
-        # Stocker le plan généré pour sauvegarde
-        self.current_generated_plan = {
-            'text': plan_text,
-            'name': plan_name,
-            'calories': target_calories,
-            'days': days,
-            'category': category
-        }
+        self.results_text.insert(1.0, f"⏳ Recherche du meilleur plan parmi {BEST_OF_CANDIDATES} "
+                                      f"candidats ({self.plan_search.workers} processus)...\n")
+        self.root.after(100, self.poll_plan_search)
+    
+    def poll_plan_search(self):
+        """Vérifie si la recherche parallèle est terminée"""
+        futures = self.plan_search_futures
+        if not futures:
+            return
+        if not all(f.done() for f in futures):
+            self.root.after(100, self.poll_plan_search)
+            return
+        
+        self.plan_search_futures = []
+        if self.plan_search_stale:
+            # Recettes modifiées pendant la recherche : le plan pourrait citer des recettes supprimées
+            self.plan_search_stale = False
+            self.close_plan_search()
+            self.generate_best_plan()
+            return
+        try:
+            best = PlanSearch.best(futures)
+        except Exception as e:
+            # Processus du pool tué (BrokenProcessPool) ou erreur dans une tâche
+            self.close_plan_search()
+            self.results_text.delete(1.0, tk.END)
+            messagebox.showerror("Erreur", f"❌ La recherche a échoué : {e}")
+            return
+        if best is None:
+            messagebox.showerror("Erreur", "❌ Aucune recette ne respecte ces contraintes")
+            return
+        
+        plan_name, _, target_calories, category = self.plan_search_settings
+        _, plan = best
+        days_recipes = [{meal_type: self.recipe_catalog.get(recipe_id)
+                         for meal_type, recipe_id in day.items()}
+                        for day in plan]
+        self.display_generated_plan(plan_name, target_calories, category, days_recipes)
+    
+    def generate_batch_plan(self):
+        """Génère un plan dont les recettes partagent leurs ingrédients, avec ses séances de préparation"""
+        settings = self.read_plan_settings()
+        if settings is None:
+            return
+        plan_name, days, target_calories, category = settings
+        
+        if self.batch_planner is None:
+            self.batch_planner = BatchPlanner.from_connection(self.conn)
+        
+        days_recipes = self.batch_planner.plan(
+            days, target_calories, category=None if category == "Toutes" else category,
+            max_difficulty=self.max_difficulty_var.get())
+        if days_recipes is None:
+            messagebox.showerror("Erreur", "❌ Aucune recette ne respecte ces contraintes")
+            return
+        
+        self.display_generated_plan(plan_name, target_calories, category, days_recipes, batch=True)
+    
+    def batch_schedule_text(self):
+        """Programme de cuisine groupée du plan affiché (recalculé après un remplacement)"""
+        days_recipes = [day.meals for day in self.current_generated_plan.days]
+        return schedule_text(prep_sessions(days_recipes))
+    
+    def show_pareto_plan(self):
+        """Affiche le compromis choisi dans la liste des plans optimisés"""
+        settings = self.read_plan_settings()
+        if settings is None:
+            return
+        plan_name, _, target_calories, category = settings
+        
+        plan = self.pareto_plans[self.pareto_combo.current()]
+        days_recipes = [{meal_type: self.recipe_catalog.get(recipe_id)
+                         for meal_type, recipe_id in day.items()}
+                        for day in plan.days]
+        self.display_generated_plan(plan_name, target_calories, category, days_recipes)
     
     def save_generated_plan(self):
         """Sauvegarde le plan généré"""
@@ -1524,56 +2198,195 @@ class ModernSmartMealPlanner:
             return
         
         try:
-            self.cursor.execute('''
-                INSERT INTO saved_plans (user_id, plan_name, plan_text, calories_target, days_count)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (self.current_user['id'], 
-                  self.current_generated_plan['name'],
-                  self.current_generated_plan['text'],
-                  self.current_generated_plan['calories'],
-                  self.current_generated_plan['days']))
+            plan_share.save_plan(self.conn, self.current_user['id'], self.current_generated_plan)
+            record_selection(self.conn, self.current_generated_plan.recipe_ids(), commit=False)
             self.conn.commit()
+            self.recipe_sampler.invalidate()
+            self.notify_data_changed('plans')
             
-            messagebox.showinfo("Succès", f"✅ Plan '{self.current_generated_plan['name']}' sauvegardé !")
+            messagebox.showinfo("Succès", f"✅ Plan '{self.current_generated_plan.name}' sauvegardé !")
             self.show_saved_plans()
             
         except Exception as e:
             messagebox.showerror("Erreur", f"❌ Impossible de sauvegarder: {e}")
     
+    def schedule_generated_plan(self):
+        """Affecte le plan généré aux dates du calendrier"""
+        if not hasattr(self, 'current_generated_plan'):
+            messagebox.showerror("Erreur", "❌ Aucun plan à planifier. Générez d'abord un plan!")
+            return
+        
+        try:
+            start = datetime.strptime(self.plan_start_var.get().strip(), '%d/%m/%Y').date()
+        except ValueError:
+            messagebox.showerror("Erreur", "📅 Date invalide (format JJ/MM/AAAA)")
+            return
+        
+        days_meals = self.current_generated_plan.days_meals()
+        meal_calendar.assign_days(self.conn, self.current_user['id'], start, days_meals)
+        self.notify_data_changed('calendar')
+        
+        end = start + timedelta(days=len(days_meals) - 1)
+        messagebox.showinfo("Succès", f"✅ Plan planifié du {start.strftime('%d/%m/%Y')} "
+                                      f"au {end.strftime('%d/%m/%Y')}")
+        self.calendar_anchor = start
+        self.show_calendar()
+    
+    @profile_screen('calendar')
+    def show_calendar(self):
+        """Affiche le calendrier des repas"""
+        self.show_screen('calendar')
+    
+    def build_calendar(self, parent):
+        """Construit l'écran calendrier (grilles semaine et mois créées une seule fois)"""
+        main_content = tk.Frame(parent, bg=self.colors['background'])
+        
+        tk.Label(main_content, text="📅 Calendrier des repas",
+                font=('Segoe UI', 28, 'bold'), bg=self.colors['background'],
+                fg=self.colors['text_primary']).pack(pady=(0, 20))
+        
+        # Navigation
+        nav_frame = tk.Frame(main_content, bg=self.colors['background'])
+        nav_frame.pack(fill='x', pady=(0, 15))
+        
+        for text, step in (("◀", -1), ("▶", 1)):
+            tk.Button(nav_frame, text=text, bg=self.colors['primary'], fg='white',
+                     font=('Segoe UI', 11, 'bold'), relief='flat', width=3,
+                     command=lambda s=step: self.move_calendar(s)).pack(side='left', padx=2)
+        
+        tk.Button(nav_frame, text="Aujourd'hui", bg='white', fg=self.colors['primary'],
+                 font=('Segoe UI', 11), relief='solid',
+                 command=self.calendar_today).pack(side='left', padx=10)
+        
+        self.calendar_title = tk.Label(nav_frame, font=('Segoe UI', 16, 'bold'),
+                                       bg=self.colors['background'], fg=self.colors['text_primary'])
+        self.calendar_title.pack(side='left', padx=10)
+        
+        self.calendar_view_var = tk.StringVar(value="Mois")
+        view_combo = ttk.Combobox(nav_frame, textvariable=self.calendar_view_var,
+                                  values=["Semaine", "Mois"], width=10, state='readonly',
+                                  font=('Segoe UI', 12))
+        view_combo.pack(side='right')
+        view_combo.bind('<<ComboboxSelected>>', lambda e: self.refresh_calendar())
+        
+        grids_frame = tk.Frame(main_content, bg=self.colors['background'])
+        grids_frame.pack(fill='both', expand=True)
+        
+        self.calendar_grids = {
+            'Semaine': self.create_calendar_grid(grids_frame, rows=1, font_size=11),
+            'Mois': self.create_calendar_grid(grids_frame, rows=6, font_size=9)
+        }
+        
+        self.refresh_calendar()
+        return main_content
+    
+    def create_calendar_grid(self, parent, rows, font_size):
+        """Crée une grille de cellules réutilisables (une par jour)"""
+        grid = tk.Frame(parent, bg=self.colors['background'])
+        
+        for col, day_name in enumerate(DAY_NAMES):
+            tk.Label(grid, text=day_name, font=('Segoe UI', 11, 'bold'),
+                    bg=self.colors['background'], fg=self.colors['primary']).grid(row=0, column=col, pady=(0, 5))
+            grid.columnconfigure(col, weight=1, uniform="day")
+        
+        cells = []
+        for row in range(1, rows + 1):
+            grid.rowconfigure(row, weight=1)
+            for col in range(7):
+                cell = tk.Frame(grid, bg=self.colors['card_bg'], padx=6, pady=4,
+                               highlightbackground=self.colors['light_gray'], highlightthickness=1)
+                cell.grid(row=row, column=col, padx=2, pady=2, sticky='nsew')
+                
+                day_label = tk.Label(cell, font=('Segoe UI', font_size + 1, 'bold'), anchor='w',
+                                    bg=self.colors['card_bg'], fg=self.colors['text_primary'])
+                day_label.pack(fill='x')
+                
+                meal_labels = []
+                for _ in MEAL_ICONS:
+                    label = tk.Label(cell, font=('Segoe UI', font_size), anchor='w', justify='left',
+                                    bg=self.colors['card_bg'], fg=self.colors['text_secondary'])
+                    label.pack(fill='x')
+                    meal_labels.append(label)
+                
+                cells.append((cell, day_label, meal_labels))
+        
+        return grid, cells
+    
+    def move_calendar(self, step):
+        """Passe à la semaine ou au mois précédent/suivant"""
+        anchor = self.calendar_anchor
+        if self.calendar_view_var.get() == "Semaine":
+            self.calendar_anchor = anchor + timedelta(weeks=step)
+        else:
+            month = anchor.month - 1 + step
+            self.calendar_anchor = anchor.replace(year=anchor.year + month // 12,
+                                                  month=month % 12 + 1, day=1)
+        self.refresh_calendar()
+    
+    def calendar_today(self):
+        """Revient à la période contenant aujourd'hui"""
+        self.calendar_anchor = date.today()
+        self.refresh_calendar()
+    
+    def refresh_calendar(self):
+        """Recharge la période affichée par une seule requête par intervalle"""
+        view = self.calendar_view_var.get()
+        anchor = self.calendar_anchor
+        
+        if view == "Semaine":
+            start, end = meal_calendar.week_range(anchor)
+            days = [start + timedelta(days=i) for i in range(7)]
+            self.calendar_title.configure(text=f"Semaine du {start.strftime('%d/%m/%Y')}")
+            max_chars = 28
+        else:
+            weeks = meal_calendar.month_grid(anchor.year, anchor.month)
+            days = [day for week in weeks for day in week]
+            start, end = days[0], days[-1]
+            self.calendar_title.configure(text=f"{MONTH_NAMES[anchor.month - 1]} {anchor.year}")
+            max_chars = 16
+        
+        meals_by_date = meal_calendar.get_range(self.conn, self.current_user['id'], start, end)
+        
+        for name, (grid, _) in self.calendar_grids.items():
+            if name == view:
+                grid.pack(fill='both', expand=True)
+            else:
+                grid.pack_forget()
+        
+        _, cells = self.calendar_grids[view]
+        today = date.today()
+        
+        for i, (cell, day_label, meal_labels) in enumerate(cells):
+            if i >= len(days):
+                cell.grid_remove()
+                continue
+            cell.grid()
+            
+            day = days[i]
+            in_period = view == "Semaine" or day.month == anchor.month
+            day_label.configure(text=str(day.day),
+                                fg=self.colors['primary'] if day == today else
+                                (self.colors['text_primary'] if in_period else self.colors['light_gray']))
+            
+            meals = meals_by_date.get(day, {})
+            for label, (column, icon) in zip(meal_labels, MEAL_ICONS.items()):
+                name = meals.get(column) or ""
+                if len(name) > max_chars:
+                    name = name[:max_chars - 1] + "…"
+                label.configure(text=f"{icon} {name}" if name else "")
+    
     def show_recipe_search(self):
         """Affiche la page de recherche de recettes"""
         self.show_recipes()
     
+    @profile_screen('profile')
     def show_profile(self):
         """Affiche la page profil"""
-        self.clear_window()
-        
-        # Barre latérale
-        sidebar = tk.Frame(self.root, bg=self.colors['card_bg'], width=250,
-                          highlightbackground=self.colors['light_gray'], 
-                          highlightthickness=1)
-        sidebar.pack(side='left', fill='y')
-        sidebar.pack_propagate(False)
-        
-        menu_items = [
-            ("📊 Tableau de bord", self.show_dashboard),
-            ("🍽️ Générer repas", self.show_meal_generator),
-            ("📖 Recettes", self.show_recipes),
-            ("💾 Mes inscriptions", self.show_saved_plans),
-            ("👤 Profil", self.show_profile),
-            ("🚪 Déconnexion", self.show_login_screen)
-        ]
-        
-        for text, command in menu_items:
-            btn = tk.Label(sidebar, text=text, font=('Segoe UI', 12),
-                          bg=self.colors['card_bg'], fg=self.colors['text_secondary'],
-                          cursor='hand2', padx=20, pady=15)
-            btn.bind('<Button-1>', lambda e, cmd=command: cmd())
-            btn.pack(fill='x')
-        
-        # Contenu principal
-        main_content = tk.Frame(self.root, bg=self.colors['background'])
-        main_content.pack(side='right', fill='both', expand=True, padx=30, pady=30)
+        self.show_screen('profile')
+    
+    def build_profile(self, parent):
+        """Construit l'écran profil"""
+        main_content = tk.Frame(parent, bg=self.colors['background'])
         
         tk.Label(main_content, text="👤 Mon Profil", 
                 font=('Segoe UI', 28, 'bold'), bg=self.colors['background'], 
@@ -1616,16 +2429,359 @@ class ModernSmartMealPlanner:
             tk.Label(row, text=value, font=('Segoe UI', 12),
                     bg=self.colors['card_bg'], fg=self.colors['text_secondary'],
                     anchor='w').pack(side='left')
+        
+        return main_content
+
+    @profile_screen('diagnostics')
+    def show_diagnostics(self):
+        """Affiche les statistiques des requêtes SQL"""
+        self.show_screen('diagnostics')
+    
+    def build_diagnostics(self, parent):
+        """Construit l'écran de diagnostics"""
+        main_content = tk.Frame(parent, bg=self.colors['background'])
+
+        tk.Label(main_content, text="🩺 Diagnostics SQL",
+                font=('Segoe UI', 28, 'bold'), bg=self.colors['background'],
+                fg=self.colors['text_primary']).pack(pady=(0, 30))
+
+        # Boutons
+        button_frame = tk.Frame(main_content, bg=self.colors['background'])
+        button_frame.pack(fill='x', pady=(0, 10))
+
+        tk.Button(button_frame, text="🔄 Actualiser",
+                 bg=self.colors['primary'], fg='white',
+                 font=('Segoe UI', 11), relief='flat',
+                 command=self.show_diagnostics).pack(side='left', padx=5)
+
+        tk.Button(button_frame, text="💾 Exporter JSON",
+                 bg='white', fg=self.colors['primary'],
+                 font=('Segoe UI', 11), relief='solid',
+                 command=self.export_query_stats).pack(side='left', padx=5)
+
+        def reset_stats():
+            query_monitor.reset()
+            self.show_diagnostics()
+
+        tk.Button(button_frame, text="🗑️ Réinitialiser",
+                 bg=self.colors['danger'], fg='white',
+                 font=('Segoe UI', 11), relief='flat',
+                 command=reset_stats).pack(side='left', padx=5)
+
+        snapshot = query_monitor.snapshot()
+
+        report = f"⏱️ Seuil requêtes lentes: {snapshot['slow_threshold_ms']:.0f} ms\n"
+        report += "═" * 100 + "\n"
+        report += f"{'Appels':>7} {'Total ms':>10} {'Moy.':>8} {'p50':>8} {'p99':>8} {'Max':>8}  Requête\n"
+        report += "─" * 100 + "\n"
+        for stats in snapshot['queries']:
+            report += (f"{stats['count']:>7} {stats['total_ms']:>10.1f} {stats['mean_ms']:>8.2f} "
+                       f"{stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['max_ms']:>8.2f}  "
+                       f"{stats['sql'][:90]}\n")
+
+        report += f"\n🐢 REQUÊTES LENTES ({len(snapshot['slow_queries'])})\n"
+        report += "─" * 100 + "\n"
+        for entry in reversed(snapshot['slow_queries']):
+            report += f"[{entry['at']}] {entry['elapsed_ms']:.1f} ms  {entry['sql'][:120]}\n"
+            for line in entry['plan']:
+                report += f"      ↳ {line}\n"
+
+        report_text = scrolledtext.ScrolledText(main_content, font=('Consolas', 10),
+                                               bg=self.colors['card_bg'], fg=self.colors['text_primary'],
+                                               wrap='none')
+        report_text.pack(fill='both', expand=True, pady=10)
+        report_text.insert(1.0, report)
+        report_text.config(state='disabled')
+        return main_content
+
+    def export_query_stats(self):
+        """Exporte les statistiques SQL au format JSON"""
+        filename = f"sql_stats_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        try:
+            query_monitor.dump_json(filename)
+            messagebox.showinfo("Succès", f"✅ Statistiques exportées dans {filename}")
+        except OSError as e:
+            messagebox.showerror("Erreur", f"❌ Impossible d'exporter: {e}")
+
+    @profile_screen('backups')
+    def show_backups(self):
+        """Affiche les sauvegardes de la base"""
+        self.show_screen('backups')
+    
+    def build_backups(self, parent):
+        """Construit l'écran des sauvegardes"""
+        main_content = tk.Frame(parent, bg=self.colors['background'])
+        
+        tk.Label(main_content, text="🗄️ Sauvegardes",
+                font=('Segoe UI', 28, 'bold'), bg=self.colors['background'],
+                fg=self.colors['text_primary']).pack(pady=(0, 30))
+        
+        # Boutons
+        button_frame = tk.Frame(main_content, bg=self.colors['background'])
+        button_frame.pack(fill='x', pady=(0, 10))
+        
+        tk.Button(button_frame, text="💾 Sauvegarder maintenant",
+                 bg=self.colors['primary'], fg='white',
+                 font=('Segoe UI', 11), relief='flat',
+                 command=self.backup_now).pack(side='left', padx=5)
+        
+        tk.Button(button_frame, text="📤 Exporter...",
+                 bg='white', fg=self.colors['primary'],
+                 font=('Segoe UI', 11), relief='solid',
+                 command=self.export_snapshot).pack(side='left', padx=5)
+        
+        tk.Button(button_frame, text="📥 Importer...",
+                 bg='white', fg=self.colors['primary'],
+                 font=('Segoe UI', 11), relief='solid',
+                 command=self.import_snapshot).pack(side='left', padx=5)
+        
+        # Progression de l'opération en cours
+        self.backup_progress = ttk.Progressbar(main_content, mode='determinate', maximum=100)
+        self.backup_progress.pack(fill='x', pady=(10, 5))
+        
+        self.backup_status_label = tk.Label(main_content, font=('Segoe UI', 11), anchor='w',
+                                           bg=self.colors['background'], fg=self.colors['text_secondary'])
+        self.backup_status_label.pack(fill='x', pady=(0, 15))
+        
+        # Sauvegardes existantes
+        tk.Label(main_content, text="📚 Sauvegardes disponibles", font=('Segoe UI', 14, 'bold'),
+                bg=self.colors['background'], fg=self.colors['text_primary']).pack(anchor='w')
+        
+        self.backups_listbox = tk.Listbox(main_content, font=('Consolas', 11), height=10,
+                                          bg=self.colors['card_bg'], fg=self.colors['text_primary'])
+        self.backups_listbox.pack(fill='both', expand=True, pady=10)
+        
+        tk.Button(main_content, text="♻️ Restaurer la sélection",
+                 bg=self.colors['danger'], fg='white',
+                 font=('Segoe UI', 11), relief='flat',
+                 command=self.restore_selected_backup).pack(anchor='w')
+        
+        self.refresh_backups()
+        return main_content
+    
+    def refresh_backups(self):
+        """Met à jour la liste des sauvegardes et la progression affichée"""
+        self.backup_list = self.backup_manager.list_backups()
+        self.backups_listbox.delete(0, 'end')
+        for path, size, created in self.backup_list:
+            self.backups_listbox.insert('end', f"{created.strftime('%d/%m/%Y %H:%M')}   "
+                                               f"{size / 1024 / 1024:>8.1f} Mo   {os.path.basename(path)}")
+        self.update_backup_progress()
+    
+    def update_backup_progress(self):
+        """Affiche la progression de l'opération en cours"""
+        self.backup_progress.configure(value=self.backup_percent)
+        self.backup_status_label.configure(text=self.backup_status)
+    
+    def check_scheduled_backup(self):
+        """Lance la sauvegarde planifiée lorsqu'elle est due"""
+        if not self.backup_manager.running and self.backup_manager.is_due():
+            self.start_backup_operation(self.backup_manager.backup_now(), "Sauvegarde planifiée")
+        self.root.after(BACKUP_CHECK_MS, self.check_scheduled_backup)
+    
+    def backup_now(self):
+        """Sauvegarde immédiate (avec rotation des anciennes copies)"""
+        self.start_backup_operation(self.backup_manager.backup_now(), "Sauvegarde")
+    
+    def export_snapshot(self):
+        """Exporte un instantané compressé de la base"""
+        path = filedialog.asksaveasfilename(
+            title="Exporter la base", defaultextension='.db.gz',
+            initialfile=f"smartmeal_{datetime.now().strftime('%Y%m%d')}.db.gz",
+            filetypes=[("Instantané SmartMeal", "*.db.gz")])
+        if path:
+            self.start_backup_operation(self.backup_manager.export_snapshot(path), "Export")
+    
+    def import_snapshot(self):
+        """Remplace les données par un instantané exporté"""
+        path = filedialog.askopenfilename(
+            title="Importer une base",
+            filetypes=[("Instantané SmartMeal", "*.db.gz *.db"), ("Tous les fichiers", "*.*")])
+        if path:
+            self.confirm_import(path)
+    
+    def restore_selected_backup(self):
+        """Restaure la sauvegarde sélectionnée dans la liste"""
+        selection = self.backups_listbox.curselection()
+        if not selection:
+            messagebox.showerror("Erreur", "📚 Sélectionnez une sauvegarde à restaurer")
+            return
+        self.confirm_import(self.backup_list[selection[0]][0])
+    
+    def confirm_import(self, path):
+        """Demande confirmation puis lance l'import"""
+        if not messagebox.askyesno("Confirmation",
+                                   "⚠️ Toutes les données actuelles seront remplacées par "
+                                   f"{os.path.basename(path)}.\nContinuer ?"):
+            return
+        # Aucune transaction de l'application ne doit rester ouverte pendant la copie
+        self.conn.commit()
+        self.suspend_database_users()
+        started = self.backup_manager.import_snapshot(path)
+        if not started:
+            self.resume_database_users()
+        self.start_backup_operation(started, "Import")
+    
+    def suspend_database_users(self):
+        """Libère la base avant une restauration : écritures différées suspendues,
+        recherche en cours interrompue, visualiseurs de plans fermés"""
+        self.usage.pause()
+        self.recipe_search.reconnect()
+        for close in list(self.plan_viewers.values()):
+            close()
+    
+    def resume_database_users(self):
+        """Reprend les écritures différées ; la recherche rouvre sa connexion"""
+        self.usage.resume()
+        self.recipe_search.reconnect()
+    
+    def start_backup_operation(self, started, label):
+        """Suit l'opération lancée, ou signale qu'une autre est déjà en cours"""
+        if not started:
+            if label != "Sauvegarde planifiée":
+                messagebox.showwarning("Sauvegardes", "⏳ Une opération est déjà en cours")
+            return
+        self.backup_percent = 0
+        self.backup_status = f"⏳ {label} en cours..."
+        if self.backup_poll_job is None:
+            self.backup_poll_job = self.root.after(100, self.poll_backup_events)
+    
+    def poll_backup_events(self):
+        """Vide la file d'événements des sauvegardes (progression, fin, erreur)"""
+        self.backup_poll_job = None
+        labels = {'backup': "Sauvegarde", 'export': "Export", 'import': "Import"}
+        try:
+            while True:
+                kind, status, payload = self.backup_manager.events.get_nowait()
+                if status == 'progress':
+                    copied, total = payload
+                    self.backup_percent = 100 * copied / total if total else 100
+                    self.backup_status = f"⏳ {labels[kind]} : {copied}/{total} pages"
+                elif status == 'done':
+                    self.backup_percent = 100
+                    self.backup_status = f"✅ {labels[kind]} terminé : {os.path.basename(payload)}"
+                    if kind == 'import':
+                        self.resume_database_users()
+                        self.on_snapshot_imported()
+                    else:
+                        self.screen_manager.invalidate('backups')
+                else:
+                    self.backup_percent = 0
+                    self.backup_status = f"❌ {labels[kind]} impossible : {payload}"
+                    if kind == 'import':
+                        self.resume_database_users()
+                    if kind != 'backup':
+                        messagebox.showerror("Erreur", f"❌ {labels[kind]} impossible: {payload}")
+        except queue.Empty:
+            pass
+        
+        if self.screen_manager.is_visible('backups'):
+            self.update_backup_progress()
+        
+        if self.backup_manager.running or not self.backup_manager.events.empty():
+            self.backup_poll_job = self.root.after(100, self.poll_backup_events)
+    
+    def on_snapshot_imported(self):
+        """Recharge tout ce qui dépend de la base après un import"""
+        # Un instantané ancien peut ne pas avoir les derniers index ni l'index plein texte
+        create_schema(self.conn)
+        self.conn.commit()
+        self.saved_plan_search = SavedPlanSearch(self.conn)
+        self.change_watcher.reset()
+        self.notify_data_changed('recipes', 'plans', 'calendar', 'user', 'backups')
+        
+        user_id = self.current_user['id'] if self.current_user else 0
+        if user_id and self.conn.execute('SELECT 1 FROM users WHERE id = ?', (user_id,)).fetchone() is None:
+            messagebox.showinfo("Import", "👤 Votre compte n'existe pas dans la base importée. "
+                                          "Veuillez vous reconnecter.")
+            self.current_user = None
+            self.show_login_screen()
+    
+    def register_screens(self):
+        """Déclare les écrans de l'application et les données dont ils dépendent"""
+        self.screen_manager.register('dashboard', self.build_dashboard,
+                                     refresh=self.refresh_dashboard, topics=('plans', 'recipes'))
+        self.screen_manager.register('recipes', self.build_recipes,
+                                     refresh=self.refresh_recipes, on_show=self.bind_recipes_mousewheel,
+                                     topics=('recipes',))
+        self.screen_manager.register('saved_plans', self.build_saved_plans,
+                                     refresh=self.refresh_saved_plans, topics=('plans',))
+        self.screen_manager.register('meal_generator', self.build_meal_generator)
+        self.screen_manager.register('profile', self.build_profile, topics=('user',))
+        self.screen_manager.register('calendar', self.build_calendar,
+                                     refresh=self.refresh_calendar, topics=('calendar',))
+        self.screen_manager.register('backups', self.build_backups,
+                                     refresh=self.refresh_backups, topics=('backups',))
+        self.screen_manager.register('diagnostics', self.build_diagnostics, always_refresh=True)
+    
+    def show_screen(self, name):
+        """Affiche un écran de l'application connectée, construit au premier affichage"""
+        if self.screen_manager.container is None:
+            self.build_shell()
+        self.screen_manager.show(name)
+    
+    def build_shell(self):
+        """Construit la barre latérale et le conteneur des écrans (une fois par session)"""
+        self.clear_window()
+        
+        # Barre latérale
+        sidebar = tk.Frame(self.root, bg=self.colors['card_bg'], width=250,
+                          highlightbackground=self.colors['light_gray'], 
+                          highlightthickness=1)
+        sidebar.pack(side='left', fill='y')
+        sidebar.pack_propagate(False)
+        
+        # Logo sidebar
+        logo = tk.Label(sidebar, text="🍽️", font=('Segoe UI', 24),
+                       bg=self.colors['card_bg'], fg=self.colors['primary'])
+        logo.pack(pady=(30, 10))
+        self.show_asset(logo, ASSET_LOGO, LOGO_SIZES['sidebar'], FIT, step=1)
+        
+        tk.Label(sidebar, text="SmartMeal", font=('Segoe UI', 16, 'bold'),
+                bg=self.colors['card_bg'], fg=self.colors['primary']).pack(pady=(0, 30))
+        
+        # Menu sidebar
+        menu_items = [
+            ("📊 Tableau de bord", self.show_dashboard),
+            ("🍽️ Générer repas", self.show_meal_generator),
+            ("📖 Recettes", self.show_recipes),
+            ("💾 Mes inscriptions", self.show_saved_plans),
+            ("📅 Calendrier", self.show_calendar),
+            ("👤 Profil", self.show_profile),
+            ("🗄️ Sauvegardes", self.show_backups),
+            ("🩺 Diagnostics", self.show_diagnostics),
+            ("🚪 Déconnexion", self.show_login_screen)
+        ]
+        
+        for text, command in menu_items:
+            btn = tk.Label(sidebar, text=text, font=('Segoe UI', 12),
+                          bg=self.colors['card_bg'], fg=self.colors['text_secondary'],
+                          cursor='hand2', padx=20, pady=15)
+            btn.bind('<Button-1>', lambda e, cmd=command: cmd())
+            btn.pack(fill='x')
+            btn.bind('<Enter>', lambda e: e.widget.configure(bg=self.colors['primary'], fg='white'))
+            btn.bind('<Leave>', lambda e: e.widget.configure(bg=self.colors['card_bg'], fg=self.colors['text_secondary']))
+        
+        # Conteneur des écrans
+        content_host = tk.Frame(self.root, bg=self.colors['background'])
+        content_host.pack(side='right', fill='both', expand=True)
+        self.screen_manager.attach(content_host)
     
     def clear_window(self):
         """Vide la fenêtre"""
+        self.screen_manager.reset()
         for widget in self.root.winfo_children():
             widget.destroy()
     
     def on_window_resize(self, event):
         """Gère le redimensionnement de la fenêtre"""
         if event.widget == self.root:
+            # Fond de l'écran de connexion : simple choix d'une variante précalculée
+            if self.login_background is not None and self.login_background.winfo_exists():
+                self.show_asset(self.login_background, ASSET_BACKGROUND, (event.width, event.height))
+            
             new_width = event.width
+            previous = self.cards_per_row
             
             # Ajuster le nombre de cartes par ligne
             if new_width < 800:
@@ -1635,62 +2791,22 @@ class ModernSmartMealPlanner:
             else:
                 self.cards_per_row = 3
             
-            # Rafraîchir si nécessaire
-            if hasattr(self, 'recipes_cards_frame') and self.recipes_cards_frame.winfo_exists():
-                self.refresh_recipes_display()
-    
-    def refresh_recipes_display(self):
-        """Rafraîchit l'affichage des recettes"""
-        search_term = self.recipe_search_var.get().lower() if hasattr(self, 'recipe_search_var') else ""
-        category = self.recipe_category_var.get() if hasattr(self, 'recipe_category_var') else "Toutes"
-        
-        # Construire la requête SQL
-        query = "SELECT * FROM recipes WHERE 1=1"
-        params = []
-        
-        if category != "Toutes":
-            query += " AND category = ?"
-            params.append(category)
-        
-        if search_term:
-            query += " AND (name LIKE ? OR ingredients LIKE ?)"
-            params.append(f"%{search_term}%")
-            params.append(f"%{search_term}%")
-        
-        query += " ORDER BY name"
-        
-        # Exécuter la requête
-        self.cursor.execute(query, params)
-        filtered_recipes = self.cursor.fetchall()
-        
-        # Effacer le frame existant
-        for widget in self.recipes_cards_frame.winfo_children():
-            widget.destroy()
-        
-        # Afficher les recettes filtrées
-        if filtered_recipes:
-            for i, recipe in enumerate(filtered_recipes):
-                row = i // self.cards_per_row
-                col = i % self.cards_per_row
-                
-                card = self.create_recipe_card(self.recipes_cards_frame, recipe)
-                card.grid(row=row, column=col, padx=15, pady=15, sticky='nsew')
-            
-            # Configurer le poids des colonnes
-            for col in range(self.cards_per_row):
-                self.recipes_cards_frame.columnconfigure(col, weight=1, uniform="col")
-        else:
-            empty_label = tk.Label(self.recipes_cards_frame, 
-                                  text="❌ Aucune recette ne correspond à votre recherche",
-                                  font=('Segoe UI', 16), bg=self.colors['background'], 
-                                  fg=self.colors['text_secondary'])
-            empty_label.pack(pady=50)
+            # Rafraîchir seulement si la grille change
+            if self.cards_per_row != previous:
+                if self.screen_manager.is_visible('recipes'):
+                    self.refresh_recipes_display()
+                else:
+                    self.screen_manager.screens['recipes'].invalidate()
 
 def main():
     try:
         root = tk.Tk()
         app = ModernSmartMealPlanner(root)
         root.mainloop()
+        app.close_plan_search()
+        app.usage.close()
+        if app.loop_sampler:
+            app.loop_sampler.report()
     except Exception as e:
         print(f"Erreur: {e}")
         import traceback
@@ -0,0 +1,68 @@
+"""Calendrier des repas : plans affectés à des dates réelles (table meal_plans).
+
+Les dates sont stockées au format ISO (AAAA-MM-JJ) et indexées par
+(user_id, date), ce qui permet de lire une semaine ou un mois par une seule
+requête par intervalle, quelle que soit la taille de l'historique.
+"""
+import calendar
+from datetime import date, timedelta
+
+
+def week_range(day):
+    """Lundi et dimanche de la semaine contenant day"""
+    start = day - timedelta(days=day.weekday())
+    return start, start + timedelta(days=6)
+
+
+def month_grid(year, month):
+    """Semaines (listes de 7 dates) couvrant le mois, du lundi au dimanche"""
+    return calendar.Calendar(firstweekday=0).monthdatescalendar(year, month)
+
+
+def month_range(year, month):
+    """Première et dernière date affichées dans la grille du mois"""
+    weeks = month_grid(year, month)
+    return weeks[0][0], weeks[-1][-1]
+
+
+def get_range(conn, user_id, start, end):
+    """Repas d'un utilisateur entre deux dates incluses, indexés par date"""
+    rows = conn.execute('''
+        SELECT date, breakfast, lunch, dinner, snacks
+        FROM meal_plans
+        WHERE user_id = ? AND date BETWEEN ? AND ?
+        ORDER BY date
+    ''', (user_id, start.isoformat(), end.isoformat())).fetchall()
+    return {
+        date.fromisoformat(day): {'breakfast': breakfast, 'lunch': lunch,
+                                  'dinner': dinner, 'snacks': snacks}
+        for day, breakfast, lunch, dinner, snacks in rows
+    }
+
+
+def assign_days(conn, user_id, start, days, commit=True):
+    """Affecte des journées de repas à partir de la date start
+
+    days est une liste de dictionnaires {catégorie: nom de la recette}. Seules
+    les dates couvertes sont écrites (les autres jours du calendrier sont
+    conservés) ; une date déjà planifiée est remplacée. Avec commit=False,
+    l'écriture reste dans la transaction de l'appelant.
+    """
+    rows = []
+    for offset, meals in enumerate(days):
+        day = (start + timedelta(days=offset)).isoformat()
+        rows.append((user_id, day,
+                     meals.get('Petit-déjeuner'), meals.get('Déjeuner'), meals.get('Dîner')))
+
+    conn.executemany('''
+        INSERT INTO meal_plans (user_id, date, breakfast, lunch, dinner)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, date) DO UPDATE SET
+            breakfast = excluded.breakfast,
+            lunch = excluded.lunch,
+            dinner = excluded.dinner
+    ''', rows)
+    if commit:
+        conn.commit()
+    return len(rows)
+
@@ -0,0 +1,244 @@
+"""Planification multi-objectif : calories, temps de préparation et difficulté.
+
+Les recettes de chaque catégorie sont chargées une fois dans des tableaux
+triés par calories (sans les instructions). Pour une journée, seules les
+recettes proches de la part de calories du repas sont combinées : le dîner
+est cherché par dichotomie autour des calories restantes, et les
+combinaisons qui dépassent le budget de préparation sont écartées avant
+d'être évaluées.
+
+Le résultat est un petit front de Pareto : des plans qui échangent
+précision calorique contre temps de préparation, aucun n'étant meilleur
+qu'un autre sur les deux objectifs à la fois.
+"""
+import random
+from bisect import bisect_left
+
+MEAL_TYPES = ['Petit-déjeuner', 'Déjeuner', 'Dîner']
+
+DIFFICULTY_LEVELS = {'Facile': 1, 'Moyen': 2, 'Difficile': 3}
+
+# Part des calories journalières de chaque repas
+MEAL_SHARES = {'Petit-déjeuner': 0.25, 'Déjeuner': 0.40, 'Dîner': 0.35}
+
+# Recettes examinées autour de la cible pour chaque repas
+WINDOW = 24
+COMPLEMENT_WINDOW = 4
+
+# Voisinage (en multiples de WINDOW) dans lequel chercher les recettes rapides
+BAND_FACTOR = 8
+
+# Pondérations temps de préparation / écart calorique explorées
+TRADE_OFFS = (0.0, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0)
+
+
+class CategoryArrays:
+    """Recettes d'une catégorie, en tableaux parallèles triés par calories"""
+
+    __slots__ = ('ids', 'calories', 'prep_times', 'difficulties')
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda r: (r[1], r[2]))
+        self.ids = [r[0] for r in rows]
+        self.calories = [r[1] for r in rows]
+        self.prep_times = [r[2] for r in rows]
+        self.difficulties = [r[3] for r in rows]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def filtered(self, max_difficulty, max_prep):
+        """Sous-ensemble respectant la difficulté et le temps maximal (reste trié)"""
+        arrays = CategoryArrays.__new__(CategoryArrays)
+        keep = [i for i in range(len(self.ids))
+                if self.difficulties[i] <= max_difficulty and self.prep_times[i] <= max_prep]
+        arrays.ids = [self.ids[i] for i in keep]
+        arrays.calories = [self.calories[i] for i in keep]
+        arrays.prep_times = [self.prep_times[i] for i in keep]
+        arrays.difficulties = [self.difficulties[i] for i in keep]
+        return arrays
+
+    def around(self, calories, count):
+        """Indices des count recettes les plus proches d'une valeur de calories"""
+        n = len(self.ids)
+        pos = bisect_left(self.calories, calories)
+        low, high = pos - 1, pos
+        result = []
+        while len(result) < count and (low >= 0 or high < n):
+            if high >= n or (low >= 0 and calories - self.calories[low] <= self.calories[high] - calories):
+                result.append(low)
+                low -= 1
+            else:
+                result.append(high)
+                high += 1
+        return result
+
+    def candidates(self, calories, count):
+        """Recettes proches en calories, complétées par les plus rapides du voisinage"""
+        band = self.around(calories, count * BAND_FACTOR)
+        nearest = band[:count // 2]
+        fastest = sorted(band, key=self.prep_times.__getitem__)[:count - len(nearest)]
+        return list(dict.fromkeys(nearest + fastest))
+
+
+class CandidatePlan:
+    """Plan candidat : une liste de journées {type de repas: id de recette}"""
+
+    __slots__ = ('days', 'calories', 'prep_time', 'calorie_error', 'difficulty')
+
+    def __init__(self, days, calories, prep_time, calorie_error, difficulty):
+        self.days = days
+        self.calories = calories            # calories moyennes par jour
+        self.prep_time = prep_time          # minutes moyennes par jour
+        self.calorie_error = calorie_error  # écart moyen à la cible par jour
+        self.difficulty = difficulty        # difficulté maximale rencontrée
+
+    def dominates(self, other):
+        return (self.calorie_error <= other.calorie_error and self.prep_time <= other.prep_time
+                and (self.calorie_error < other.calorie_error or self.prep_time < other.prep_time))
+
+    def same_scores(self, other):
+        return (round(self.calorie_error) == round(other.calorie_error)
+                and round(self.prep_time) == round(other.prep_time))
+
+    def label(self):
+        level = next(name for name, rank in DIFFICULTY_LEVELS.items() if rank == self.difficulty)
+        return (f"±{self.calorie_error:.0f} cal/jour | ⏱️ {self.prep_time:.0f} min/jour | "
+                f"🎯 {level}")
+
+
+class MealOptimizer:
+    """Front de Pareto de plans sous contraintes de temps et de difficulté"""
+
+    def __init__(self, rows):
+        by_category = {meal_type: [] for meal_type in MEAL_TYPES}
+        for recipe_id, category, calories, prep_time, difficulty in rows:
+            if category in by_category:
+                by_category[category].append((recipe_id, calories or 0, prep_time or 0,
+                                              DIFFICULTY_LEVELS.get(difficulty, 1)))
+        self.arrays = {meal_type: CategoryArrays(items) for meal_type, items in by_category.items()}
+
+    @classmethod
+    def from_connection(cls, conn):
+        return cls(conn.execute('SELECT id, category, calories, prep_time, difficulty FROM recipes'))
+
+    def day_candidates(self, arrays, target, prep_budget, days=1):
+        """Journées admissibles (écart calorique, temps, difficulté, ids)
+
+        days sert à dimensionner la fenêtre quand la journée n'a qu'un repas :
+        il faut alors au moins une recette distincte par jour.
+        """
+        meal_types = [m for m in MEAL_TYPES if m in arrays]
+        if not meal_types:
+            return []
+
+        # Le dernier repas complète les calories des précédents
+        *free_types, last_type = meal_types
+        last = arrays[last_type]
+        min_prep = {m: min(arrays[m].prep_times) for m in meal_types}
+        share = sum(MEAL_SHARES[m] for m in meal_types)
+
+        partials = [((), 0, 0, 0)]
+        for meal_type in free_types:
+            category = arrays[meal_type]
+            wanted = target * MEAL_SHARES[meal_type] / share
+            rest_min = sum(min_prep[m] for m in meal_types[meal_types.index(meal_type) + 1:])
+            extended = []
+            for ids, calories, prep, difficulty in partials:
+                for i in category.candidates(wanted, WINDOW):
+                    total_prep = prep + category.prep_times[i]
+                    # Élagage : les repas restants ne tiendraient plus dans le budget
+                    if total_prep + rest_min > prep_budget:
+                        continue
+                    extended.append((ids + (category.ids[i],), calories + category.calories[i],
+                                     total_prep, max(difficulty, category.difficulties[i])))
+            partials = extended
+
+        # Un seul repas : toutes les journées viennent de cette fenêtre
+        window = COMPLEMENT_WINDOW if free_types else max(WINDOW, days * 2)
+        candidates = []
+        for ids, calories, prep, difficulty in partials:
+            for i in last.candidates(target - calories, window):
+                total_prep = prep + last.prep_times[i]
+                if total_prep > prep_budget:
+                    continue
+                total = calories + last.calories[i]
+                candidates.append((abs(total - target), total_prep, total,
+                                   max(difficulty, last.difficulties[i]),
+                                   dict(zip(meal_types, ids + (last.ids[i],)))))
+        return candidates
+
+    def pareto_plans(self, days, target, prep_budget=None, max_difficulty='Difficile',
+                     category=None, size=5, seed=None):
+        """Retourne jusqu'à size plans non dominés, du plus précis au plus rapide
+
+        prep_budget est le temps de préparation maximal par jour (None : sans
+        limite) ; category restreint le plan à un seul type de repas.
+        """
+        if days < 1:
+            return []
+        prep_budget = float('inf') if prep_budget is None else prep_budget
+        level = DIFFICULTY_LEVELS[max_difficulty]
+        meal_types = MEAL_TYPES
+        if category in self.arrays:
+            # Un seul repas par jour : viser sa part des calories journalières
+            meal_types = [category]
+            target = target * MEAL_SHARES[category]
+
+        arrays = {}
+        for meal_type in meal_types:
+            filtered = self.arrays[meal_type].filtered(level, prep_budget)
+            if filtered:
+                arrays[meal_type] = filtered
+        if len(arrays) < len(meal_types):
+            return []
+
+        candidates = self.day_candidates(arrays, target, prep_budget, days)
+        if not candidates:
+            return []
+
+        rng = random.Random(seed)
+        # Départage aléatoire pour varier les plans d'une génération à l'autre
+        candidates = [c + (rng.random(),) for c in candidates]
+
+        plans = []
+        for weight in TRADE_OFFS:
+            ranked = sorted(candidates, key=lambda c: (c[0] + weight * c[1], c[5]))
+            plan = self._assemble(ranked, days)
+            if not any(p.same_scores(plan) for p in plans):
+                plans.append(plan)
+
+        front = [p for p in plans if not any(q.dominates(p) for q in plans)]
+        front.sort(key=lambda p: (p.calorie_error, p.prep_time))
+        if len(front) > size:
+            # Garder les extrémités et des points répartis sur le front
+            step = (len(front) - 1) / max(size - 1, 1)
+            front = [front[round(i * step)] for i in range(size)]
+        return front
+
+    @staticmethod
+    def _assemble(ranked, days):
+        """Choisit les meilleures journées en évitant de répéter une recette"""
+        used = set()
+        chosen = []
+        for candidate in ranked:
+            ids = candidate[4].values()
+            if used.isdisjoint(ids):
+                chosen.append(candidate)
+                used.update(ids)
+                if len(chosen) == days:
+                    break
+
+        # Petit catalogue : compléter avec les meilleures journées, même répétées
+        index = 0
+        while len(chosen) < days:
+            chosen.append(ranked[index % len(ranked)])
+            index += 1
+
+        return CandidatePlan(
+            days=[c[4] for c in chosen],
+            calories=sum(c[2] for c in chosen) / days,
+            prep_time=sum(c[1] for c in chosen) / days,
+            calorie_error=sum(c[0] for c in chosen) / days,
+            difficulty=max(c[3] for c in chosen),
+        )
@@ -0,0 +1,164 @@
+"""Modèle en mémoire du plan généré.
+
+Le plan est une liste de journées {type de repas: Recipe}. Les
+totaux sont tenus à jour par différence lorsqu'un repas ou une journée est
+remplacé, et le texte est produit par région (en-tête, une région par
+journée, résumé) pour que l'affichage ne réécrive que la région modifiée.
+"""
+import random
+
+MEAL_TYPES = ['Petit-déjeuner', 'Déjeuner', 'Dîner']
+
+# Recettes tirées au hasard parmi lesquelles choisir un remplacement
+REPLACEMENT_SAMPLE = 20
+
+
+def recipe_calories(recipe):
+    return recipe.calories if recipe else 0
+
+
+class PlanDay:
+    """Une journée du plan et son total de calories"""
+
+    __slots__ = ('meals', 'calories')
+
+    def __init__(self, meals):
+        self.meals = {meal_type: meals.get(meal_type) for meal_type in MEAL_TYPES}
+        self.calories = sum(recipe_calories(r) for r in self.meals.values())
+
+    def set_meal(self, meal_type, recipe):
+        """Remplace un repas ; retourne la variation de calories"""
+        delta = recipe_calories(recipe) - recipe_calories(self.meals[meal_type])
+        self.meals[meal_type] = recipe
+        self.calories += delta
+        return delta
+
+
+class GeneratedPlan:
+    """Plan généré : journées, totaux et texte affiché"""
+
+    def __init__(self, name, target_calories, category, days_recipes):
+        self.name = name
+        self.target_calories = target_calories
+        self.category = category
+        self.days = [PlanDay(meals) for meals in days_recipes]
+        self.total_calories = sum(day.calories for day in self.days)
+
+    def __len__(self):
+        return len(self.days)
+
+    def swap_meal(self, index, meal_type, recipe):
+        """Remplace un repas d'une journée (totaux mis à jour par différence)"""
+        self.total_calories += self.days[index].set_meal(meal_type, recipe)
+
+    def swap_day(self, index, meals):
+        """Remplace une journée entière"""
+        old = self.days[index]
+        self.days[index] = PlanDay(meals)
+        self.total_calories += self.days[index].calories - old.calories
+
+    def meal_types(self):
+        """Types de repas remplis par ce plan (un seul si une catégorie est choisie)"""
+        return MEAL_TYPES if self.category not in MEAL_TYPES else [self.category]
+
+    def recipe_ids(self):
+        """Ids des recettes utilisées, pour éviter les doublons lors d'un remplacement"""
+        return {recipe.id for day in self.days for recipe in day.meals.values() if recipe}
+
+    def days_meals(self):
+        """Journées {type de repas: nom de la recette} (calendrier)"""
+        return [{meal_type: recipe.name for meal_type, recipe in day.meals.items() if recipe}
+                for day in self.days]
+
+    def header_text(self):
+        plan_text = "╔════════════════════════════════════════╗\n"
+        plan_text += "║         📋 SMARTMEAL PLANNER          ║\n"
+        plan_text += f"║            {self.name:^16}           ║\n"
+        plan_text += "╚════════════════════════════════════════╝\n\n"
+
+        plan_text += f"🔮 Jours: {len(self.days)} | 🎯 Calories/jour: {self.target_calories}\n"
+        if self.category != "Toutes":
+            plan_text += f"📂 Catégorie: {self.category}\n"
+        plan_text += "═" * 50 + "\n\n"
+        return plan_text
+
+    def day_text(self, index):
+        day = self.days[index]
+        plan_text = f"\n✨ JOUR {index + 1}\n"
+        plan_text += "─" * 35 + "\n"
+
+        for meal_type, recipe in day.meals.items():
+            plan_text += f"\n🍽️  {meal_type}:\n"
+            if recipe:
+                plan_text += f"   📛 {recipe.name}\n"
+                plan_text += f"   ⏱️  {recipe.prep_time} min | 🔥 {recipe.calories} cal | 🎯 {recipe.difficulty}\n"
+                plan_text += f"   📝 {recipe.ingredients[:80]}...\n"
+            else:
+                plan_text += f"   ❌ Aucune recette disponible\n"
+
+        plan_text += f"\n📊 TOTAL JOUR {index + 1}: {day.calories} calories\n"
+        plan_text += "═" * 50 + "\n"
+        return plan_text
+
+    def summary_text(self):
+        days = len(self.days)
+        plan_text = f"\n📈 RÉSUMÉ DU PLAN\n"
+        plan_text += "─" * 35 + "\n"
+        plan_text += f"📅 Durée: {days} jours\n"
+        plan_text += f"🎯 Calories/jour cible: {self.target_calories}\n"
+        plan_text += f"🔥 Calories totales: {self.total_calories}\n"
+        plan_text += f"📊 Moyenne/jour: {self.total_calories // days}\n"
+        return plan_text
+
+    def text(self):
+        """Texte complet du plan (sauvegarde)"""
+        return (self.header_text()
+                + ''.join(self.day_text(i) for i in range(len(self.days)))
+                + self.summary_text())
+
+
+class RecipePool:
+    """Ids des recettes par catégorie, pour tirer un remplacement sans tout relire"""
+
+    def __init__(self, conn, catalog):
+        self.conn = conn
+        self.catalog = catalog
+        self._ids = None
+
+    def invalidate(self):
+        self._ids = None
+
+    def ids(self, meal_type):
+        if self._ids is None:
+            self._ids = {meal_type: [] for meal_type in MEAL_TYPES}
+            for recipe_id, category in self.conn.execute('SELECT id, category FROM recipes'):
+                if category in self._ids:
+                    self._ids[category].append(recipe_id)
+        return self._ids[meal_type]
+
+    def replacement(self, meal_type, wanted_calories, exclude=()):
+        """Recette tirée au hasard, la plus proche des calories voulues parmi un échantillon
+
+        Les recettes de exclude (déjà dans le plan) ne sont reprises que si
+        l'échantillon ne contient rien d'autre.
+        """
+        ids = self.ids(meal_type)
+        sample = random.sample(ids, min(REPLACEMENT_SAMPLE, len(ids)))
+        sample = [i for i in sample if i not in exclude] or sample
+        recipes = [r for r in map(self.catalog.get, sample) if r is not None]
+        if not recipes:
+            return None
+        return min(recipes, key=lambda r: abs(recipe_calories(r) - wanted_calories))
+
+    def replacement_day(self, meal_types, target_calories, exclude=()):
+        """Nouvelle journée visant target_calories, repas après repas"""
+        meals = {}
+        remaining = target_calories
+        exclude = set(exclude)
+        for position, meal_type in enumerate(meal_types):
+            recipe = self.replacement(meal_type, remaining / (len(meal_types) - position), exclude)
+            meals[meal_type] = recipe
+            if recipe:
+                remaining -= recipe_calories(recipe)
+                exclude.add(recipe.id)
+        return meals
@@ -0,0 +1,269 @@
+"""Génération de plans en ligne de commande, sans interface graphique.
+
+    python -m meal_planner generate --days 30 --calories 2000 --users users.csv --out plans/
+    python -m meal_planner nightly --calories 2000
+    python -m meal_planner jobs
+
+users.csv contient une ligne par client avec au moins une colonne id, email
+ou name ; les colonnes facultatives calories et days remplacent les valeurs
+de la ligne de commande pour ce client. Un fichier est écrit par client dans
+--out, au fil de l'eau, par un pool de processus (un par cœur) : chaque
+processus charge une fois les recettes (sans instructions) et leurs tables
+de tirage par popularité, et génère les plans comme l'écran « Générer repas ».
+
+nightly met en file (job_queue) une tâche par ligne de users pour la semaine
+qui commence lundi prochain, puis la fait traiter par un pool de workers :
+chaque plan est sauvegardé dans saved_plans et affecté au calendrier, dans
+la même transaction que l'acquittement de sa tâche. Relancer la commande
+après une interruption reprend là où elle s'était arrêtée, sans refaire ni
+dupliquer les plans déjà produits.
+
+Ce module n'importe ni tkinter ni PIL.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+import re
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+import job_queue
+import meal_calendar
+from database import create_schema
+from meal_plan_model import MEAL_TYPES, GeneratedPlan
+from plan_share import save_plan
+from popularity import PopularitySampler, record_selection
+
+ALL_CATEGORIES = "Toutes"
+
+# Clients envoyés à un processus à la fois
+CHUNK_SIZE = 64
+
+# Tâche de la file : plan de la semaine d'un utilisateur
+WEEKLY_PLAN = 'weekly_plan'
+
+# Recettes de chaque processus et leurs tables de tirage (chargées par _init_worker)
+_sampler = None
+_category = ALL_CATEGORIES
+_meal_types = MEAL_TYPES
+
+
+def _init_worker(db_path, category):
+    global _sampler, _category, _meal_types
+    # Connexion gardée ouverte : les tables sont refaites si la date change
+    _sampler = PopularitySampler(sqlite3.connect(db_path))
+    _sampler.load()
+    _category = category
+    _meal_types = MEAL_TYPES if category == ALL_CATEGORIES else [category]
+
+
+def client_key(row, line):
+    """Identifiant du client, utilisable comme nom de fichier"""
+    key = row.get('id') or row.get('email') or row.get('name') or f"client_{line}"
+    return re.sub(r'[^\w@.-]+', '_', key.strip())
+
+
+def read_clients(path, days, calories):
+    """Lit users.csv au fil de l'eau : (ligne, clé, nom, jours, calories)"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for line, row in enumerate(csv.DictReader(f), start=1):
+            row = {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}
+            try:
+                client_days = int(row.get('days') or days)
+                client_calories = int(row.get('calories') or calories)
+            except ValueError:
+                raise ValueError(f"{path}, ligne {line + 1} : days et calories doivent être des entiers")
+            if client_days < 1 or client_calories <= 0:
+                raise ValueError(f"{path}, ligne {line + 1} : days et calories doivent être positifs")
+            yield line, client_key(row, line), row.get('name') or row.get('email') or '', client_days, client_calories
+
+
+def plan_json(key, plan):
+    return json.dumps({
+        'client': key,
+        'name': plan.name,
+        'target_calories': plan.target_calories,
+        'category': plan.category,
+        'total_calories': plan.total_calories,
+        'days': [{meal_type: {'id': recipe.id, 'name': recipe.name, 'calories': recipe.calories,
+                              'prep_time': recipe.prep_time, 'difficulty': recipe.difficulty}
+                  if recipe else None
+                  for meal_type, recipe in day.meals.items()}
+                 for day in plan.days],
+    }, ensure_ascii=False, indent=2)
+
+
+def _generate(task):
+    """Génère et écrit le plan d'un client ; retourne (chemin, calories totales)"""
+    line, key, name, days, calories, out_dir, fmt, seed = task
+    rng = random.Random(None if seed is None else seed * 1_000_003 + line)
+    plan = GeneratedPlan(name or key, calories, _category, _sampler.random_days(days, _meal_types, rng))
+
+    path = os.path.join(out_dir, f"{key}.{fmt}")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(plan_json(key, plan) if fmt == 'json' else plan.text())
+    return path, plan.total_calories
+
+
+def generate(args):
+    os.makedirs(args.out, exist_ok=True)
+    tasks = ((line, key, name, days, calories, args.out, args.format, args.seed)
+             for line, key, name, days, calories in read_clients(args.users, args.days, args.calories))
+
+    # spawn : même comportement sous Windows et Linux, sans hériter de l'état du parent
+    context = multiprocessing.get_context('spawn')
+    start = time.perf_counter()
+    count = 0
+    with context.Pool(args.workers, initializer=_init_worker, initargs=(args.db, args.category)) as pool:
+        for path, _ in pool.imap_unordered(_generate, tasks, chunksize=CHUNK_SIZE):
+            count += 1
+            if not args.quiet and count % 1000 == 0:
+                print(f"{count} plans...", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    rate = count / elapsed * 60 if elapsed else 0
+    print(f"{count} plans écrits dans {args.out} en {elapsed:.1f} s ({rate:.0f} clients/min)")
+
+
+def next_monday(today):
+    return today + timedelta(days=7 - today.weekday())
+
+
+def prepare_weekly_plan(job):
+    """Génère la semaine d'un utilisateur (hors transaction) ; retourne (utilisateur, lundi, plan)"""
+    payload = json.loads(job.payload)
+    start = date.fromisoformat(payload['start'])
+    # Tirage déterminé par la tâche : une reprise produit le même plan
+    rng = random.Random(job.key)
+    plan = GeneratedPlan(f"Semaine du {start.strftime('%d/%m/%Y')}", payload['calories'],
+                         _category, _sampler.random_days(7, _meal_types, rng))
+    return payload['user_id'], start, plan
+
+
+def weekly_plan_job(conn, job):
+    """Sauvegarde la semaine préparée et l'affecte au calendrier"""
+    user_id, start, plan = job.result
+    save_plan(conn, user_id, plan)
+    meal_calendar.assign_days(conn, user_id, start, plan.days_meals(), commit=False)
+    record_selection(conn, plan.recipe_ids(), commit=False)
+
+
+def _work_weekly(db_path, batch_size, lease_seconds):
+    _init_worker(db_path, ALL_CATEGORIES)
+    return job_queue.work(db_path, WEEKLY_PLAN, weekly_plan_job, batch_size=batch_size,
+                          prepare=prepare_weekly_plan, lease_seconds=lease_seconds)
+
+
+def schedule_weekly(db_path, start, calories):
+    """Met en file une tâche par utilisateur ; retourne (nouvelles tâches, utilisateurs)"""
+    conn = job_queue.connect(db_path)
+    try:
+        user_ids = [user_id for (user_id,) in conn.execute('SELECT id FROM users ORDER BY id')]
+        jobs = ((f"{user_id}:{start.isoformat()}",
+                 json.dumps({'user_id': user_id, 'start': start.isoformat(), 'calories': calories}))
+                for user_id in user_ids)
+        return job_queue.JobQueue(conn).enqueue_many(WEEKLY_PLAN, jobs), len(user_ids)
+    finally:
+        conn.close()
+
+
+def report_jobs(db_path):
+    conn = job_queue.connect(db_path)
+    try:
+        return job_queue.JobQueue(conn).stats(WEEKLY_PLAN)
+    finally:
+        conn.close()
+
+
+def format_stats(stats):
+    return (f"en file {stats[job_queue.QUEUED]}, en cours {stats[job_queue.LEASED]}, "
+            f"terminées {stats[job_queue.DONE]}, en échec {stats[job_queue.FAILED]}")
+
+
+def nightly(args):
+    conn = sqlite3.connect(args.db)
+    try:
+        create_schema(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+    start = date.fromisoformat(args.start) if args.start else next_monday(date.today())
+    added, users = schedule_weekly(args.db, start, args.calories)
+    print(f"Semaine du {start.isoformat()} : {added} nouvelles tâches ({users} utilisateurs)")
+
+    context = multiprocessing.get_context('spawn')
+    began = time.perf_counter()
+    first = report_jobs(args.db)[job_queue.DONE]
+    with context.Pool(args.workers) as pool:
+        results = [pool.apply_async(_work_weekly, (args.db, args.batch, args.lease))
+                   for _ in range(args.workers)]
+        while not all(r.ready() for r in results):
+            time.sleep(args.report)
+            stats = report_jobs(args.db)
+            elapsed = time.perf_counter() - began
+            print(f"[{elapsed:6.0f} s] {format_stats(stats)} "
+                  f"— {(stats[job_queue.DONE] - first) / elapsed:.0f} tâches/s", file=sys.stderr)
+        done = sum(r.get() for r in results)
+
+    elapsed = time.perf_counter() - began
+    print(f"{done} plans générés en {elapsed:.1f} s ({done / elapsed if elapsed else 0:.0f} tâches/s) "
+          f"— {format_stats(report_jobs(args.db))}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m meal_planner',
+                                     description="SmartMeal-Planner en ligne de commande")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    gen = commands.add_parser('generate', help="Génère un plan par client de users.csv")
+    gen.add_argument('--users', required=True, help="CSV des clients (id/email/name, calories, days)")
+    gen.add_argument('--out', required=True, help="Dossier de sortie (un fichier par client)")
+    gen.add_argument('--days', type=int, default=7)
+    gen.add_argument('--calories', type=int, default=2000)
+    gen.add_argument('--category', default=ALL_CATEGORIES,
+                     choices=[ALL_CATEGORIES, 'Petit-déjeuner', 'Déjeuner', 'Dîner'])
+    gen.add_argument('--format', choices=['txt', 'json'], default='txt')
+    gen.add_argument('--db', default='meal_planner.db')
+    gen.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    gen.add_argument('--seed', type=int, help="Graine pour des plans reproductibles")
+    gen.add_argument('--quiet', action='store_true')
+
+    night = commands.add_parser('nightly', help="Régénère le plan de la semaine de chaque utilisateur")
+    night.add_argument('--start', help="Premier jour de la semaine (AAAA-MM-JJ, défaut : lundi prochain)")
+    night.add_argument('--calories', type=int, default=2000)
+    night.add_argument('--db', default='meal_planner.db')
+    night.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    night.add_argument('--batch', type=int, default=50, help="Tâches prises par bail")
+    night.add_argument('--lease', type=int, default=120, help="Durée d'un bail (secondes)")
+    night.add_argument('--report', type=float, default=2.0, help="Intervalle du rapport (secondes)")
+
+    jobs = commands.add_parser('jobs', help="État de la file de tâches")
+    jobs.add_argument('--db', default='meal_planner.db')
+    args = parser.parse_args(argv)
+
+    if getattr(args, 'days', 1) < 1 or getattr(args, 'calories', 1) <= 0:
+        parser.error("--days et --calories doivent être positifs")
+    if not os.path.exists(args.db):
+        parser.error(f"base introuvable : {args.db}")
+
+    try:
+        if args.command == 'generate':
+            generate(args)
+        elif args.command == 'nightly':
+            nightly(args)
+        else:
+            print(format_stats(report_jobs(args.db)))
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Erreur: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""Calories des recettes calculées à partir de leurs ingrédients.
+
+recipes.calories était saisi à la main et contredisait souvent la liste des
+ingrédients. La valeur est maintenant dérivée d'une table de référence
+locale (nutrition.csv, livrée avec l'application) :
+
+    ingredient,kcal_100g,portion_g,unit_g
+
+La quantité d'un ingrédient vient de la recette (« 100g quinoa »,
+« 1 c.à.s huile olive », « 2 œufs » : unit_g grammes par pièce) ou, à
+défaut, de la portion habituelle portion_g. Une recette dont un ingrédient
+est absent de la table garde sa valeur saisie.
+
+Le calcul est mémorisé par ingrédient normalisé : un catalogue de 100 000
+recettes n'utilise que quelques centaines d'ingrédients distincts, si bien
+que le recalcul complet se réduit à des lectures de dictionnaire, suivies
+d'une seule transaction pour les recettes dont la valeur change.
+
+    python nutrition.py --db meal_planner.db            # recalcule tout le catalogue
+    python nutrition.py --db meal_planner.db --dry-run  # écarts et ingrédients inconnus
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import time
+from collections import Counter
+
+from recipe_model import ingredient_key, parse_ingredient
+
+NUTRITION_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nutrition.csv')
+
+# Grammes par unité de quantité (densité 1 pour les liquides)
+UNIT_GRAMS = {'g': 1, 'kg': 1000, 'ml': 1, 'cl': 10, 'l': 1000, 'c.à.s': 15, 'c.à.c': 5}
+
+# Recettes lues (et mises à jour) par lot
+BATCH_SIZE = 5000
+
+
+def food_key(name):
+    """Clé de recherche d'un aliment : « Huile d'olive » et « Huile dolive » coïncident"""
+    return ingredient_key(name.replace("'", '').replace('’', ''))
+
+
+class NutritionTable:
+    """Table de référence {aliment: (kcal pour 100 g, portion en g, g par pièce)}"""
+
+    def __init__(self, foods):
+        self.foods = foods
+        self._parts = {}
+
+    @classmethod
+    def load(cls, path=NUTRITION_CSV):
+        foods = {}
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                portion = float(row['portion_g'])
+                unit = float(row['unit_g']) if row.get('unit_g') else portion
+                foods[food_key(row['ingredient'])] = (float(row['kcal_100g']), portion, unit)
+        return cls(foods)
+
+    def ingredient_calories(self, part):
+        """Calories d'un ingrédient tel qu'écrit dans la recette (None si inconnu)"""
+        key = ' '.join(part.lower().split())
+        try:
+            return self._parts[key]
+        except KeyError:
+            pass
+        amount, unit, name = parse_ingredient(key)
+        food = self.foods.get(food_key(name)) if name else None
+        calories = None
+        if food is not None:
+            kcal, portion, unit_grams = food
+            if amount is None:
+                grams = portion
+            elif unit is None:
+                grams = amount * unit_grams
+            else:
+                grams = amount * UNIT_GRAMS[unit]
+            calories = kcal * grams / 100
+        self._parts[key] = calories
+        return calories
+
+    def recipe_calories(self, ingredients):
+        """(calories, ingrédients inconnus) d'une liste d'ingrédients ; calories vaut None
+        si un ingrédient est inconnu"""
+        total = 0.0
+        unknown = []
+        for part in ingredients.split(','):
+            if not part.strip():
+                continue
+            calories = self.ingredient_calories(part)
+            if calories is None:
+                unknown.append(part.strip())
+            else:
+                total += calories
+        if unknown:
+            return None, unknown
+        return round(total), unknown
+
+
+_default_table = None
+
+
+def default_table():
+    """Table livrée (nutrition.csv), chargée une seule fois"""
+    global _default_table
+    if _default_table is None:
+        _default_table = NutritionTable.load()
+    return _default_table
+
+
+def _recipe_rows(conn, recipe_ids, first_id):
+    """Lignes (id, ingrédients, calories) à recalculer, lues par lots"""
+    if recipe_ids is not None:
+        recipe_ids = list(recipe_ids)
+        for start in range(0, len(recipe_ids), BATCH_SIZE // 10):
+            chunk = recipe_ids[start:start + BATCH_SIZE // 10]
+            placeholders = ', '.join('?' * len(chunk))
+            yield conn.execute(f'SELECT id, ingredients, calories FROM recipes WHERE id IN ({placeholders})',
+                               chunk).fetchall()
+        return
+    cursor = conn.execute('SELECT id, ingredients, calories FROM recipes WHERE id >= ?', (first_id or 0,))
+    while True:
+        rows = cursor.fetchmany(BATCH_SIZE)
+        if not rows:
+            return
+        yield rows
+
+
+def recompute_calories(conn, recipe_ids=None, first_id=None, table=None, dry_run=False, commit=True):
+    """Recalcule recipes.calories : tout le catalogue, les recettes recipe_ids,
+    ou celles d'id >= first_id (fin d'un import)
+
+    Seules les recettes dont la valeur change sont écrites. Retourne
+    (recettes modifiées, Counter des ingrédients inconnus).
+    """
+    table = table or default_table()
+    changes = []
+    unknown = Counter()
+    for rows in _recipe_rows(conn, recipe_ids, first_id):
+        for recipe_id, ingredients, calories in rows:
+            computed, missing = table.recipe_calories(ingredients or '')
+            if missing:
+                unknown.update(missing)
+            elif computed != calories:
+                changes.append((computed, recipe_id))
+
+    if changes and not dry_run:
+        conn.executemany('UPDATE recipes SET calories = ? WHERE id = ?', changes)
+        if commit:
+            conn.commit()
+    return len(changes), unknown
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcule les calories des recettes depuis nutrition.csv")
+    parser.add_argument('--db', default='meal_planner.db')
+    parser.add_argument('--table', default=NUTRITION_CSV, help="table de référence (CSV)")
+    parser.add_argument('--dry-run', action='store_true', help="n'écrit rien, affiche les écarts")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    count = conn.execute('SELECT COUNT(*) FROM recipes').fetchone()[0]
+    start = time.perf_counter()
+    changed, unknown = recompute_calories(conn, table=NutritionTable.load(args.table), dry_run=args.dry_run)
+    elapsed = time.perf_counter() - start
+    conn.close()
+
+    verb = "à modifier" if args.dry_run else "modifiées"
+    print(f"{count} recettes en {elapsed:.2f} s : {changed} {verb}")
+    if unknown:
+        print(f"{sum(unknown.values())} ingrédients absents de la table (recettes inchangées) :")
+        for part, uses in unknown.most_common(20):
+            print(f"  {uses:6}  {part}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Lecture par pages des plans volumineux (base ou fichier exporté).
+
+Le visualiseur ne charge jamais tout le texte : il lit une fenêtre d'octets
+(UTF-8) alignée sur les fins de ligne. Le texte d'un plan sauvegardé est lu
+par morceaux dans la base (lecture incrémentale du blob) ; un fichier est
+projeté en mémoire (mmap). Sans Connection.blobopen (Python < 3.11), la
+taille et chaque page passent par length() et substr(), qui relisent toute
+la valeur : l'affichage reste paginé, mais pas la lecture.
+
+L'index des journées (position de chaque « ✨ JOUR n ») est construit par
+un balayage en morceaux, dans un thread, pour que l'ouverture reste
+immédiate quelle que soit la taille du plan.
+"""
+import abc
+import mmap
+import sqlite3
+import threading
+
+# Taille d'une page (octets) et des morceaux lus pour construire l'index
+PAGE_SIZE = 64 * 1024
+SCAN_CHUNK = 1024 * 1024
+
+DAY_MARKER = "✨ JOUR ".encode('utf-8')
+
+
+class PagedSource(abc.ABC):
+    """Texte lu par fenêtres d'octets ; les sous-classes fournissent size et read_bytes"""
+
+    size = 0
+
+    def __init__(self):
+        self.day_offsets = None
+
+    @abc.abstractmethod
+    def read_bytes(self, start, length):
+        """Au plus length octets à partir de start"""
+
+    def close(self):
+        pass
+
+    def page(self, start, page_size=PAGE_SIZE):
+        """Texte des lignes complètes à partir de start ; retourne (texte, fin)
+
+        start doit être un début de ligne (0, une fin de page ou un index de jour).
+        """
+        start = max(0, min(start, self.size))
+        data = self.read_bytes(start, page_size)
+        end = start + len(data)
+        if end < self.size:
+            cut = data.rfind(b'\n')
+            if cut >= 0:
+                data = data[:cut + 1]
+                end = start + len(data)
+        return data.decode('utf-8', errors='replace'), end
+
+    def previous_page_start(self, start, page_size=PAGE_SIZE):
+        """Début (de ligne) de la page qui précède start"""
+        if start <= 0:
+            return 0
+        begin = max(0, start - page_size)
+        data = self.read_bytes(begin, start - begin)
+        if begin == 0:
+            return 0
+        cut = data.find(b'\n')
+        return begin + cut + 1 if 0 <= cut < len(data) - 1 else begin
+
+    def build_day_index(self):
+        """Positions (octets) du début de chaque journée, par balayage en morceaux"""
+        offsets = []
+        overlap = len(DAY_MARKER) - 1
+        position = 0
+        while position < self.size:
+            chunk = self.read_bytes(position, SCAN_CHUNK + overlap)
+            found = chunk.find(DAY_MARKER)
+            while 0 <= found < SCAN_CHUNK:
+                offsets.append(position + found)
+                found = chunk.find(DAY_MARKER, found + 1)
+            position += SCAN_CHUNK
+        return offsets
+
+    def index_in_background(self, on_done=None):
+        """Construit l'index des journées dans un thread (on_done appelé depuis ce thread)"""
+        def run():
+            try:
+                self.day_offsets = self.build_day_index()
+            except (OSError, ValueError, sqlite3.Error):
+                self.day_offsets = []
+            if on_done is not None:
+                on_done()
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+class PlanBlobSource(PagedSource):
+    """Texte d'un plan sauvegardé, lu par morceaux dans saved_plans"""
+
+    def __init__(self, db_path, plan_id):
+        super().__init__()
+        # Connexion propre au visualiseur (utilisée aussi par le thread d'index)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.plan_id = plan_id
+        self._lock = threading.Lock()
+        size = self._size()
+        if size is None:
+            self.conn.close()
+            raise ValueError("plan introuvable")
+        self.size = size
+
+    def _size(self):
+        if hasattr(self.conn, 'blobopen'):
+            # Taille lue dans l'en-tête de la valeur, sans la charger
+            try:
+                with self.conn.blobopen('saved_plans', 'plan_text', self.plan_id, readonly=True) as blob:
+                    return len(blob)
+            except sqlite3.OperationalError:
+                return None
+        row = self.conn.execute('SELECT length(CAST(plan_text AS BLOB)) FROM saved_plans WHERE id = ?',
+                                (self.plan_id,)).fetchone()
+        return None if row is None else row[0] or 0
+
+    def read_bytes(self, start, length):
+        with self._lock:
+            if hasattr(self.conn, 'blobopen'):
+                with self.conn.blobopen('saved_plans', 'plan_text', self.plan_id, readonly=True) as blob:
+                    blob.seek(start)
+                    return blob.read(length)
+            row = self.conn.execute('SELECT substr(CAST(plan_text AS BLOB), ?, ?) FROM saved_plans WHERE id = ?',
+                                    (start + 1, length, self.plan_id)).fetchone()
+            return bytes(row[0]) if row and row[0] is not None else b''
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class FileSource(PagedSource):
+    """Fichier texte projeté en mémoire"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._file = open(path, 'rb')
+        self.size = self._file.seek(0, 2)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def read_bytes(self, start, length):
+        if self._map is None:
+            return b''
+        return self._map[start:start + length]
+
+    def build_day_index(self):
+        # Recherche directe dans la projection, sans copier de morceaux
+        offsets = []
+        if self._map is not None:
+            found = self._map.find(DAY_MARKER)
+            while found >= 0:
+                offsets.append(found)
+                found = self._map.find(DAY_MARKER, found + 1)
+        return offsets
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
@@ -0,0 +1,226 @@
+"""Génération « meilleur de N » : recuit simulé en parallèle sur plusieurs cœurs.
+
+Le catalogue (ids, calories, temps, difficulté, par catégorie) est copié une
+seule fois dans un bloc de mémoire partagée sous forme d'entiers 32 bits.
+Chaque processus du pool s'y attache au démarrage : les tâches ne
+transportent qu'une graine et les paramètres du plan, et ne renvoient que
+le meilleur plan de leur lot.
+
+Usage (mesure du passage à l'échelle) :
+
+    python plan_search.py --db scale_test.db --candidates 64 --workers 1 2 4
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import sqlite3
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from meal_optimizer import DIFFICULTY_LEVELS, MEAL_SHARES, MEAL_TYPES
+
+# Itérations de recuit par plan candidat
+ITERATIONS = 3000
+
+# Poids d'une minute de préparation par rapport à une calorie d'écart
+PREP_WEIGHT = 0.5
+
+# Pénalités : dépassement du budget de préparation (par minute), recette répétée
+OVER_BUDGET_PENALTY = 50
+REPEAT_PENALTY = 400
+
+# Catalogue du processus courant : (mémoire partagée, vue, disposition)
+_worker_catalog = None
+_allowed_cache = {}
+
+
+def _init_worker(name, layout):
+    """Initialisation d'un processus du pool : attache la mémoire partagée"""
+    global _worker_catalog
+    shm = shared_memory.SharedMemory(name=name)
+    _worker_catalog = (shm, shm.buf.cast('i'), layout)
+    _allowed_cache.clear()
+
+
+def _columns(view, offset, count):
+    """Colonnes (ids, calories, temps, difficulté) d'une catégorie"""
+    return [view[offset + k * count:offset + (k + 1) * count] for k in range(4)]
+
+
+def _allowed(view, layout, meal_type, level):
+    """Indices des recettes d'une catégorie respectant la difficulté maximale"""
+    key = (meal_type, level)
+    if key not in _allowed_cache:
+        offset, count = layout[meal_type]
+        difficulties = _columns(view, offset, count)[3]
+        _allowed_cache[key] = [i for i in range(count) if difficulties[i] <= level]
+    return _allowed_cache[key]
+
+
+def _day_cost(calories, prep, target, prep_budget):
+    cost = abs(calories - target) + PREP_WEIGHT * prep
+    if prep > prep_budget:
+        cost += OVER_BUDGET_PENALTY * (prep - prep_budget)
+    return cost
+
+
+def _anneal_batch(seeds, days, target, prep_budget, level, meal_types, iterations):
+    """Recuit simulé pour chaque graine ; retourne (coût, plan) du meilleur"""
+    _, view, layout = _worker_catalog
+    columns = {m: _columns(view, *layout[m]) for m in meal_types}
+    allowed = {m: _allowed(view, layout, m, level) for m in meal_types}
+    if any(not allowed[m] for m in meal_types):
+        return None
+
+    best = None
+    for seed in seeds:
+        rng = random.Random(seed)
+        plan = [{m: rng.choice(allowed[m]) for m in meal_types} for _ in range(days)]
+        day_totals = []
+        for day in plan:
+            day_totals.append([sum(columns[m][1][i] for m, i in day.items()),
+                               sum(columns[m][2][i] for m, i in day.items())])
+        uses = {}
+        for day in plan:
+            for m, i in day.items():
+                uses[(m, i)] = uses.get((m, i), 0) + 1
+
+        cost = (sum(_day_cost(c, p, target, prep_budget) for c, p in day_totals)
+                + REPEAT_PENALTY * sum(n - 1 for n in uses.values()))
+        best_cost, best_plan = cost, [dict(day) for day in plan]
+        temperature = target * 0.05
+
+        for step in range(iterations):
+            d = rng.randrange(days)
+            m = rng.choice(meal_types)
+            old = plan[d][m]
+            new = rng.choice(allowed[m])
+            if new == old:
+                continue
+            _, calories, prep_times, _ = columns[m]
+            old_calories, old_prep = day_totals[d]
+            new_calories = old_calories - calories[old] + calories[new]
+            new_prep = old_prep - prep_times[old] + prep_times[new]
+
+            delta = (_day_cost(new_calories, new_prep, target, prep_budget)
+                     - _day_cost(old_calories, old_prep, target, prep_budget))
+            delta += REPEAT_PENALTY * ((uses.get((m, new), 0) > 0) - (uses[(m, old)] > 1))
+
+            if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                plan[d][m] = new
+                day_totals[d] = [new_calories, new_prep]
+                uses[(m, old)] -= 1
+                uses[(m, new)] = uses.get((m, new), 0) + 1
+                cost += delta
+                if cost < best_cost:
+                    best_cost, best_plan = cost, [dict(day) for day in plan]
+            temperature *= 0.998
+
+        if best is None or best_cost < best[0]:
+            best = (best_cost, best_plan)
+
+    cost, plan = best
+    ids = {m: columns[m][0] for m in meal_types}
+    return cost, [{m: ids[m][i] for m, i in day.items()} for day in plan]
+
+
+class PlanSearch:
+    """Pool de processus partageant le catalogue en mémoire partagée"""
+
+    def __init__(self, rows, workers=None):
+        by_category = {meal_type: [] for meal_type in MEAL_TYPES}
+        for recipe_id, category, calories, prep_time, difficulty in rows:
+            if category in by_category:
+                by_category[category].append((recipe_id, calories or 0, prep_time or 0,
+                                              DIFFICULTY_LEVELS.get(difficulty, 1)))
+
+        data = array('i')
+        self.layout = {}
+        for meal_type, items in by_category.items():
+            self.layout[meal_type] = (len(data), len(items))
+            for k in range(4):
+                data.extend(item[k] for item in items)
+
+        self.workers = workers or os.cpu_count() or 1
+        self.shm = shared_memory.SharedMemory(create=True, size=max(len(data) * data.itemsize, 1))
+        self.shm.buf[:len(data) * data.itemsize] = data.tobytes()
+        # spawn : les processus ne copient pas l'interpréteur Tk du parent (fork non sûr avec des threads)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(self.shm.name, self.layout),
+                                            mp_context=multiprocessing.get_context('spawn'))
+
+    @classmethod
+    def from_connection(cls, conn, workers=None):
+        return cls(conn.execute('SELECT id, category, calories, prep_time, difficulty FROM recipes'),
+                   workers=workers)
+
+    def submit(self, days, target, candidates=64, prep_budget=None, max_difficulty='Difficile',
+               category=None, iterations=ITERATIONS, seed=None):
+        """Répartit les candidats entre les processus ; retourne la liste des futures"""
+        if days < 1 or target <= 0:
+            raise ValueError("days et target doivent être positifs")
+        meal_types = tuple(MEAL_TYPES)
+        if category in self.layout:
+            meal_types = (category,)
+            target = target * MEAL_SHARES[category]
+        prep_budget = float('inf') if prep_budget is None else prep_budget
+        level = DIFFICULTY_LEVELS[max_difficulty]
+
+        rng = random.Random(seed)
+        seeds = [rng.getrandbits(32) for _ in range(candidates)]
+        # Un lot par processus : un seul aller-retour par cœur
+        batches = [seeds[i::self.workers] for i in range(self.workers) if seeds[i::self.workers]]
+        return [self.executor.submit(_anneal_batch, batch, days, target, prep_budget,
+                                     level, meal_types, iterations)
+                for batch in batches]
+
+    @staticmethod
+    def best(futures):
+        """Meilleur (coût, plan) parmi des futures terminées, None si aucun plan possible"""
+        results = [r for r in (f.result() for f in futures) if r is not None]
+        return min(results, key=lambda r: r[0]) if results else None
+
+    def search(self, days, target, **options):
+        """Recherche bloquante : retourne le meilleur (coût, plan)"""
+        return self.best(self.submit(days, target, **options))
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.shm.close()
+        self.shm.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure la génération « meilleur de N » en parallèle")
+    parser.add_argument('--db', default='meal_planner.db')
+    parser.add_argument('--candidates', type=int, default=64)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--calories', type=int, default=2000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    rows = conn.execute('SELECT id, category, calories, prep_time, difficulty FROM recipes').fetchall()
+    conn.close()
+
+    reference = None
+    for workers in args.workers:
+        search = PlanSearch(rows, workers=workers)
+        try:
+            # Démarrage des processus hors mesure
+            search.search(args.days, args.calories, candidates=workers, iterations=1)
+            start = time.perf_counter()
+            cost, _ = search.search(args.days, args.calories, candidates=args.candidates, seed=1)
+            elapsed = time.perf_counter() - start
+        finally:
+            search.close()
+        reference = reference or elapsed
+        print(f"{workers:>3} processus : {elapsed:6.2f} s  (x{reference / elapsed:.2f})  coût {cost:.0f}")
+
+
+if __name__ == "__main__":
+    main()
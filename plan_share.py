@@ -0,0 +1,220 @@
+"""Format de partage compact des plans (codes « SMP1.… »).
+
+Un plan partagé ne contient que ses paramètres et les ids de ses recettes,
+pas le texte affiché (environ 6 Ko) : une semaine tient en une centaine de
+caractères, à copier-coller.
+
+Version 1, octets encodés en base64 url (sans « = ») après le préfixe SMP1. :
+
+    varint  calories cibles
+    octet   catégorie (0 = Toutes, sinon rang dans MEAL_TYPES + 1)
+    varint  nombre de jours
+    octet   types de repas présents (bit i = MEAL_TYPES[i])
+    varint  longueur du nom, puis le nom en UTF-8
+    varint  par jour et par type de repas présent : id de la recette + 1 (0 = aucune)
+    2 oct.  somme de contrôle (CRC32 tronqué) des octets précédents
+
+À l'import, les recettes sont relues dans le catalogue : un code dont une
+recette n'existe plus (ou n'est pas de la bonne catégorie) est refusé.
+
+    python plan_share.py --plans 10000   # débit d'encodage et de décodage
+"""
+import argparse
+import base64
+import random
+import time
+import zlib
+
+from meal_plan_model import MEAL_TYPES, GeneratedPlan
+from recipe_dedup import canonical_ids
+from recipe_model import load_by_ids
+
+PREFIX = 'SMP'
+VERSION = 1
+
+ALL_CATEGORIES = "Toutes"
+CATEGORIES = [ALL_CATEGORIES] + MEAL_TYPES
+
+# Bornes acceptées à l'import
+MAX_DAYS = 366
+MAX_NAME = 200
+
+
+class SharedPlan:
+    """Plan décodé : paramètres et ids des recettes par journée"""
+
+    __slots__ = ('name', 'target_calories', 'category', 'days')
+
+    def __init__(self, name, target_calories, category, days):
+        self.name = name
+        self.target_calories = target_calories
+        self.category = category
+        self.days = days
+
+    @classmethod
+    def from_plan(cls, plan):
+        return cls(plan.name, plan.target_calories, plan.category,
+                   [{meal_type: recipe.id if recipe else None
+                     for meal_type, recipe in day.meals.items()}
+                    for day in plan.days])
+
+
+def _put_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data, pos):
+    value = shift = 0
+    while True:
+        if pos >= len(data) or shift > 35:
+            raise ValueError("code de partage tronqué")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode(plan):
+    """Code de partage d'un GeneratedPlan ou d'un SharedPlan"""
+    if not isinstance(plan, SharedPlan):
+        plan = SharedPlan.from_plan(plan)
+
+    meal_types = [m for m in MEAL_TYPES if any(day.get(m) for day in plan.days)]
+    out = bytearray()
+    _put_varint(out, plan.target_calories)
+    out.append(CATEGORIES.index(plan.category))
+    _put_varint(out, len(plan.days))
+    out.append(sum(1 << MEAL_TYPES.index(m) for m in meal_types))
+    name = plan.name.encode('utf-8')[:MAX_NAME]
+    _put_varint(out, len(name))
+    out += name
+    for day in plan.days:
+        for meal_type in meal_types:
+            recipe_id = day.get(meal_type)
+            _put_varint(out, recipe_id + 1 if recipe_id else 0)
+    out += (zlib.crc32(out) & 0xFFFF).to_bytes(2, 'big')
+    return f"{PREFIX}{VERSION}." + base64.urlsafe_b64encode(bytes(out)).decode('ascii').rstrip('=')
+
+
+def decode(code):
+    """SharedPlan d'un code de partage (ValueError si le code est invalide)"""
+    code = ''.join(code.split())
+    header, _, body = code.partition('.')
+    if not header.startswith(PREFIX) or not body:
+        raise ValueError("ce n'est pas un code de partage SmartMeal")
+    if header[len(PREFIX):] != str(VERSION):
+        raise ValueError(f"version de code non prise en charge : {header[len(PREFIX):]}")
+    try:
+        data = base64.urlsafe_b64decode(body + '=' * (-len(body) % 4))
+    except ValueError:
+        raise ValueError("code de partage illisible")
+    if len(data) < 3 or zlib.crc32(data[:-2]) & 0xFFFF != int.from_bytes(data[-2:], 'big'):
+        raise ValueError("code de partage incomplet ou modifié")
+    data = data[:-2]
+
+    target, pos = _get_varint(data, 0)
+    if pos >= len(data) or data[pos] >= len(CATEGORIES):
+        raise ValueError("catégorie inconnue")
+    category = CATEGORIES[data[pos]]
+    days_count, pos = _get_varint(data, pos + 1)
+    if not 1 <= days_count <= MAX_DAYS or pos >= len(data):
+        raise ValueError("nombre de jours invalide")
+    mask = data[pos]
+    meal_types = [m for i, m in enumerate(MEAL_TYPES) if mask & (1 << i)]
+    name_length, pos = _get_varint(data, pos + 1)
+    if name_length > MAX_NAME or pos + name_length > len(data):
+        raise ValueError("nom du plan invalide")
+    name = data[pos:pos + name_length].decode('utf-8', errors='replace')
+    pos += name_length
+
+    days = []
+    for _ in range(days_count):
+        day = {}
+        for meal_type in meal_types:
+            value, pos = _get_varint(data, pos)
+            day[meal_type] = value - 1 if value else None
+        days.append(day)
+    if pos != len(data):
+        raise ValueError("code de partage invalide")
+    return SharedPlan(name, target, category, days)
+
+
+def resolve(conn, shared):
+    """GeneratedPlan d'un plan décodé, après vérification dans le catalogue"""
+    ids = {recipe_id for day in shared.days for recipe_id in day.values() if recipe_id}
+    recipes = {recipe.id: recipe for recipe in load_by_ids(conn, ids)}
+    # Recettes fusionnées depuis le partage : remplacées par la recette conservée
+    aliases = canonical_ids(conn, ids - recipes.keys())
+    for recipe in load_by_ids(conn, set(aliases.values())):
+        recipes[recipe.id] = recipe
+    for recipe_id, kept in aliases.items():
+        if kept in recipes:
+            recipes[recipe_id] = recipes[kept]
+    missing = sorted(ids - recipes.keys())
+    if missing:
+        raise ValueError(f"recettes introuvables dans le catalogue : "
+                         f"{', '.join(map(str, missing[:10]))}{'…' if len(missing) > 10 else ''}")
+
+    days_recipes = []
+    for day in shared.days:
+        meals = {}
+        for meal_type, recipe_id in day.items():
+            recipe = recipes.get(recipe_id)
+            if recipe is not None and recipe.category != meal_type:
+                raise ValueError(f"la recette {recipe_id} n'est pas un {meal_type.lower()}")
+            meals[meal_type] = recipe
+        days_recipes.append(meals)
+    return GeneratedPlan(shared.name, shared.target_calories, shared.category, days_recipes)
+
+
+def save_plan(conn, user_id, plan):
+    """Sauvegarde un plan (texte affiché et code de partage) ; retourne son id"""
+    cursor = conn.execute('''
+        INSERT INTO saved_plans (user_id, plan_name, plan_text, calories_target, days_count)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (user_id, plan.name, plan.text(), plan.target_calories, len(plan)))
+    conn.execute('INSERT INTO saved_plan_codes (plan_id, code) VALUES (?, ?)',
+                 (cursor.lastrowid, encode(plan)))
+    return cursor.lastrowid
+
+
+def plan_code(conn, plan_id):
+    """Code de partage d'un plan sauvegardé (None pour les plans antérieurs au partage)"""
+    row = conn.execute('SELECT code FROM saved_plan_codes WHERE plan_id = ?', (plan_id,)).fetchone()
+    return row[0] if row else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure l'encodage et le décodage des codes de partage")
+    parser.add_argument('--plans', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--max-id', type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    plans = [SharedPlan(f"Plan {i}", rng.randrange(1500, 3000), ALL_CATEGORIES,
+                        [{m: rng.randrange(1, args.max_id) for m in MEAL_TYPES} for _ in range(args.days)])
+             for i in range(args.plans)]
+
+    start = time.perf_counter()
+    codes = [encode(plan) for plan in plans]
+    encoded = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoded = [decode(code) for code in codes]
+    decoding = time.perf_counter() - start
+
+    assert all(a.days == b.days and a.name == b.name for a, b in zip(plans, decoded))
+    size = sum(map(len, codes)) / len(codes)
+    print(f"{args.plans} plans de {args.days} jours, code moyen {size:.0f} caractères")
+    print(f"  encodage : {args.plans / encoded:8.0f} plans/s")
+    print(f"  décodage : {args.plans / decoding:8.0f} plans/s")
+
+
+if __name__ == "__main__":
+    main()
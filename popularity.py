@@ -0,0 +1,151 @@
+"""Tirage des recettes pondéré par popularité et fraîcheur.
+
+Chaque sélection d'une recette (plan sauvegardé ou généré par la file de
+nuit) est comptée dans recipe_stats. Le poids d'une recette croît avec ce
+compte et baisse si elle a été choisie dans les derniers jours, pour que les
+plats appréciés reviennent plus souvent sans revenir chaque semaine.
+
+Les tirages utilisent une table d'alias de Walker par catégorie : O(n) à la
+construction, O(1) par tirage. Les tables sont reconstruites à la demande,
+au premier tirage qui suit une modification des poids ou des recettes.
+"""
+import random
+from datetime import date
+
+from recipe_model import load_recipes
+
+# Poids : (1 + sélections) ** POPULARITY_EXPONENT
+POPULARITY_EXPONENT = 0.5
+
+# Une recette choisie il y a moins de FRESHNESS_DAYS jours voit son poids
+# réduit, jusqu'à FRESHNESS_FLOOR le jour même
+FRESHNESS_DAYS = 14
+FRESHNESS_FLOOR = 0.2
+
+
+class AliasTable:
+    """Table d'alias de Walker (méthode de Vose) : tirage en O(1)"""
+
+    __slots__ = ('prob', 'alias')
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = float(sum(weights))
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+        if n == 0 or total <= 0:
+            self.prob = [1.0] * n
+            return
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large[-1]
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            if scaled[l] < 1.0:
+                large.pop()
+                small.append(l)
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def __len__(self):
+        return len(self.prob)
+
+    def sample(self, rng=random):
+        """Indice tiré selon les poids"""
+        column = int(rng.random() * len(self.prob))
+        return column if rng.random() < self.prob[column] else self.alias[column]
+
+
+def recipe_weight(times_selected, last_selected, today):
+    weight = (1 + times_selected) ** POPULARITY_EXPONENT
+    if last_selected is not None:
+        age = (today - last_selected).days
+        if age < FRESHNESS_DAYS:
+            weight *= FRESHNESS_FLOOR + (1 - FRESHNESS_FLOOR) * max(age, 0) / FRESHNESS_DAYS
+    return weight
+
+
+def load_stats(conn):
+    """Sélections par recette : {id: (nombre, date de la dernière)}"""
+    return {recipe_id: (count, date.fromisoformat(last) if last else None)
+            for recipe_id, count, last in conn.execute(
+                'SELECT recipe_id, times_selected, last_selected FROM recipe_stats')}
+
+
+def record_selection(conn, recipe_ids, day=None, commit=True):
+    """Compte une sélection pour chaque recette (un plan en utilise plusieurs)"""
+    day = (day or date.today()).isoformat()
+    counts = {}
+    for recipe_id in recipe_ids:
+        counts[recipe_id] = counts.get(recipe_id, 0) + 1
+    conn.executemany('''
+        INSERT INTO recipe_stats (recipe_id, times_selected, last_selected) VALUES (?, ?, ?)
+        ON CONFLICT (recipe_id) DO UPDATE SET
+            times_selected = times_selected + excluded.times_selected,
+            last_selected = excluded.last_selected
+    ''', [(recipe_id, count, day) for recipe_id, count in counts.items()])
+    if commit:
+        conn.commit()
+
+
+class PopularitySampler:
+    """Recettes par type de repas et tables d'alias, reconstruites à la demande"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._groups = None
+        self._stats = None
+        self._tables = {}
+        self._built_on = None
+
+    def invalidate(self, recipes=False):
+        """Poids modifiés (tables à reconstruire) ; recipes=True relit aussi les recettes"""
+        self._stats = None
+        self._tables = {}
+        if recipes:
+            self._groups = None
+
+    def load(self):
+        """Charge les recettes et construit toutes les tables (processus de génération)"""
+        for meal_type in self.groups():
+            self.table(meal_type)
+
+    def groups(self):
+        if self._groups is None:
+            self._groups = {}
+            for recipe in load_recipes(self.conn):
+                self._groups.setdefault(recipe.category, []).append(recipe)
+        return self._groups
+
+    def table(self, meal_type):
+        today = date.today()
+        if self._built_on != today:
+            # La fraîcheur dépend de la date : tables refaites chaque jour
+            self.invalidate()
+            self._built_on = today
+        table = self._tables.get(meal_type)
+        if table is None:
+            if self._stats is None:
+                self._stats = load_stats(self.conn)
+            stats = self._stats
+            table = AliasTable([recipe_weight(*stats.get(recipe.id, (0, None)), today)
+                                for recipe in self.groups().get(meal_type, [])])
+            self._tables[meal_type] = table
+        return table
+
+    def choice(self, meal_type, rng=random):
+        """Recette tirée selon sa popularité (None si la catégorie est vide)"""
+        recipes = self.groups().get(meal_type)
+        if not recipes:
+            return None
+        return recipes[self.table(meal_type).sample(rng)]
+
+    def random_days(self, days, meal_types, rng=random):
+        """Journées tirées selon la popularité : une recette par type de repas"""
+        return [{meal_type: self.choice(meal_type, rng) for meal_type in meal_types}
+                for _ in range(days)]
@@ -0,0 +1,60 @@
+"""Cache des recettes (objets Recipe) indexé par id."""
+import threading
+from collections import OrderedDict
+
+from recipe_model import RECIPE_COLUMNS, Recipe
+
+
+class RecipeCatalog:
+    """Cache LRU des recettes
+
+    get() ne fait une requête que si la recette n'est pas déjà en cache ;
+    prefetch() permet de charger une recette et ses instructions à l'avance
+    (survol d'une carte).
+    """
+
+    def __init__(self, conn, max_size=512):
+        self.conn = conn
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, recipe_id):
+        return recipe_id in self._cache
+
+    def get(self, recipe_id):
+        with self._lock:
+            recipe = self._cache.get(recipe_id)
+            if recipe is not None:
+                self._cache.move_to_end(recipe_id)
+                return recipe
+
+        row = self.conn.execute(f'SELECT {RECIPE_COLUMNS} FROM recipes WHERE id = ?',
+                                (recipe_id,)).fetchone()
+        if row is None:
+            return None
+        recipe = Recipe.from_row(row)
+        self.put(recipe)
+        return recipe
+
+    def prefetch(self, recipe_id):
+        """Charge la recette et ses instructions si elles ne sont pas en cache"""
+        recipe = self.get(recipe_id)
+        if recipe is not None:
+            recipe.load_instructions(self.conn)
+
+    def put(self, recipe):
+        with self._lock:
+            self._cache[recipe.id] = recipe
+            self._cache.move_to_end(recipe.id)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, recipe_ids=None):
+        """Oublie certaines recettes, ou tout le cache si recipe_ids est None"""
+        with self._lock:
+            if recipe_ids is None:
+                self._cache.clear()
+            else:
+                for recipe_id in recipe_ids:
+                    self._cache.pop(recipe_id, None)
@@ -0,0 +1,266 @@
+"""Détection des recettes quasi identiques (MinHash et LSH).
+
+Les catalogues fusionnés depuis plusieurs sources contiennent des recettes
+presque identiques (« Bowl Buddha Coloré » et « Buddha bowl coloré ») qui
+encombrent la recherche et faussent la variété des plans.
+
+Une recette est décrite par un ensemble : les mots de son nom (sans accents,
+ordre ignoré) et ses ingrédients normalisés. Sa signature MinHash
+(NUM_BANDS × BAND_ROWS valeurs) estime la similarité de Jaccard entre deux
+ensembles ; découpée en bandes, elle donne NUM_BANDS seaux par recette
+(table recipe_lsh). Deux recettes ne sont comparées que si elles partagent
+un seau : aucune comparaison deux à deux du catalogue.
+
+Le passage est incrémental : seules les recettes absentes de recipe_dedup
+(les nouvelles) sont signées, puis comparées aux seaux existants. Un doublon
+est fusionné dans la recette la plus ancienne : favoris, statistiques et
+événements d'utilisation sont reportés sur elle, et recipe_dedup garde la
+correspondance (les codes de partage qui citent le doublon restent valides).
+
+    python recipe_dedup.py --db meal_planner.db [--dry-run]
+"""
+import argparse
+import functools
+import random
+import sqlite3
+import time
+import zlib
+from array import array
+
+from database import create_schema
+from recipe_model import ingredient_key, split_ingredients
+from search_index import words
+
+# Signature : NUM_BANDS bandes de BAND_ROWS valeurs. Une paire de similarité
+# 0.8 partage un seau avec une probabilité de 97 %, une paire à 0.5 de 17 %
+NUM_BANDS = 12
+BAND_ROWS = 6
+
+# Similarité de Jaccard minimale pour un doublon
+THRESHOLD = 0.75
+
+# Mots du nom ignorés
+STOPWORDS = frozenset({'a', 'au', 'aux', 'd', 'de', 'des', 'du', 'en', 'et', 'l', 'la', 'le', 'les'})
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(NUM_BANDS * BAND_ROWS)]
+_feature_hashes = {}
+
+
+def features(name, ingredients):
+    """Ensemble décrivant une recette : mots du nom et ingrédients (préfixés « i: »)"""
+    result = set()
+    for word in words(name):
+        if word not in STOPWORDS:
+            result.add(word[:-1] if len(word) > 3 and word.endswith('s') else word)
+    result.update(map(_ingredient_feature, split_ingredients(ingredients)))
+    return result
+
+
+@functools.lru_cache(maxsize=65536)
+def _ingredient_feature(label):
+    # « Huile d'olive » et « Huile dolive » donnent le même élément
+    return 'i:' + ''.join(words(ingredient_key(label)))
+
+
+def _hashes(feature):
+    """Valeurs de l'élément par chaque permutation (mémorisées : petit vocabulaire)"""
+    values = _feature_hashes.get(feature)
+    if values is None:
+        x = zlib.crc32(feature.encode('utf-8'))
+        values = _feature_hashes[feature] = [((a * x + b) % _PRIME) & 0xFFFFFFFF for a, b in _PERMUTATIONS]
+    return values
+
+
+def signature(feature_set):
+    """Signature MinHash : pour chaque permutation, la plus petite valeur des éléments"""
+    return list(map(min, zip(*map(_hashes, feature_set or ('',)))))
+
+
+def buckets(category, feature_set):
+    """Seaux LSH d'une recette : un par bande (les catégories ne se mélangent pas)"""
+    data = array('I', signature(feature_set)).tobytes()
+    seed = zlib.crc32(category.encode('utf-8'))
+    width = 4 * BAND_ROWS
+    return [(band << 32) | zlib.crc32(data[band * width:(band + 1) * width], seed)
+            for band in range(NUM_BANDS)]
+
+
+def _recipes_by_ids(conn, recipe_ids):
+    """{id: (catégorie, ensemble)} des recettes déjà indexées (par lots)"""
+    result = {}
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), 500):
+        chunk = recipe_ids[start:start + 500]
+        placeholders = ', '.join('?' * len(chunk))
+        for recipe_id, name, category, ingredients in conn.execute(
+                f'SELECT id, name, category, ingredients FROM recipes WHERE id IN ({placeholders})', chunk):
+            result[recipe_id] = (category, features(name, ingredients))
+    return result
+
+
+def find_new_duplicates(conn):
+    """Signe les recettes nouvelles et cherche leurs doublons
+
+    Retourne [(id, id du doublon conservé ou None, similarité, seaux)], dans
+    l'ordre des ids : une nouvelle recette peut aussi doubler une recette
+    ajoutée dans le même lot.
+    """
+    rows = conn.execute('''
+        SELECT id, name, category, ingredients FROM recipes
+        WHERE id NOT IN (SELECT recipe_id FROM recipe_dedup) ORDER BY id
+    ''').fetchall()
+    if not rows:
+        return []
+
+    new = []
+    for recipe_id, name, category, ingredients in rows:
+        feature_set = features(name, ingredients)
+        new.append((recipe_id, category, feature_set, buckets(category, feature_set)))
+
+    # Recettes déjà indexées qui partagent un seau : une seule jointure
+    existing = {}
+    if conn.execute('SELECT 1 FROM recipe_lsh LIMIT 1').fetchone():
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS dedup_new (bucket INTEGER, recipe_id INTEGER)')
+        conn.execute('DELETE FROM temp.dedup_new')
+        conn.executemany('INSERT INTO temp.dedup_new VALUES (?, ?)',
+                         [(bucket, recipe_id) for recipe_id, _, _, keys in new for bucket in keys])
+        for new_id, old_id in conn.execute('''
+            SELECT DISTINCT n.recipe_id, l.recipe_id
+            FROM temp.dedup_new n JOIN recipe_lsh l ON l.bucket = n.bucket
+        '''):
+            existing.setdefault(new_id, set()).add(old_id)
+        conn.execute('DROP TABLE temp.dedup_new')
+    known = _recipes_by_ids(conn, set().union(*existing.values())) if existing else {}
+
+    batch = {}   # seau → ids conservés de ce lot
+    results = []
+    for recipe_id, category, feature_set, keys in new:
+        candidates = set(existing.get(recipe_id, ()))
+        for bucket in keys:
+            candidates.update(batch.get(bucket, ()))
+        best, best_similarity = None, 0.0
+        size = len(feature_set)
+        # Tailles trop différentes : la similarité ne peut pas atteindre le seuil
+        low, high = THRESHOLD * size, size / THRESHOLD
+        for candidate in candidates:
+            entry = known.get(candidate)
+            if entry is None or entry[0] != category or not low <= len(entry[1]) <= high:
+                continue
+            shared = len(feature_set & entry[1])
+            similarity = shared / (size + len(entry[1]) - shared)
+            if similarity > best_similarity or (similarity == best_similarity and candidate < best):
+                best, best_similarity = candidate, similarity
+        if best is not None and best_similarity >= THRESHOLD:
+            results.append((recipe_id, best, best_similarity, keys))
+            continue
+        results.append((recipe_id, None, None, keys))
+        known[recipe_id] = (category, feature_set)
+        for bucket in keys:
+            batch.setdefault(bucket, []).append(recipe_id)
+    return results
+
+
+def merge_duplicates(conn):
+    """Fusionne les doublons encore présents dans la recette conservée ; retourne leur nombre"""
+    duplicates = '''
+        SELECT recipe_id FROM recipe_dedup
+        WHERE duplicate_of IS NOT NULL AND recipe_id IN (SELECT id FROM recipes)
+    '''
+    count = conn.execute(f'SELECT COUNT(*) FROM ({duplicates})').fetchone()[0]
+    if not count:
+        return 0
+    conn.execute(f'''
+        INSERT OR IGNORE INTO user_favorites (user_id, recipe_id, created_at)
+        SELECT f.user_id, d.duplicate_of, f.created_at
+        FROM user_favorites f JOIN recipe_dedup d ON d.recipe_id = f.recipe_id
+        WHERE f.recipe_id IN ({duplicates})
+    ''')
+    conn.execute(f'DELETE FROM user_favorites WHERE recipe_id IN ({duplicates})')
+    conn.execute(f'''
+        INSERT INTO recipe_stats (recipe_id, times_selected, last_selected)
+        SELECT d.duplicate_of, SUM(s.times_selected), MAX(s.last_selected)
+        FROM recipe_stats s JOIN recipe_dedup d ON d.recipe_id = s.recipe_id
+        WHERE s.recipe_id IN ({duplicates})
+        GROUP BY d.duplicate_of
+        ON CONFLICT (recipe_id) DO UPDATE SET
+            times_selected = times_selected + excluded.times_selected,
+            last_selected = MAX(COALESCE(last_selected, ''), COALESCE(excluded.last_selected, ''))
+    ''')
+    conn.execute(f'DELETE FROM recipe_stats WHERE recipe_id IN ({duplicates})')
+    conn.execute(f'''
+        UPDATE usage_events SET recipe_id = (
+            SELECT duplicate_of FROM recipe_dedup WHERE recipe_dedup.recipe_id = usage_events.recipe_id
+        ) WHERE recipe_id IN ({duplicates})
+    ''')
+    conn.execute(f'DELETE FROM recipes WHERE id IN ({duplicates})')
+    return count
+
+
+def dedup_new(conn, merge=True, commit=True):
+    """Passage incrémental : indexe les nouvelles recettes, fusionne leurs doublons
+
+    Retourne [(id du doublon, id conservé, similarité)].
+    """
+    results = find_new_duplicates(conn)
+    if not results:
+        return []
+    conn.executemany('INSERT OR IGNORE INTO recipe_lsh (bucket, recipe_id) VALUES (?, ?)',
+                     [(bucket, recipe_id) for recipe_id, kept, _, keys in results if kept is None
+                      for bucket in keys])
+    conn.executemany('INSERT INTO recipe_dedup (recipe_id, duplicate_of, similarity) VALUES (?, ?, ?)',
+                     [(recipe_id, kept, similarity) for recipe_id, kept, similarity, _ in results])
+    if merge:
+        merge_duplicates(conn)
+    if commit:
+        conn.commit()
+    return [(recipe_id, kept, similarity) for recipe_id, kept, similarity, _ in results if kept is not None]
+
+
+def canonical_ids(conn, recipe_ids):
+    """{id: id de la recette conservée} pour les recettes fusionnées comme doublons"""
+    result = {}
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), 500):
+        chunk = recipe_ids[start:start + 500]
+        placeholders = ', '.join('?' * len(chunk))
+        result.update(conn.execute(f'''
+            SELECT recipe_id, duplicate_of FROM recipe_dedup
+            WHERE duplicate_of IS NOT NULL AND recipe_id IN ({placeholders})
+        ''', chunk))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Détecte et fusionne les recettes quasi identiques")
+    parser.add_argument('--db', default='meal_planner.db')
+    parser.add_argument('--rebuild', action='store_true', help="réindexe tout le catalogue")
+    parser.add_argument('--dry-run', action='store_true', help="affiche les doublons sans rien modifier")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    create_schema(conn)
+    if args.rebuild:
+        conn.execute('DELETE FROM recipe_lsh')
+        conn.execute('DELETE FROM recipe_dedup WHERE recipe_id IN (SELECT id FROM recipes)')
+
+    start = time.perf_counter()
+    pairs = dedup_new(conn, merge=not args.dry_run, commit=False)
+    elapsed = time.perf_counter() - start
+    names = dict(conn.execute('SELECT id, name FROM recipes')) if args.dry_run else {}
+    if args.dry_run:
+        conn.rollback()
+    else:
+        conn.commit()
+    conn.close()
+
+    action = "trouvés" if args.dry_run else "fusionnés"
+    print(f"{len(pairs)} doublons {action} en {elapsed:.2f} s")
+    for recipe_id, kept, similarity in pairs[:20]:
+        label = f"{names.get(recipe_id, recipe_id)} → {names.get(kept, kept)}" if names else f"{recipe_id} → {kept}"
+        print(f"  {similarity:.2f}  {label}")
+
+
+if __name__ == "__main__":
+    main()
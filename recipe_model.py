@@ -0,0 +1,142 @@
+"""Représentation compacte d'une recette.
+
+Les écrans manipulaient les lignes brutes de SELECT * (tuples positionnels
+de 8 colonnes), instructions comprises, alors que les cartes et les plans ne
+les affichent jamais. Recipe n'a que des __slots__, ses catégorie et
+difficulté sont des chaînes internées (partagées par toutes les recettes),
+et les instructions ne sont lues qu'à la demande (fenêtre de détails).
+
+    python recipe_model.py --db meal_planner.db   # empreinte mémoire, avant/après
+"""
+import argparse
+import functools
+import re
+import sqlite3
+import sys
+import time
+import tracemalloc
+
+# Colonnes chargées pour les listes (sans les instructions)
+RECIPE_COLUMNS = 'id, name, category, ingredients, calories, prep_time, difficulty'
+
+# Colonnes de la fenêtre de détails (recette complète)
+FULL_RECIPE_COLUMNS = RECIPE_COLUMNS + ', instructions'
+
+# Quantité en tête d'un ingrédient (« 100g », « 1 c.à.s », « 2 ») et « de » qui suit
+QUANTITY = re.compile(r"^\s*(?P<amount>\d+(?:[.,]\d+)?)\s*"
+                      r"(?:(?P<unit>kg|g|ml|cl|l|c\.à\.s|c\.à\.c)\.?(?!\w))?\s*(?:de\s+|d')?",
+                      re.IGNORECASE)
+
+
+class Recipe:
+    """Une recette ; instructions vaut None tant qu'elle n'a pas été chargée"""
+
+    __slots__ = ('id', 'name', 'category', 'ingredients', 'calories', 'prep_time',
+                 'difficulty', 'instructions')
+
+    def __init__(self, recipe_id, name, category, ingredients, calories, prep_time,
+                 difficulty, instructions=None):
+        self.id = recipe_id
+        self.name = name
+        self.category = sys.intern(category)
+        self.ingredients = ingredients
+        self.calories = calories
+        self.prep_time = prep_time
+        self.difficulty = sys.intern(difficulty) if difficulty is not None else None
+        self.instructions = instructions
+
+    @classmethod
+    def from_row(cls, row):
+        """Construit une recette depuis une ligne RECIPE_COLUMNS ou FULL_RECIPE_COLUMNS"""
+        return cls(*row)
+
+    def load_instructions(self, conn):
+        """Lit les instructions si elles ne sont pas encore chargées"""
+        if self.instructions is None:
+            row = conn.execute('SELECT instructions FROM recipes WHERE id = ?', (self.id,)).fetchone()
+            self.instructions = row[0] if row else ""
+        return self.instructions
+
+    def __repr__(self):
+        return f"Recipe({self.id}, {self.name!r})"
+
+
+def parse_ingredient(part):
+    """(quantité, unité, nom) d'un ingrédient ; quantité et unité valent None si absentes"""
+    match = QUANTITY.match(part)
+    if match is None:
+        return None, None, part.strip()
+    amount = float(match.group('amount').replace(',', '.'))
+    unit = match.group('unit')
+    return amount, unit.lower() if unit else None, part[match.end():].strip()
+
+
+def split_ingredients(text):
+    """Ingrédients d'une recette, sans les quantités (« 100g quinoa » → « quinoa »)"""
+    names = (parse_ingredient(part)[2] for part in (text or '').split(','))
+    return [name for name in names if name]
+
+
+@functools.lru_cache(maxsize=None)
+def ingredient_key(name):
+    """Forme normalisée d'un ingrédient : minuscules, sans « s » final (« Tomates » → « tomate »)"""
+    key = ' '.join(name.lower().split())
+    if len(key) > 3 and key.endswith('s') and not key.endswith('ss'):
+        key = key[:-1]
+    return key
+
+
+def load_recipes(conn, category=None):
+    """Recettes (sans instructions), éventuellement d'une seule catégorie"""
+    query = f'SELECT {RECIPE_COLUMNS} FROM recipes'
+    params = ()
+    if category is not None:
+        query += ' WHERE category = ?'
+        params = (category,)
+    return [Recipe(*row) for row in conn.execute(query, params)]
+
+
+def load_by_ids(conn, recipe_ids):
+    """Recettes d'une liste d'ids, dans l'ordre de la liste"""
+    ids = list(recipe_ids)
+    if not ids:
+        return []
+    placeholders = ', '.join('?' * len(ids))
+    rows = conn.execute(f'SELECT {RECIPE_COLUMNS} FROM recipes WHERE id IN ({placeholders})', ids)
+    by_id = {row[0]: Recipe(*row) for row in rows}
+    return [by_id[recipe_id] for recipe_id in ids if recipe_id in by_id]
+
+
+def measure(load):
+    """Mémoire retenue (octets) et durée du chargement"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = load()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return data, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure l'empreinte mémoire du catalogue de recettes")
+    parser.add_argument('--db', default='meal_planner.db')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    rows, rows_size, rows_time = measure(lambda: conn.execute('SELECT * FROM recipes').fetchall())
+    count = len(rows)
+    del rows
+    _, recipes_size, recipes_time = measure(lambda: load_recipes(conn))
+    conn.close()
+
+    print(f"{count} recettes")
+    print(f"  tuples SELECT *   : {rows_size / 1024 / 1024:8.1f} Mo  "
+          f"({rows_size / max(count, 1):6.0f} o/recette)  {rows_time:.2f} s")
+    print(f"  Recipe (__slots__): {recipes_size / 1024 / 1024:8.1f} Mo  "
+          f"({recipes_size / max(count, 1):6.0f} o/recette)  {recipes_time:.2f} s")
+    print(f"  gain              : x{rows_size / max(recipes_size, 1):.2f}")
+
+
+if __name__ == "__main__":
+    main()
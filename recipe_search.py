@@ -0,0 +1,229 @@
+"""Recherche de recettes au fil de la frappe.
+
+Dès que l'index trigramme (search_index) est construit, un terme de
+recherche est résolu en mémoire, sans accents et avec tolérance aux fautes ;
+seules les recettes retenues sont lues par clé primaire.
+
+Avant cela, les requêtes LIKE tournent dans un thread dédié avec sa propre
+connexion : une nouvelle recherche interrompt (Connection.interrupt) celle en
+cours. Quand le nouveau terme prolonge le précédent (« sau » → « saum »), les
+résultats sont filtrés en mémoire à partir du résultat précédent, sans
+retourner à la base.
+"""
+import queue
+import sqlite3
+import threading
+
+from db_monitor import MonitoredConnection
+from recipe_model import RECIPE_COLUMNS, Recipe, load_by_ids
+from search_index import TrigramIndex
+
+ALL_CATEGORIES = "Toutes"
+
+
+def build_query(term, category):
+    """Construit la requête SQL de recherche et ses paramètres"""
+    query = f"SELECT {RECIPE_COLUMNS} FROM recipes WHERE 1=1"
+    params = []
+
+    if category != ALL_CATEGORIES:
+        query += " AND category = ?"
+        params.append(category)
+
+    if term:
+        query += " AND (name LIKE ? OR ingredients LIKE ?)"
+        params.append(f"%{term}%")
+        params.append(f"%{term}%")
+
+    query += " ORDER BY name"
+    return query, params
+
+
+def haystack(recipe):
+    """Texte dans lequel un terme de recherche est cherché"""
+    return f"{recipe.name}\n{recipe.ingredients}".lower()
+
+
+class SearchResult:
+    """Résultat d'une recherche, avec les textes précalculés pour l'affinage"""
+
+    __slots__ = ('term', 'category', 'recipes', 'haystacks', 'exhaustive', 'total')
+
+    def __init__(self, term, category, recipes, haystacks=None, exhaustive=True, total=None):
+        self.term = term
+        self.category = category
+        self.recipes = recipes
+        self.exhaustive = exhaustive
+        # Nombre de recettes trouvées (les résultats non exhaustifs n'en gardent qu'une partie)
+        self.total = len(recipes) if total is None else total
+        if haystacks is None and exhaustive:
+            haystacks = [haystack(r) for r in recipes]
+        self.haystacks = haystacks
+
+    def narrow(self, term):
+        """Filtre ce résultat pour un terme qui prolonge self.term"""
+        recipes = []
+        haystacks = []
+        for recipe, text in zip(self.recipes, self.haystacks):
+            if term in text:
+                recipes.append(recipe)
+                haystacks.append(text)
+        return SearchResult(term, self.category, recipes, haystacks)
+
+
+class RecipeSearch:
+    """Exécute les recherches en arrière-plan, la dernière demande l'emporte"""
+
+    def __init__(self, db_path, conn, limit=60):
+        self.db_path = db_path
+        self.conn = conn
+        self.limit = limit
+        self.index = None
+        self.last = None
+        self._latest = 0
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._conn = None
+        self._reconnect = False
+        self._running = None
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+        self.refresh_index()
+
+    def search(self, term, category):
+        """Lance une recherche
+
+        Retourne immédiatement un SearchResult si le résultat peut être obtenu
+        en mémoire ; sinon retourne None et le résultat sera disponible via poll().
+        """
+        term = term.strip().lower()
+        last = self.last
+
+        if term and self.index is not None:
+            with self._lock:
+                self._latest += 1
+                self._cancel_running()
+            self.last = self.fuzzy_search(term, category)
+            return self.last
+
+        if (last is not None and last.exhaustive and last.category == category
+                and term.startswith(last.term)):
+            with self._lock:
+                # Annuler une éventuelle requête encore en cours
+                self._latest += 1
+                self._cancel_running()
+            self.last = last.narrow(term) if term != last.term else last
+            return self.last
+
+        with self._lock:
+            self._latest += 1
+            generation = self._latest
+            self._cancel_running()
+        self._requests.put((generation, term, category))
+        return None
+
+    def fuzzy_search(self, term, category):
+        """Recherche dans l'index trigramme, classée par similarité"""
+        ranked, total = self.index.search_counted(term, None if category == ALL_CATEGORIES else category,
+                                                  limit=self.limit)
+        recipes = load_by_ids(self.conn, [recipe_id for _, recipe_id in ranked])
+        return SearchResult(term, category, recipes, exhaustive=False, total=total)
+
+    def refresh_index(self, recipe_ids=None):
+        """Met à jour l'index après une modification des recettes
+
+        Avec recipe_ids, seules ces recettes sont relues (ajout, modification
+        ou suppression) ; sinon l'index est reconstruit en arrière-plan.
+        """
+        if recipe_ids is not None and self.index is not None:
+            ids = list(recipe_ids)
+            placeholders = ', '.join('?' * len(ids))
+            rows = self.conn.execute(
+                f'SELECT id, name, category, ingredients FROM recipes WHERE id IN ({placeholders})',
+                ids).fetchall()
+            found = set()
+            for recipe_id, name, category, ingredients in rows:
+                self.index.add(recipe_id, name, category, ingredients)
+                found.add(recipe_id)
+            for recipe_id in ids:
+                if recipe_id not in found:
+                    self.index.remove(recipe_id)
+            return
+
+        def build():
+            conn = sqlite3.connect(self.db_path)
+            try:
+                self.index = TrigramIndex.from_connection(conn)
+            finally:
+                conn.close()
+
+        threading.Thread(target=build, daemon=True).start()
+
+    def poll(self):
+        """Retourne le résultat de la dernière recherche lancée s'il est prêt"""
+        result = None
+        while True:
+            try:
+                generation, found = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self._latest:
+                result = found
+        if result is not None:
+            self.last = result
+        return result
+
+    @property
+    def pending(self):
+        return self._running is not None or not self._requests.empty()
+
+    def reset(self):
+        """Oublie le dernier résultat (les recettes ont changé)"""
+        self.last = None
+
+    def reconnect(self):
+        """Interrompt la requête en cours ; le worker rouvre sa connexion avant
+        la suivante (base remplacée par une restauration)"""
+        with self._lock:
+            self._reconnect = True
+            if self._running is not None and self._conn is not None:
+                self._conn.interrupt()
+
+    def _cancel_running(self):
+        if self._running is not None and self._running != self._latest and self._conn is not None:
+            self._conn.interrupt()
+
+    def _run(self):
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                     factory=MonitoredConnection)
+        while True:
+            generation, term, category = self._requests.get()
+            # Ignorer les demandes déjà dépassées par une frappe plus récente
+            if generation != self._latest:
+                continue
+
+            query, params = build_query(term, category)
+            with self._lock:
+                if self._reconnect:
+                    self._reconnect = False
+                    self._conn.close()
+                    self._conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                                 factory=MonitoredConnection)
+                self._running = generation
+            try:
+                recipes = [Recipe.from_row(row) for row in self._conn.execute(query, params)]
+            except sqlite3.OperationalError:
+                # Requête interrompue par une recherche plus récente
+                recipes = None
+            finally:
+                with self._lock:
+                    self._running = None
+
+            if recipes is None:
+                if generation == self._latest:
+                    # Interruption tardive destinée à une requête précédente : relancer
+                    self._requests.put((generation, term, category))
+                continue
+
+            self._results.put((generation, SearchResult(term, category, recipes)))
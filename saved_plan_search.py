@@ -0,0 +1,113 @@
+"""Recherche dans les plans sauvegardés (index plein texte FTS5).
+
+Une requête mêle des mots à chercher et, éventuellement, une période :
+« saumon mois dernier », « quinoa cette semaine », « poulet depuis 10 jours ».
+Les mots sont cherchés par préfixe dans le nom et le contenu des plans
+(sans tenir compte des accents) ; la période filtre sur created_at.
+"""
+import re
+from datetime import date, timedelta
+
+from database import has_fulltext
+from search_index import normalize
+
+# Mots ignorés dans une requête
+STOP_WORDS = {
+    'plan', 'plans', 'avec', 'contenant', 'contient', 'du', 'de', 'des', 'le', 'la', 'les',
+    'un', 'une', 'et', 'en', 'au', 'aux', 'pour', 'sur', 'dans',
+}
+
+_DAYS_AGO = re.compile(r'\bdepuis\s+(\d+)\s+jours?\b')
+_WORD = re.compile(r'[0-9a-z]+')
+
+
+def _month_start(day, months_back=0):
+    month = day.month - 1 - months_back
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _periods(today):
+    """Expressions de période reconnues (normalisées) → (début, fin exclue)"""
+    week_start = today - timedelta(days=today.weekday())
+    return [
+        ("aujourd'hui", (today, today + timedelta(days=1))),
+        ('hier', (today - timedelta(days=1), today)),
+        ('cette semaine', (week_start, today + timedelta(days=1))),
+        ('semaine derniere', (week_start - timedelta(days=7), week_start)),
+        ('ce mois', (_month_start(today), today + timedelta(days=1))),
+        ('mois dernier', (_month_start(today, 1), _month_start(today))),
+        ('cette annee', (date(today.year, 1, 1), today + timedelta(days=1))),
+        ('annee derniere', (date(today.year - 1, 1, 1), date(today.year, 1, 1))),
+    ]
+
+
+def parse_query(text, today=None):
+    """Découpe une requête en (mots, début, fin exclue) ; début et fin peuvent être None"""
+    today = today or date.today()
+    text = normalize(text)
+    start = end = None
+
+    match = _DAYS_AGO.search(text)
+    if match:
+        start, end = today - timedelta(days=int(match.group(1))), today + timedelta(days=1)
+        text = text[:match.start()] + ' ' + text[match.end():]
+
+    for phrase, period in _periods(today):
+        # Mots entiers : « cahier » ne contient pas la période « hier »
+        pattern = rf'\b{re.escape(phrase)}\b'
+        if re.search(pattern, text):
+            start, end = period
+            text = re.sub(pattern, ' ', text)
+            break
+
+    terms = [w for w in _WORD.findall(text) if w not in STOP_WORDS]
+    return terms, start, end
+
+
+def match_expression(user_id, terms):
+    """Expression MATCH FTS5 : les plans de l'utilisateur contenant tous les mots (par préfixe)"""
+    return f'user_id:{int(user_id)} AND ' + ' AND '.join(f'"{term}"*' for term in terms)
+
+
+class SavedPlanSearch:
+    """Recherche les plans sauvegardés d'un utilisateur"""
+
+    def __init__(self, conn, limit=200):
+        self.conn = conn
+        self.limit = limit
+        self.fulltext = has_fulltext(conn)
+
+    def search(self, user_id, text, today=None):
+        """Plans (id, plan_name, calories_target, days_count, created_at) les plus pertinents"""
+        terms, start, end = parse_query(text, today)
+
+        conditions = ['sp.user_id = ?']
+        params = [user_id]
+        if start is not None:
+            conditions.append('sp.created_at >= ? AND sp.created_at < ?')
+            params += [start.isoformat(), end.isoformat()]
+
+        columns = 'sp.id, sp.plan_name, sp.calories_target, sp.days_count, sp.created_at'
+        if terms and self.fulltext:
+            query = f'''
+                SELECT {columns}
+                FROM saved_plans_fts
+                JOIN saved_plans sp ON sp.id = saved_plans_fts.rowid
+                WHERE saved_plans_fts MATCH ? AND {' AND '.join(conditions)}
+                ORDER BY saved_plans_fts.rank
+                LIMIT ?
+            '''
+            params = [match_expression(user_id, terms)] + params
+        else:
+            for term in terms:
+                # SQLite sans FTS5 : recherche simple (sensible aux accents)
+                conditions.append('(sp.plan_name LIKE ? OR sp.plan_text LIKE ?)')
+                params += [f'%{term}%', f'%{term}%']
+            query = f'''
+                SELECT {columns}
+                FROM saved_plans sp
+                WHERE {' AND '.join(conditions)}
+                ORDER BY sp.created_at DESC
+                LIMIT ?
+            '''
+        return self.conn.execute(query, params + [self.limit]).fetchall()
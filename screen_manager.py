@@ -0,0 +1,110 @@
+"""Gestion des écrans de l'application.
+
+Chaque écran est construit une seule fois puis simplement affiché ou masqué
+(pack / pack_forget). Un écran invalidé ne rafraîchit ses données qu'au moment
+où il redevient visible.
+"""
+
+
+class Screen:
+    """Un écran mis en cache
+
+    build(parent) construit les widgets et retourne le Frame de l'écran.
+    refresh() recharge uniquement les données ; sans refresh, un écran
+    invalidé est reconstruit entièrement.
+    topics liste les types de données dont dépend l'écran ('recipes', 'plans'...).
+    """
+
+    def __init__(self, name, build, refresh=None, on_show=None, topics=(), always_refresh=False):
+        self.name = name
+        self.build = build
+        self.refresh = refresh
+        self.on_show = on_show
+        self.topics = set(topics)
+        self.always_refresh = always_refresh
+        self.frame = None
+        self.stale = False
+
+    def invalidate(self):
+        """Marque les données de l'écran comme périmées"""
+        self.stale = True
+
+    def destroy(self):
+        if self.frame is not None and self.frame.winfo_exists():
+            self.frame.destroy()
+        self.frame = None
+        self.stale = False
+
+
+class ScreenManager:
+    """Affiche les écrans enregistrés dans un conteneur commun"""
+
+    def __init__(self):
+        self.container = None
+        self.screens = {}
+        self.current = None
+
+    def register(self, name, build, **options):
+        self.screens[name] = Screen(name, build, **options)
+
+    def attach(self, container):
+        """Associe le conteneur des écrans (recréé à chaque connexion)"""
+        self.reset()
+        self.container = container
+
+    def is_visible(self, name):
+        return self.current == name
+
+    def show(self, name):
+        screen = self.screens[name]
+
+        if screen.frame is not None and not screen.frame.winfo_exists():
+            screen.frame = None
+
+        if screen.frame is None:
+            screen.frame = screen.build(self.container)
+            screen.stale = False
+        elif screen.stale or screen.always_refresh:
+            self._refresh(screen)
+
+        if self.current != name:
+            if self.current is not None:
+                previous = self.screens[self.current].frame
+                if previous is not None and previous.winfo_exists():
+                    previous.pack_forget()
+            screen.frame.pack(side='right', fill='both', expand=True, padx=30, pady=30)
+            self.current = name
+
+        if screen.on_show:
+            screen.on_show()
+
+    def _refresh(self, screen):
+        if screen.refresh is not None:
+            screen.refresh()
+        else:
+            # Pas de rafraîchissement partiel : reconstruire l'écran
+            screen.destroy()
+            screen.frame = screen.build(self.container)
+            if self.current == screen.name:
+                screen.frame.pack(side='right', fill='both', expand=True, padx=30, pady=30)
+        screen.stale = False
+
+    def invalidate(self, *topics):
+        """Invalide les écrans qui dépendent des données modifiées
+
+        L'écran visible est rafraîchi immédiatement, les autres le seront
+        lorsqu'ils seront de nouveau affichés.
+        """
+        for screen in self.screens.values():
+            if screen.frame is None or not screen.topics.intersection(topics):
+                continue
+            screen.invalidate()
+            if screen.name == self.current:
+                self._refresh(screen)
+
+    def reset(self):
+        """Détruit tous les écrans (changement d'utilisateur)"""
+        for screen in self.screens.values():
+            screen.destroy()
+        self.current = None
+        self.container = None
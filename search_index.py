@@ -0,0 +1,212 @@
+"""Index de recherche floue des recettes, insensible aux accents.
+
+Le texte est normalisé (NFKD, accents supprimés, casefold) puis découpé en
+mots. L'index est à deux niveaux :
+
+- trigrammes → mots du vocabulaire (quelques milliers de mots, même pour un
+  catalogue de 100k recettes), pour retrouver les mots proches d'un terme
+  mal orthographié (« quinao » → « quinoa ») ;
+- mot → ids des recettes, séparément pour les noms et les ingrédients.
+
+Un terme de recherche est ainsi comparé au vocabulaire plutôt qu'à chaque
+recette, ce qui garde les requêtes sous la dizaine de millisecondes.
+"""
+import functools
+import heapq
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+
+# Caractères que NFKD ne décompose pas
+_LIGATURES = str.maketrans({'œ': 'oe', 'Œ': 'oe', 'æ': 'ae', 'Æ': 'ae', 'ß': 'ss'})
+
+_RAW_SPLIT = re.compile(r'[\W_]+')
+_WORD_SPLIT = re.compile(r'[^0-9a-z]+')
+
+# Similarité minimale entre un terme et un mot du vocabulaire
+MIN_SIMILARITY = 0.3
+
+# Poids d'une correspondance dans le nom par rapport aux ingrédients
+NAME_WEIGHT = 1.0
+INGREDIENT_WEIGHT = 0.6
+
+
+def normalize(text):
+    """Texte en minuscules, sans accents ni ligatures"""
+    text = unicodedata.normalize('NFKD', text.translate(_LIGATURES))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return text.casefold()
+
+
+@functools.lru_cache(maxsize=65536)
+def _normalize_token(token):
+    return tuple(sys.intern(w) for w in _WORD_SPLIT.split(normalize(token)) if w)
+
+
+def words(text):
+    """Mots normalisés d'un texte
+
+    Le vocabulaire d'un catalogue est petit : chaque mot brut n'est normalisé
+    qu'une fois grâce au cache.
+    """
+    result = []
+    for token in _RAW_SPLIT.split(text):
+        if token:
+            result.extend(_normalize_token(token))
+    return result
+
+
+def trigrams(word):
+    """Trigrammes d'un mot, complété par des espaces en début et fin"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Index incrémental des noms et ingrédients de recettes"""
+
+    def __init__(self):
+        self.word_trigrams = {}                 # mot → ensemble de trigrammes
+        self.trigram_words = defaultdict(set)   # trigramme → mots
+        self.name_postings = defaultdict(set)   # mot → ids (nom)
+        self.ingredient_postings = defaultdict(set)  # mot → ids (ingrédients)
+        self.documents = {}                     # id → (mots du nom, mots des ingrédients, catégorie)
+
+    def __len__(self):
+        return len(self.documents)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Construit un index à partir de lignes (id, name, category, ingredients)"""
+        index = cls()
+        for recipe_id, name, category, ingredients in rows:
+            index.add(recipe_id, name, category, ingredients)
+        return index
+
+    @classmethod
+    def from_connection(cls, conn):
+        return cls.from_rows(conn.execute('SELECT id, name, category, ingredients FROM recipes'))
+
+    def _add_word(self, word):
+        if word not in self.word_trigrams:
+            grams = trigrams(word)
+            self.word_trigrams[word] = grams
+            for gram in grams:
+                self.trigram_words[gram].add(word)
+
+    def add(self, recipe_id, name, category, ingredients):
+        """Ajoute ou met à jour une recette"""
+        if recipe_id in self.documents:
+            self.remove(recipe_id)
+
+        name_words = frozenset(words(name))
+        ingredient_words = frozenset(words(ingredients))
+        self.documents[recipe_id] = (name_words, ingredient_words, sys.intern(category))
+
+        for word in name_words:
+            self._add_word(word)
+            self.name_postings[word].add(recipe_id)
+        for word in ingredient_words:
+            self._add_word(word)
+            self.ingredient_postings[word].add(recipe_id)
+
+    def remove(self, recipe_id):
+        """Retire une recette de l'index"""
+        document = self.documents.pop(recipe_id, None)
+        if document is None:
+            return
+        name_words, ingredient_words, _ = document
+        for word in name_words:
+            self.name_postings[word].discard(recipe_id)
+        for word in ingredient_words:
+            self.ingredient_postings[word].discard(recipe_id)
+
+    def similar_words(self, term):
+        """Mots du vocabulaire proches du terme, avec leur similarité (0..1]"""
+        grams = trigrams(term)
+        shared = defaultdict(int)
+        for gram in grams:
+            for word in self.trigram_words.get(gram, ()):
+                shared[word] += 1
+
+        matches = {}
+        for word, count in shared.items():
+            if word == term:
+                score = 1.0
+            elif word.startswith(term):
+                # Recherche au fil de la frappe : « sau » → « saumon »
+                score = 0.9
+            else:
+                score = count / (len(grams) + len(self.word_trigrams[word]) - count)
+            if score >= MIN_SIMILARITY:
+                matches[word] = score
+        return matches
+
+    def _term_tiers(self, term):
+        """Recettes correspondant à un terme, groupées par score décroissant"""
+        tiers = defaultdict(set)
+        for word, similarity in self.similar_words(term).items():
+            for postings, weight in ((self.name_postings, NAME_WEIGHT),
+                                     (self.ingredient_postings, INGREDIENT_WEIGHT)):
+                ids = postings.get(word)
+                if ids:
+                    tiers[similarity * weight] |= ids
+        return sorted(tiers.items(), reverse=True)
+
+    def search(self, query, category=None, limit=20):
+        """Retourne les meilleures recettes sous forme de liste (score, id)
+
+        Le score d'une recette est la somme, pour chaque terme, de la meilleure
+        similarité trouvée dans son nom ou ses ingrédients.
+        """
+        return self.search_counted(query, category, limit)[0]
+
+    def search_counted(self, query, category=None, limit=20):
+        """Comme search, mais retourne (meilleures recettes, nombre total de recettes trouvées)"""
+        terms = words(query)
+        if not terms:
+            return [], 0
+
+        documents = self.documents
+
+        def accepted(recipe_id):
+            return category is None or documents[recipe_id][2] == category
+
+        all_tiers = [self._term_tiers(term) for term in dict.fromkeys(terms)]
+
+        if len(all_tiers) == 1:
+            # Un seul terme : parcourir les paliers de score sans calculer chaque recette
+            results = []
+            total = 0
+            seen = set()
+            for value, ids in all_tiers[0]:
+                fresh = ids - seen
+                if len(results) < limit:
+                    for recipe_id in sorted(fresh):
+                        if accepted(recipe_id):
+                            results.append((value, recipe_id))
+                            if len(results) >= limit:
+                                break
+                total += len(fresh) if category is None else sum(map(accepted, fresh))
+                seen |= ids
+            return results, total
+
+        # Plusieurs termes : privilégier les recettes qui les contiennent tous
+        matched = [set().union(*(ids for _, ids in tiers)) for tiers in all_tiers]
+        candidates = set.intersection(*matched)
+        if len(candidates) < limit:
+            candidates = set.union(*matched)
+
+        scores = defaultdict(float)
+        for tiers in all_tiers:
+            remaining = set(candidates)
+            for value, ids in tiers:
+                hit = ids & remaining
+                for recipe_id in hit:
+                    scores[recipe_id] += value
+                remaining -= hit
+
+        ranked = [(score, -recipe_id) for recipe_id, score in scores.items() if accepted(recipe_id)]
+        best = heapq.nlargest(limit, ranked)
+        return [(score, -negative_id) for score, negative_id in best], len(ranked)
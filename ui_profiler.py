@@ -0,0 +1,153 @@
+"""Profilage de l'interface Tk.
+
+- profile_screen : chronomètre la construction d'un écran et compte les widgets créés
+- LoopLatencySampler : mesure la dérive des callbacks after() (réactivité de la boucle Tk)
+
+Les mesures sont écrites en JSON, une ligne par événement, dans un fichier
+à rotation. Activé par la variable d'environnement SMARTMEAL_PROFILE=1
+(SMARTMEAL_METRICS_FILE pour changer le fichier de sortie).
+"""
+import functools
+import json
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+
+ENABLED = os.environ.get('SMARTMEAL_PROFILE', '').lower() in ('1', 'true', 'yes', 'on')
+
+METRICS_FILE = os.environ.get('SMARTMEAL_METRICS_FILE', 'smartmeal_metrics.log')
+
+metrics_logger = logging.getLogger('smartmeal.metrics')
+metrics_logger.propagate = False
+
+
+def setup_metrics_file(path=METRICS_FILE, max_bytes=1_000_000, backup_count=5):
+    """Branche le journal des métriques sur un fichier à rotation"""
+    if not metrics_logger.handlers:
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                      encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        metrics_logger.addHandler(handler)
+        metrics_logger.setLevel(logging.INFO)
+
+
+def write_metric(kind, **fields):
+    """Écrit une mesure au format JSON"""
+    fields['type'] = kind
+    fields['ts'] = round(time.time(), 3)
+    metrics_logger.info(json.dumps(fields, ensure_ascii=False))
+
+
+def widget_paths(root):
+    """Ensemble des chemins Tk de tous les widgets descendants de root"""
+    paths = set()
+    stack = [root]
+    while stack:
+        widget = stack.pop()
+        children = widget.winfo_children()
+        paths.update(str(child) for child in children)
+        stack.extend(children)
+    return paths
+
+
+def percentile(sorted_values, p):
+    """Percentile par rang le plus proche sur une liste triée"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def profile_screen(name):
+    """Décorateur pour les méthodes show_* de l'application
+
+    Mesure le temps de construction (jusqu'au calcul de la géométrie) et le
+    nombre de widgets créés. Sans effet si le profilage est désactivé.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not ENABLED:
+                return method(self, *args, **kwargs)
+
+            before = widget_paths(self.root)
+            start = time.perf_counter()
+            result = method(self, *args, **kwargs)
+            build_ms = (time.perf_counter() - start) * 1000
+            self.root.update_idletasks()
+            total_ms = (time.perf_counter() - start) * 1000
+            after = widget_paths(self.root)
+
+            write_metric('screen', screen=name,
+                         build_ms=round(build_ms, 2),
+                         layout_ms=round(total_ms - build_ms, 2),
+                         total_ms=round(total_ms, 2),
+                         widgets_created=len(after - before),
+                         widgets_destroyed=len(before - after),
+                         widgets_alive=len(after))
+            return result
+        return wrapper
+    return decorator
+
+
+class LoopLatencySampler:
+    """Échantillonne la dérive des callbacks after() de la boucle Tk
+
+    Un callback est programmé toutes les `interval_ms` ; l'écart entre l'heure
+    prévue et l'heure réelle d'exécution mesure le temps pendant lequel la
+    boucle d'événements était bloquée. Un résumé p50/p99 est écrit toutes les
+    `report_every_s` secondes.
+    """
+
+    def __init__(self, root, interval_ms=16, report_every_s=10):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.report_every_s = report_every_s
+        self.samples = []
+        self._expected = None
+        self._last_report = time.perf_counter()
+        self._job = None
+
+    def start(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._job = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        self.report()
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.samples.append(max(0.0, (now - self._expected) * 1000))
+
+        if now - self._last_report >= self.report_every_s:
+            self.report()
+            self._last_report = now
+
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._job = self.root.after(self.interval_ms, self._tick)
+
+    def report(self):
+        """Écrit le résumé des dérives mesurées depuis le dernier rapport"""
+        if not self.samples:
+            return
+        values = sorted(self.samples)
+        self.samples = []
+        write_metric('loop', interval_ms=self.interval_ms,
+                     samples=len(values),
+                     p50_ms=round(percentile(values, 50), 2),
+                     p99_ms=round(percentile(values, 99), 2),
+                     max_ms=round(values[-1], 2))
+
+
+def install(root):
+    """Active le profilage sur la fenêtre principale si SMARTMEAL_PROFILE est défini"""
+    if not ENABLED:
+        return None
+    setup_metrics_file()
+    sampler = LoopLatencySampler(root)
+    sampler.start()
+    return sampler
@@ -0,0 +1,119 @@
+"""Suivi d'utilisation (consultations, tirages, favoris) en écriture différée.
+
+record() ne fait qu'ajouter l'événement à une liste en mémoire : aucune
+requête ni commit sur le thread de l'interface. Un thread dédié, avec sa
+propre connexion, écrit les événements accumulés par un seul executemany
+dans une transaction, dès que batch_size événements sont en attente ou au
+plus tard toutes les flush_interval secondes. close() écrit le reste (à la
+fermeture de l'application). pause() suspend les écritures (restauration
+d'une sauvegarde) jusqu'à resume() : les événements restent en mémoire.
+"""
+import sqlite3
+import threading
+import time
+
+VIEW = 'view'
+PICK = 'pick'
+FAVORITE = 'favorite'
+UNFAVORITE = 'unfavorite'
+
+
+class EventBuffer:
+    """Tampon d'événements écrit en arrière-plan par paquets"""
+
+    def __init__(self, db_path, batch_size=200, flush_interval=5.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._events = []
+        self._closed = False
+        self._paused = False
+        self._writing = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def record(self, kind, user_id, recipe_id=None):
+        """Ajoute un événement (sans attendre l'écriture)"""
+        with self._condition:
+            self._events.append((user_id, kind, recipe_id, time.time()))
+            if len(self._events) >= self.batch_size:
+                self._condition.notify_all()
+
+    def record_many(self, kind, user_id, recipe_ids):
+        with self._condition:
+            now = time.time()
+            self._events.extend((user_id, kind, recipe_id, now) for recipe_id in recipe_ids)
+            if len(self._events) >= self.batch_size:
+                self._condition.notify_all()
+
+    @property
+    def pending(self):
+        return len(self._events)
+
+    def pause(self):
+        """Suspend les écritures ; attend la fin de celle en cours"""
+        with self._condition:
+            self._paused = True
+            self._condition.notify_all()
+            while self._writing:
+                self._condition.wait()
+
+    def resume(self):
+        with self._condition:
+            self._paused = False
+            self._condition.notify_all()
+
+    def close(self):
+        """Écrit les événements en attente et arrête le thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _take(self):
+        with self._condition:
+            deadline = time.monotonic() + self.flush_interval
+            while not self._closed and (self._paused or len(self._events) < self.batch_size):
+                if self._paused:
+                    self._condition.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            events, self._events = self._events, []
+            self._writing = bool(events)
+            return events, self._closed
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            while True:
+                events, closed = self._take()
+                if events:
+                    try:
+                        self._write(conn, events)
+                    finally:
+                        with self._condition:
+                            self._writing = False
+                            self._condition.notify_all()
+                if closed:
+                    break
+        finally:
+            conn.close()
+
+    def _write(self, conn, events):
+        try:
+            with conn:
+                conn.executemany(
+                    'INSERT INTO usage_events (user_id, kind, recipe_id, created_at) VALUES (?, ?, ?, ?)',
+                    events)
+        except sqlite3.Error:
+            # Base occupée ou indisponible : les événements sont remis en tête du tampon
+            with self._condition:
+                self._events[:0] = events
+            time.sleep(1.0)
+        else:
+            self.written += len(events)